@@ -15,8 +15,85 @@ Used by:
 - Leaderboard calculations
 """
 import math
-from typing import List, Dict, Tuple
-from engine.trader import Trader, Fill
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is an optional accelerator (pip install .[perf])
+    njit = None
+
+from engine.trader import Trader
+
+
+def _compute_fill_contribs(trader: Trader, price: float) -> np.ndarray:
+    """Per-fill P&L contributions at price (excluding fees), materialized once for reuse."""
+    fill_price, qty, side_sign, _ = trader.fill_arrays()
+    return (price - fill_price) * side_sign * qty
+
+
+def _risk_stats_numpy(pnl: np.ndarray) -> Tuple[float, float, float, int, float]:
+    """
+    Risk statistics of a per-fill P&L contribution series.
+    
+    Returns:
+        (mean_return, volatility, downside_vol, downside_count, max_drawdown)
+    """
+    pnl_series = np.cumsum(pnl)
+    returns = np.diff(pnl_series) if len(pnl_series) >= 2 else np.zeros(1)
+    
+    downside_returns = returns[returns < 0]
+    downside_vol = math.sqrt(float(np.mean(downside_returns ** 2))) if downside_returns.size else 0.0
+    max_drawdown = float((np.maximum.accumulate(pnl_series) - pnl_series).max())
+    
+    return float(returns.mean()), float(returns.std()), downside_vol, int(downside_returns.size), max_drawdown
+
+
+def _risk_stats_fused(pnl):
+    """
+    Same statistics as _risk_stats_numpy in two fused loops (JIT target).
+    
+    Returns are fill-to-fill differences of the cumulative curve, i.e. pnl[1:].
+    """
+    n = pnl.shape[0]
+    
+    # Pass 1: mean return + running peak / max drawdown of cumsum(pnl)
+    curve = pnl[0]
+    peak = curve
+    max_drawdown = 0.0
+    total = 0.0
+    for i in range(1, n):
+        total += pnl[i]
+        curve += pnl[i]
+        if curve > peak:
+            peak = curve
+        elif peak - curve > max_drawdown:
+            max_drawdown = peak - curve
+    num_returns = n - 1 if n >= 2 else 1
+    mean_return = total / num_returns
+    
+    # Pass 2: variance + downside semi-variance
+    sq_dev = 0.0
+    down_sq = 0.0
+    down_n = 0
+    for i in range(1, n):
+        r = pnl[i]
+        sq_dev += (r - mean_return) * (r - mean_return)
+        if r < 0:
+            down_sq += r * r
+            down_n += 1
+    if n < 2:
+        sq_dev = mean_return * mean_return  # single zero return
+    
+    volatility = math.sqrt(sq_dev / num_returns)
+    downside_vol = math.sqrt(down_sq / down_n) if down_n > 0 else 0.0
+    return mean_return, volatility, downside_vol, down_n, max_drawdown
+
+
+_risk_stats = (
+    njit(cache=True, fastmath=True)(_risk_stats_fused) if njit is not None else _risk_stats_numpy
+)
 
 
 class AnalyticsEngine:
@@ -55,10 +132,9 @@ class AnalyticsEngine:
         fees = trader.fees_paid
         gross_pnl = net_pnl + fees
         
-        # Realized vs unrealized (simplified)
-        # In reality, need to track cost basis per trade
-        unrealized_pnl = trader.position * (settlement - trader.calculate_vwap() if trader.calculate_vwap() > 0 else 0)
-        realized_pnl = gross_pnl - unrealized_pnl
+        # Realized vs unrealized (average cost basis, maintained by the trader)
+        unrealized_pnl = trader.unrealized_pnl(settlement)
+        realized_pnl = trader.realized_pnl
         
         return {
             'gross_pnl': gross_pnl,
@@ -66,11 +142,15 @@ class AnalyticsEngine:
             'realized_pnl': realized_pnl,
             'unrealized_pnl': unrealized_pnl,
             'fees_paid': fees,
-            'fee_rate': (fees / gross_pnl * 100) if gross_pnl != 0 else 0.0
+            'fee_rate': (fees / gross_pnl * 100) if fees and gross_pnl != 0 else 0.0
         }
     
     @staticmethod
-    def calculate_execution_quality(trader: Trader, settlement: float) -> Dict[str, float]:
+    def calculate_execution_quality(
+        trader: Trader,
+        settlement: float,
+        contribs: Optional[np.ndarray] = None,
+    ) -> Dict[str, float]:
         """
         Measure execution quality.
         
@@ -83,13 +163,14 @@ class AnalyticsEngine:
         Args:
             trader: Trader to analyze
             settlement: Settlement price
+            contribs: Optional precomputed per-fill contributions at settlement
         
         Returns:
             Dict with execution metrics
         """
-        fills = trader.fills
+        num_fills = trader.num_fills
         
-        if not fills:
+        if not num_fills:
             return {
                 'vwap': 0.0,
                 'avg_edge': 0.0,
@@ -99,15 +180,20 @@ class AnalyticsEngine:
             }
         
         # VWAP
-        vwap = trader.calculate_vwap()
+        fill_price, qty, _, _ = trader.fill_arrays()
+        total_qty = int(qty.sum())
+        vwap = float((fill_price * qty).sum()) / total_qty if total_qty > 0 else 0.0
+        
+        if contribs is None:
+            contribs = _compute_fill_contribs(trader, settlement)
         
         # Average edge per trade
-        total_edge = sum(f.pnl_contribution(settlement) for f in fills)
-        avg_edge = total_edge / len(fills)
+        total_edge = float(contribs.sum())
+        avg_edge = total_edge / num_fills
         
         # Adverse fill rate (trades that lost money)
-        adverse_count = sum(1 for f in fills if f.pnl_contribution(settlement) < 0)
-        adverse_rate = (adverse_count / len(fills)) * 100.0
+        adverse_count = int(np.count_nonzero(contribs < 0))
+        adverse_rate = (adverse_count / num_fills) * 100.0
         
         # VWAP vs settlement (execution quality)
         # Positive = bought below settlement (good)
@@ -124,11 +210,16 @@ class AnalyticsEngine:
             'avg_edge': avg_edge,
             'adverse_fill_rate': adverse_rate,
             'vwap_vs_settlement': vwap_vs_settlement,
-            'total_trades': len(fills)
+            'total_trades': num_fills
         }
     
     @staticmethod
-    def calculate_risk_adjusted_returns(trader: Trader, current_price: float, initial_capital: float = 1000.0) -> Dict[str, float]:
+    def calculate_risk_adjusted_returns(
+        trader: Trader,
+        current_price: float,
+        initial_capital: float = 1000.0,
+        contribs: Optional[np.ndarray] = None,
+    ) -> Dict[str, float]:
         """
         Calculate risk-adjusted performance metrics.
         
@@ -142,13 +233,12 @@ class AnalyticsEngine:
             trader: Trader to analyze
             current_price: Current market price
             initial_capital: Starting capital (for % calculations)
+            contribs: Optional precomputed per-fill contributions at current_price
         
         Returns:
             Dict with risk-adjusted metrics
         """
-        fills = trader.fills
-        
-        if not fills:
+        if not trader.num_fills:
             return {
                 'return_pct': 0.0,
                 'sharpe_ratio': 0.0,
@@ -157,52 +247,25 @@ class AnalyticsEngine:
                 'volatility': 0.0
             }
         
-        # Calculate P&L progression
-        pnl_series = []
-        running_pnl = 0.0
-        
-        for fill in fills:
-            running_pnl += fill.pnl_contribution(current_price)
-            pnl_series.append(running_pnl)
+        if contribs is None:
+            contribs = _compute_fill_contribs(trader, current_price)
         
         # Return percentage
         final_pnl = trader.mark_to_market(current_price)
         return_pct = (final_pnl / initial_capital) * 100.0
         
-        # Calculate returns (differences)
-        if len(pnl_series) < 2:
-            returns = [0.0]
-        else:
-            returns = [pnl_series[i] - pnl_series[i-1] for i in range(1, len(pnl_series))]
-        
-        # Volatility (std dev of returns)
-        mean_return = sum(returns) / len(returns)
-        variance = sum((r - mean_return) ** 2 for r in returns) / len(returns)
-        volatility = math.sqrt(variance)
+        # Volatility, downside deviation and max drawdown of the P&L progression
+        mean_return, volatility, downside_vol, downside_count, max_drawdown = _risk_stats(contribs)
         
         # Sharpe ratio (return per unit total risk)
         sharpe = mean_return / volatility if volatility > 0 else 0.0
         
         # Sortino ratio (return per unit downside risk)
-        downside_returns = [r for r in returns if r < 0]
-        if downside_returns:
-            downside_variance = sum(r ** 2 for r in downside_returns) / len(downside_returns)
-            downside_vol = math.sqrt(downside_variance)
+        if downside_count:
             sortino = mean_return / downside_vol if downside_vol > 0 else 0.0
         else:
             sortino = float('inf') if mean_return > 0 else 0.0
         
-        # Max drawdown
-        peak = pnl_series[0]
-        max_drawdown = 0.0
-        
-        for pnl in pnl_series:
-            if pnl > peak:
-                peak = pnl
-            drawdown = peak - pnl
-            if drawdown > max_drawdown:
-                max_drawdown = drawdown
-        
         return {
             'return_pct': return_pct,
             'sharpe_ratio': sharpe,
@@ -228,15 +291,18 @@ class AnalyticsEngine:
         """
         report = {}
         
+        # Per-fill contributions are shared by execution + risk sections
+        contribs = _compute_fill_contribs(trader, settlement)
+        
         # P&L attribution
         report['pnl'] = AnalyticsEngine.calculate_pnl_attribution(trader, settlement)
         
         # Execution quality
-        report['execution'] = AnalyticsEngine.calculate_execution_quality(trader, settlement)
+        report['execution'] = AnalyticsEngine.calculate_execution_quality(trader, settlement, contribs)
         
         # Risk-adjusted returns
         report['risk_adjusted'] = AnalyticsEngine.calculate_risk_adjusted_returns(
-            trader, settlement, initial_capital
+            trader, settlement, initial_capital, contribs
         )
         
         # Basic stats
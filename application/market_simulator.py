@@ -5,16 +5,20 @@ import random
 import threading
 import time
 from collections import deque
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import Callable, Deque, Dict, List, Optional, Tuple
 
+import numpy as np
+
 from engine.order_book import OrderBook, Order
 from engine.matching_engine import MatchingEngine, MatchEvent
 from engine.trader import Trader, Fill, TradeSide
-from engine.bot_strategies import BotManager, TradePrint
+from engine.bot_strategies import BotManager
 from engine.risk_manager import RiskManager
 from infrastructure.config import DifficultyConfig
+from infrastructure.ring_buffer import RingBuffer
 
 
 class GameState(Enum):
@@ -38,15 +42,15 @@ class EventType(Enum):
     LEADERBOARD = "leaderboard"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class MarketEvent:
-    timestamp: float
+    timestamp: float  # wall-clock (time.time()); merged with replay header/command records
     event_type: EventType
     data: Dict
     message: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class MarketSnapshot:
     timestamp: float
     game_state: GameState
@@ -83,8 +87,8 @@ class MarketSnapshot:
     var_95: float = 0.0
     at_risk: bool = False
 
-    recent_trades: List[str] = field(default_factory=list)
-    recent_alerts: List[str] = field(default_factory=list)
+    recent_trades: Tuple[str, ...] = ()
+    recent_alerts: Tuple[str, ...] = ()
 
     bot_positions: Dict[str, int] = field(default_factory=dict)
     bot_pnls: Dict[str, float] = field(default_factory=dict)
@@ -99,6 +103,9 @@ class MarketSnapshot:
 class MarketSimulator:
     def __init__(self, config: DifficultyConfig, seed: Optional[int] = None):
         self.config = config
+        # (buy_fee, sell_fee) indexed by "buyer is taker"; fee is fixed per game
+        taker_fee = float(config.taker_fee or 0.0)
+        self._fee_split: Tuple[Tuple[float, float], Tuple[float, float]] = ((0.0, taker_fee), (taker_fee, 0.0))
         self.game_state = GameState.NOT_STARTED
 
         self.book = OrderBook(quote_lifetime=config.quote_lifetime)
@@ -124,34 +131,75 @@ class MarketSimulator:
             self.traders[name] = Trader(name, is_bot=True)
         self.bot_manager.initialize_bots(self.traders)
 
+        # Parallel cash/position arrays (one slot per trader) for vectorized marking.
+        # Kept in sync by _sync_trader_state after fills and liquidations.
+        self._trader_names: List[str] = list(self.traders)
+        self._trader_index: Dict[str, int] = {n: i for i, n in enumerate(self._trader_names)}
+        self._trader_cash = np.array([t.cash for t in self.traders.values()], dtype=np.float64)
+        self._trader_pos = np.array([t.position for t in self.traders.values()], dtype=np.float64)
+        self._bot_mask = np.array([t.is_bot for t in self.traders.values()], dtype=bool)
+        self._bot_names: List[str] = [n for n, t in self.traders.items() if t.is_bot]
+        self._bot_positions_cache: Optional[Dict[str, int]] = None  # rebuilt after a bot's position changes
+
         self.current_round = 0
         self.total_rounds = getattr(config, "total_rounds", 6)
-        self.time_remaining = 0
         self.round_start_time = 0.0
+        # Monotonic (time.monotonic()) end of the current round/intermission; time_remaining derives from it
+        self._round_deadline: Optional[float] = None
 
         self._all_digits = [self.rng.randint(0, 9) for _ in range(self.total_rounds)]
         self.digits: List[Optional[int]] = [None] * self.total_rounds
         self.settlement_price = int(sum(self._all_digits))
 
-        self.volatility = 1.0
+        # Running totals over self.digits, updated whenever a digit is revealed
+        self._known_sum = 0
+        self._unknown_count = self.total_rounds
 
-        self.events: Deque[MarketEvent] = deque(maxlen=200)
-        self.trade_log: Deque[str] = deque(maxlen=80)
-        self.alert_log: Deque[str] = deque(maxlen=40)
+        self.volatility = 1.0
 
-        # Tape for bots: last N trade prints
-        self._tape: Deque[TradePrint] = deque(maxlen=120)
+        self.events: RingBuffer[MarketEvent] = RingBuffer(200)
+        self.trade_log: RingBuffer[str] = RingBuffer(80)
+        self.alert_log: RingBuffer[str] = RingBuffer(40)
 
         self._state_subscribers: List[Callable[[MarketSnapshot], None]] = []
         self._event_subscribers: List[Callable[[MarketEvent], None]] = []
 
         self._lock = threading.RLock()
-        self._timer_thread: Optional[threading.Thread] = None
-        self._timer_running = False
+        # Nested public calls (user command -> tick -> end_round ...) emit once, on the way out
+        self._txn_depth = 0
+        self._emit_pending = False
+
+        # Subscriber fan-out runs on a lazily started dispatcher thread, outside self._lock.
+        # Snapshots coalesce into a single slot (latest wins); events are delivered in order.
+        self._dispatch_cv = threading.Condition(threading.Lock())
+        self._snapshot_slot: Optional[MarketSnapshot] = None
+        self._pending_events: Deque[MarketEvent] = deque()
+        self._dispatch_busy = False
+        self._dispatch_stop = False  # set by close(); the dispatcher drains and exits
+        self._dispatcher_thread: Optional[threading.Thread] = None
 
         self._tick_count = 0
         self._last_leaderboard: List[Tuple[str, float]] = []
 
+        # Published snapshot: rebuilt only after a state-changing call marks it dirty.
+        # Readers take it without the lock (immutable object, swapped by reference).
+        self._snapshot_dirty = True
+        self._cached_snapshot: Optional[MarketSnapshot] = None
+
+    # ---------------- Clock ----------------
+
+    @property
+    def time_remaining(self) -> int:
+        """Whole seconds left in the current round or intermission (0 when idle)."""
+        deadline = self._round_deadline
+        if deadline is None:
+            return 0
+        return max(0, math.ceil(deadline - time.monotonic()))
+
+    @time_remaining.setter
+    def time_remaining(self, seconds: int) -> None:
+        self._round_deadline = time.monotonic() + seconds
+
     # ---------------- Subscription API ----------------
 
     def subscribe_to_state_changes(self, callback):
@@ -162,10 +210,35 @@ class MarketSimulator:
         with self._lock:
             self._event_subscribers.append(callback)
 
+    def flush_notifications(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until every queued snapshot/event has been delivered to subscribers.
+
+        Returns False if the timeout expired first. Must not be called while holding
+        a lock that a subscriber callback needs.
+        """
+        if threading.current_thread() is self._dispatcher_thread:
+            return True
+        with self._dispatch_cv:
+            return self._dispatch_cv.wait_for(self._dispatch_idle, timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Deliver what is already queued, then stop the dispatcher thread.
+
+        Later snapshots/events are no longer sent to subscribers. Idempotent.
+        """
+        with self._dispatch_cv:
+            self._dispatch_stop = True
+            thread = self._dispatcher_thread
+            self._dispatch_cv.notify_all()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
     # ---------------- Game lifecycle ----------------
 
     def start_round(self, round_number: int) -> None:
-        with self._lock:
+        with self._transaction():
             if round_number < 1 or round_number > self.total_rounds:
                 raise ValueError(f"Invalid round number: {round_number}")
             if self.game_state == GameState.ROUND_ACTIVE:
@@ -173,20 +246,21 @@ class MarketSimulator:
             if self.game_state == GameState.GAME_COMPLETE:
                 raise RuntimeError("Game complete.")
 
+            self._snapshot_dirty = True
             self.current_round = round_number
             self.game_state = GameState.ROUND_ACTIVE
-            self.time_remaining = int(self.config.round_time)
             self.round_start_time = time.time()
+            self._round_deadline = time.monotonic() + int(self.config.round_time)
 
-            self._start_timer()
             self._log_event(EventType.ROUND_START, {"round": round_number}, f"Round {round_number} started")
             self._emit_state_change()
 
     def end_round(self) -> None:
-        with self._lock:
+        with self._transaction():
             if self.game_state != GameState.ROUND_ACTIVE:
                 return
 
+            self._snapshot_dirty = True
             for trader_name in list(self.traders.keys()):
                 self.book.cancel_orders(trader_name)
 
@@ -202,26 +276,25 @@ class MarketSimulator:
 
             idx = self.current_round - 1
             if 0 <= idx < self.total_rounds and self.digits[idx] is None:
-                revealed = self._all_digits[idx]
-                self.digits[idx] = revealed
+                revealed = self._reveal_digit(idx)
                 self._log_event(EventType.DIGIT_REVEAL, {"digit": revealed, "index": idx}, f"Digit {idx+1} revealed: {revealed}")
 
-            unknowns = sum(1 for d in self.digits if d is None)
-            spike = 1.0 + (0.05 + 0.02 * max(0, unknowns)) * self.rng.random()
+            spike = 1.0 + (0.05 + 0.02 * max(0, self._unknown_count)) * self.rng.random()
             self.volatility = min(self.volatility * spike, self.config.volatility_cap)
 
             self.game_state = GameState.ROUND_ENDING
             self.time_remaining = 10
-            self._timer_running = True
             self._log_alert("Intermission: Next round starts in 10s...")
             self._emit_state_change()
 
     def _end_game(self) -> None:
+        self._snapshot_dirty = True
         self.game_state = GameState.GAME_COMPLETE
+        self._round_deadline = None
 
         last_idx = self.total_rounds - 1
         if self.digits[last_idx] is None:
-            self.digits[last_idx] = self._all_digits[last_idx]
+            self._reveal_digit(last_idx)
 
         settlement = self.settlement_price
         self._log_event(
@@ -235,7 +308,7 @@ class MarketSimulator:
     # ---------------- Main loop ----------------
 
     def tick(self) -> None:
-        with self._lock:
+        with self._transaction():
             if self.game_state == GameState.ROUND_ENDING:
                 if self.time_remaining <= 0:
                     self.start_round(self.current_round + 1)
@@ -244,7 +317,12 @@ class MarketSimulator:
                 return
 
             self._tick_count += 1
-            now = time.time()
+            self._snapshot_dirty = True
+            # Order/match domain runs on the monotonic clock; everything recorded past the
+            # tick (fills, risk events, market events) is stamped wall-clock, so it lines up
+            # with replay records. Both are sampled once per tick.
+            now = time.monotonic()
+            wall = time.time()
 
             self.book.expire_orders(now)
 
@@ -257,7 +335,6 @@ class MarketSimulator:
                 fair_value=fv,
                 volatility=self.volatility,
                 user_toxicity=self.user.adverse_selection_score,
-                tape=list(self._tape),
                 now=now,
                 risk_manager=self.risk_manager,
             )
@@ -265,11 +342,11 @@ class MarketSimulator:
             # 2) Match once (single source of truth for executions)
             matches = self.matching_engine.match_orders(now)
             for m in matches:
-                self._execute_match(m, fv)
+                self._execute_match(m, fv, wall)
 
             # 3) Cancel IOC leftovers (true IOC semantics)
-            for oid in ioc_ids:
-                self.book.cancel_order_by_id(int(oid))
+            if ioc_ids:
+                self.book.cancel_orders_by_ids(map(int, ioc_ids))
 
             # 4) Vol feedback
             if len(matches) > 2:
@@ -277,14 +354,19 @@ class MarketSimulator:
             else:
                 self.volatility = max(1.0, self.volatility * 0.999)
 
-            # 5) Risk checks
-            for name, tr in self.traders.items():
-                if self.risk_manager.check_margin_call(tr, fv, now):
+            # 5) Risk checks: mark everyone at once, then run the full check only
+            # for traders already below the margin threshold
+            risk = self.risk_manager.get_risk_metrics_bulk(self._trader_pos, self._trader_cash, fv)
+            for i in np.flatnonzero(risk['mtm_pnl'] < self.risk_manager.margin_threshold).tolist():
+                name = self._trader_names[i]
+                tr = self.traders[name]
+                if self.risk_manager.check_margin_call(tr, fv, wall):
+                    self._sync_trader_state(name)
                     self.book.cancel_orders(name)
                     msg = f"MARGIN CALL: {name} liquidated"
                     if name == "YOU":
                         self._log_alert(msg)
-                    self._log_event(EventType.MARGIN_CALL, {"trader": name}, msg)
+                    self._log_event(EventType.MARGIN_CALL, {"trader": name}, msg, wall)
 
             if self.time_remaining <= 0:
                 self.end_round()
@@ -294,7 +376,7 @@ class MarketSimulator:
     # ---------------- User commands (GUI expects these signatures) ----------------
 
     def make_market(self, bid: float, ask: float, qty: int) -> bool:
-        with self._lock:
+        with self._transaction():
             if self.game_state != GameState.ROUND_ACTIVE:
                 return False
             if bid >= ask:
@@ -302,7 +384,7 @@ class MarketSimulator:
             if qty <= 0:
                 return False
 
-            now = time.time()
+            now = time.monotonic()
             self.book.cancel_orders("YOU")
             self.book.add_order(Order("YOU", "buy", float(bid), int(qty), now))
             self.book.add_order(Order("YOU", "sell", float(ask), int(qty), now))
@@ -311,7 +393,7 @@ class MarketSimulator:
             return True
 
     def aggress_buy(self, price: float, qty: int) -> bool:
-        with self._lock:
+        with self._transaction():
             if self.game_state != GameState.ROUND_ACTIVE:
                 return False
             if qty <= 0 or price <= 0:
@@ -320,13 +402,13 @@ class MarketSimulator:
             if not ok:
                 self._log_alert(str(reason))
                 return False
-            self.book.add_order(Order("YOU", "buy", float(price), int(qty), time.time()))
+            self.book.add_order(Order("YOU", "buy", float(price), int(qty), time.monotonic()))
             self._log_trade(f"YOU buy {qty} @ {price:.1f}")
             self.tick()
             return True
 
     def aggress_sell(self, price: float, qty: int) -> bool:
-        with self._lock:
+        with self._transaction():
             if self.game_state != GameState.ROUND_ACTIVE:
                 return False
             if qty <= 0 or price <= 0:
@@ -335,38 +417,53 @@ class MarketSimulator:
             if not ok:
                 self._log_alert(str(reason))
                 return False
-            self.book.add_order(Order("YOU", "sell", float(price), int(qty), time.time()))
+            self.book.add_order(Order("YOU", "sell", float(price), int(qty), time.monotonic()))
             self._log_trade(f"YOU sell {qty} @ {price:.1f}")
             self.tick()
             return True
 
     def cancel_user_orders(self) -> int:
-        with self._lock:
+        with self._transaction():
             n = self.book.cancel_orders("YOU")
             if n:
+                self._snapshot_dirty = True
                 self._log_trade(f"Canceled {n} orders")
             return n
 
     # ---------------- Snapshot ----------------
 
     def get_state_snapshot(self) -> MarketSnapshot:
+        # Lock-free fast path: never blocks behind tick(). A reader racing a mutation
+        # gets the last published snapshot, which is consistent and at most one update old.
+        cached = self._cached_snapshot
+        if not self._snapshot_dirty and cached is not None and cached.time_remaining == self.time_remaining:
+            return cached
+
         with self._lock:
+            cached = self._cached_snapshot
+            if not self._snapshot_dirty and cached is not None and cached.time_remaining == self.time_remaining:
+                return cached
+
             fv = self._calculate_fair_value()
             std = self._calculate_theoretical_std()
+            unknowns = self._unknown_count
             bb, ba = self.book.get_best_bid_ask()
             bids, asks = self.book.get_depth(6)
 
             masked = ["?" if d is None else str(d) for d in self.digits]
 
-            bot_positions = {n: t.position for n, t in self.traders.items() if t.is_bot}
-            bot_pnls = {n: t.mark_to_market(fv) for n, t in self.traders.items() if t.is_bot}
+            mask = self._bot_mask
+            if self._bot_positions_cache is None:
+                self._bot_positions_cache = dict(zip(self._bot_names, self._trader_pos[mask].astype(np.int64).tolist()))
+            bot_positions = self._bot_positions_cache
+            bot_pnls = dict(zip(self._bot_names, (self._trader_cash[mask] + self._trader_pos[mask] * fv).tolist()))
 
             eng_stats = self.matching_engine.get_stats()
             book_stats = self.book.get_stats()
 
             risk = self.risk_manager.get_risk_metrics(self.user, fv)
 
-            return MarketSnapshot(
+            snap = MarketSnapshot(
                 timestamp=time.time(),
                 game_state=self.game_state,
                 current_round=self.current_round,
@@ -390,15 +487,15 @@ class MarketSimulator:
                 user_vwap=float(self.user.calculate_vwap()),
                 user_toxicity=float(self.user.adverse_selection_score),
                 delta=float(self.user.position),
-                gamma=float(abs(self.user.position) * max(0, sum(1 for d in self.digits if d is None)) * 0.15),
-                vega=float(sum(1 for d in self.digits if d is None)) * 0.5,
-                theta=-0.01 * float(sum(1 for d in self.digits if d is None)),
+                gamma=float(abs(self.user.position) * max(0, unknowns) * 0.15),
+                vega=float(unknowns) * 0.5,
+                theta=-0.01 * float(unknowns),
                 position_utilization=float(risk.get("position_utilization", 0.0)),
                 margin_cushion=float(risk.get("margin_cushion", 0.0)),
                 var_95=float(risk.get("var_95", 0.0)),
                 at_risk=bool(risk.get("at_risk", False)),
-                recent_trades=list(self.trade_log),
-                recent_alerts=list(self.alert_log),
+                recent_trades=self.trade_log.view(),
+                recent_alerts=self.alert_log.view(),
                 bot_positions=bot_positions,
                 bot_pnls=bot_pnls,
                 leaderboard=list(self._last_leaderboard) if self._last_leaderboard else [],
@@ -407,33 +504,55 @@ class MarketSimulator:
                 num_matches=int(eng_stats.get("total_matches", 0)),
                 book_depth=int(book_stats.get("active_bid_levels", 0) + book_stats.get("active_ask_levels", 0)),
             )
+            self._cached_snapshot = snap
+            self._snapshot_dirty = False
+            return snap
 
     # ---------------- Internals ----------------
 
+    def _reveal_digit(self, idx: int) -> int:
+        """Reveal digit idx and keep the running known-sum / unknown-count in sync."""
+        revealed = self._all_digits[idx]
+        self.digits[idx] = revealed
+        self._known_sum += revealed
+        self._unknown_count -= 1
+        return revealed
+
     def _calculate_fair_value(self) -> float:
-        known_sum = sum(d for d in self.digits if d is not None)
-        unknowns = sum(1 for d in self.digits if d is None)
-        return float(known_sum + unknowns * 4.5)
+        return float(self._known_sum + self._unknown_count * 4.5)
 
     def _calculate_theoretical_std(self) -> float:
-        unknowns = sum(1 for d in self.digits if d is None)
-        return math.sqrt(unknowns * 8.25)
+        return math.sqrt(self._unknown_count * 8.25)
 
     def _compute_leaderboard(self, mark_price: float) -> List[Tuple[str, float]]:
-        lb = [(n, float(t.mark_to_market(mark_price))) for n, t in self.traders.items()]
-        lb.sort(key=lambda x: x[1], reverse=True)
-        return lb
-
-    def _execute_match(self, match: MatchEvent, fair_value: float) -> None:
+        pnl = self._trader_cash + self._trader_pos * mark_price  # Trader.mark_to_market, all traders at once
+        order = np.argsort(-pnl, kind="stable")
+        names = self._trader_names
+        return [(names[i], float(pnl[i])) for i in order]
+
+    def _sync_trader_state(self, name: str) -> None:
+        tr = self.traders[name]
+        i = self._trader_index[name]
+        self._trader_cash[i] = tr.cash
+        if self._trader_pos[i] != tr.position:
+            self._trader_pos[i] = tr.position
+            if tr.is_bot:
+                self._bot_positions_cache = None
+
+    def _execute_match(self, match: MatchEvent, fair_value: float, event_time: Optional[float] = None) -> None:
+        self._snapshot_dirty = True
         buyer = self.traders[match.buyer_id]
         seller = self.traders[match.seller_id]
 
-        fee = float(self.config.taker_fee or 0.0)
-        buy_fee = fee if match.taker_id == match.buyer_id else 0.0
-        sell_fee = fee if match.taker_id == match.seller_id else 0.0
+        is_buyer_taker = match.taker_id == match.buyer_id
+        buy_fee, sell_fee = self._fee_split[is_buyer_taker]
 
-        buyer.apply_fill(Fill(match.price, match.quantity, TradeSide.BUY, match.timestamp, match.seller_id, buy_fee))
-        seller.apply_fill(Fill(match.price, match.quantity, TradeSide.SELL, match.timestamp, match.buyer_id, sell_fee))
+        # Fills outlive the tick, so they take the wall-clock time rather than the match's monotonic one
+        wall = time.time() if event_time is None else event_time
+        buyer.apply_fill(Fill(match.price, match.quantity, TradeSide.BUY, wall, match.seller_id, buy_fee))
+        seller.apply_fill(Fill(match.price, match.quantity, TradeSide.SELL, wall, match.buyer_id, sell_fee))
+        self._sync_trader_state(match.buyer_id)
+        self._sync_trader_state(match.seller_id)
 
         # Update adverse selection (toxicity) for both sides
         try:
@@ -442,61 +561,104 @@ class MarketSimulator:
         except Exception:
             pass
 
-        # Tape print for bots (order flow)
-        taker_side: str = "buy" if match.taker_id == match.buyer_id else "sell"
-        self._tape.append(
-            TradePrint(
-                timestamp=float(match.timestamp),
-                price=float(match.price),
-                qty=int(match.quantity),
-                taker_side=taker_side,  # type: ignore[arg-type]
-            )
-        )
-
-        b = "YOU" if match.buyer_id == "YOU" else match.buyer_id[:10]
-        s = "YOU" if match.seller_id == "YOU" else match.seller_id[:10]
-        self._log_trade(f"Trade: {b} bought {match.quantity} @ {match.price:.1f} from {s}")
-        self._log_event(EventType.TRADE_EXECUTED, {"price": match.price, "quantity": match.quantity}, "Trade executed")
-
-    def _start_timer(self) -> None:
-        if self._timer_running:
-            return
-        self._timer_running = True
+        # Order flow for bots
+        self.bot_manager.push_trade(int(match.quantity), "buy" if is_buyer_taker else "sell")
 
-        def _run() -> None:
-            while True:
-                time.sleep(1.0)
-                with self._lock:
-                    if not self._timer_running:
-                        return
-                    if self.game_state not in (GameState.ROUND_ACTIVE, GameState.ROUND_ENDING):
-                        continue
-                    self.time_remaining -= 1
-
-        self._timer_thread = threading.Thread(target=_run, daemon=True, name="round-timer")
-        self._timer_thread.start()
+        self._log_trade(f"Trade: {match.buyer_id[:10]} bought {match.quantity} @ {match.price:.1f} from {match.seller_id[:10]}")
+        self._log_event(
+            EventType.TRADE_EXECUTED, {"price": match.price, "quantity": match.quantity}, "Trade executed", wall
+        )
 
     def _log_trade(self, message: str) -> None:
         self.trade_log.append(message)
+        self._snapshot_dirty = True
 
     def _log_alert(self, message: str) -> None:
         self.alert_log.append(message)
+        self._snapshot_dirty = True
 
-    def _log_event(self, event_type: EventType, data: Dict, message: str) -> None:
-        ev = MarketEvent(time.time(), event_type, data, message)
+    def _log_event(self, event_type: EventType, data: Dict, message: str, timestamp: Optional[float] = None) -> None:
+        ev = MarketEvent(time.time() if timestamp is None else timestamp, event_type, data, message)
         self.events.append(ev)
-        subs = list(self._event_subscribers)
-        for cb in subs:
+        if not self._event_subscribers:
+            return
+        with self._dispatch_cv:
+            if self._dispatch_stop:
+                return
+            self._pending_events.append(ev)
+            self._ensure_dispatcher()
+            self._dispatch_cv.notify_all()
+
+    @contextmanager
+    def _transaction(self):
+        """Hold the lock; defer state emits until the outermost transaction exits."""
+        with self._lock:
+            self._txn_depth += 1
             try:
-                cb(ev)
-            except Exception:
-                pass
+                yield
+            finally:
+                self._txn_depth -= 1
+                if self._txn_depth == 0 and self._emit_pending:
+                    self._emit_pending = False
+                    self._publish_state()
 
     def _emit_state_change(self) -> None:
+        if self._txn_depth:
+            self._emit_pending = True
+            return
+        self._publish_state()
+
+    def _publish_state(self) -> None:
+        if not self._state_subscribers:
+            return
         snap = self.get_state_snapshot()
-        subs = list(self._state_subscribers)
-        for cb in subs:
+        with self._dispatch_cv:
+            if self._dispatch_stop:
+                return
+            self._snapshot_slot = snap  # supersedes any snapshot not yet delivered
+            self._ensure_dispatcher()
+            self._dispatch_cv.notify_all()
+
+    # ---------------- Notification dispatch ----------------
+
+    def _dispatch_idle(self) -> bool:
+        return self._snapshot_slot is None and not self._pending_events and not self._dispatch_busy
+
+    def _ensure_dispatcher(self) -> None:
+        # Caller holds self._dispatch_cv
+        if self._dispatcher_thread is not None:
+            return
+        self._dispatcher_thread = threading.Thread(target=self._dispatch_loop, daemon=True, name="state-dispatcher")
+        self._dispatcher_thread.start()
+
+    def _dispatch_loop(self) -> None:
+        cv = self._dispatch_cv
+        while True:
+            with cv:
+                cv.wait_for(lambda: self._snapshot_slot is not None or bool(self._pending_events) or self._dispatch_stop)
+                if self._snapshot_slot is None and not self._pending_events:
+                    return  # stopped and drained
+                snap, self._snapshot_slot = self._snapshot_slot, None
+                events = list(self._pending_events)
+                self._pending_events.clear()
+                self._dispatch_busy = True
+
             try:
-                cb(snap)
-            except Exception:
-                pass
+                if events:
+                    subs = list(self._event_subscribers)
+                    for ev in events:
+                        for cb in subs:
+                            try:
+                                cb(ev)
+                            except Exception:
+                                pass
+                if snap is not None:
+                    for cb in list(self._state_subscribers):
+                        try:
+                            cb(snap)
+                        except Exception:
+                            pass
+            finally:
+                with cv:
+                    self._dispatch_busy = False
+                    cv.notify_all()
@@ -3,9 +3,21 @@ from __future__ import annotations
 from dataclasses import dataclass, asdict
 from threading import RLock
 from typing import Any, Dict, List, Optional, Callable
+import queue
+import sys
 import time
 
-from infrastructure.persistence import atomic_write_jsonl, read_jsonl
+import numpy as np
+
+from infrastructure.persistence import (
+    BackgroundJsonlWriter,
+    BlockIndexedJsonlWriter,
+    atomic_write_columnar,
+    atomic_write_jsonl,
+    read_columnar,
+    read_indexed_jsonl,
+    read_jsonl,
+)
 
 
 @dataclass(frozen=True)
@@ -27,36 +39,73 @@ class ReplayManager:
     If you want that, say so and the simulator can be patched cleanly.
     """
 
-    def __init__(self):
-        self._lock = RLock()
+    DEFAULT_AUTOSAVE_PATH = "runs/autosave_replay.jsonl"
+
+    def __init__(
+        self,
+        autosave_path: Optional[str] = DEFAULT_AUTOSAVE_PATH,
+        autosave_block_size: Optional[int] = None,
+    ):
+        """
+        Args:
+            autosave_path: JSONL file every record is appended to in the background
+                while attached; each attach() starts it afresh (None disables autosave).
+            autosave_block_size: If set, autosave writes compressed blocks of about this
+                many bytes plus a ".bidx" index instead of plain JSONL, so the file can be
+                opened with ReplayPlayer.from_indexed().
+        """
+        self._lock = RLock()  # attach/detach/save lifecycle only; recording is lock-free
         self._header: Optional[ReplayHeader] = None
-        self._records: List[Dict[str, Any]] = []
+        self._incoming: "queue.SimpleQueue[Dict[str, Any]]" = queue.SimpleQueue()
+        self._records: List[Dict[str, Any]] = []  # full stream, drained from _incoming by save()
         self._unsubscribe: Optional[Callable[[], None]] = None
+        self._sim = None
+        self._autosave_path = autosave_path
+        self._autosave_block_size = autosave_block_size
+        self._autosave: Optional[BackgroundJsonlWriter] = None
 
     def attach(self, *, sim, session_meta) -> None:
         """
         Attach to a MarketSimulator instance and record its MarketEvents.
         """
         with self._lock:
-            self._header = ReplayHeader(
+            self._sim = sim
+            if self._autosave_path and self._autosave is None:
+                # A new recording replaces the previous autosave (and its index)
+                if self._autosave_block_size:
+                    self._autosave = BlockIndexedJsonlWriter(
+                        self._autosave_path, self._autosave_block_size, append=False
+                    )
+                else:
+                    self._autosave = BackgroundJsonlWriter(self._autosave_path, append=False)
+            header = self._header = ReplayHeader(
                 version=1,
                 created_at=time.time(),
                 session_id=session_meta.session_id,
                 seed=session_meta.seed,
                 difficulty_name=session_meta.difficulty_name,
             )
-            def on_event(ev):
-                self._append_record({"type": "event", "ts": ev.timestamp, "event": ev.__dict__})
-            self._unsubscribe=sim.subscribe_to_events(on_event)
-            
-            # best-effort: record periodic snapshots if you want (off by default)
-            self._append_record({"type": "header", "ts": time.time(), "header": asdict(self._header)})
+            self._unsubscribe = sim.subscribe_to_events(self._on_event)
+
+        # Recording is lock-free, so the header is queued after releasing the lock
+        # best-effort: record periodic snapshots if you want (off by default)
+        self._append_record({"type": "header", "ts": time.time(), "header": asdict(header)})
 
     def detach(self) -> None:
         with self._lock:
             if self._unsubscribe:
                 self._unsubscribe()
                 self._unsubscribe = None
+        if self._sim is not None and hasattr(self._sim, "flush_notifications"):
+            self._sim.flush_notifications()
+        with self._lock:
+            if self._autosave is not None:
+                self._autosave.close()
+                self._autosave = None
+
+    def _on_event(self, ev) -> None:
+        # MarketEvent is frozen; it is serialized as-is on the writer/save path
+        self._append_record({"type": "event", "ts": ev.timestamp, "event": ev})
 
     def record_command(self, command: str, payload: Dict[str, Any]) -> None:
         """
@@ -64,27 +113,78 @@ class ReplayManager:
         Example:
             replay.record_command("make_market", {"bid": 27.0, "ask": 29.0, "qty": 1})
         """
-        self._append_record({"type": "command", "ts": time.time(), "command": command, "payload": payload})
+        # Command names come from parsed user input; interning shares one object per name
+        self._append_record({"type": "command", "ts": time.time(), "command": sys.intern(command), "payload": payload})
 
     def record_snapshot(self, snapshot_obj) -> None:
         """
         Optional: snapshots make replay “visual” without requiring deterministic re-sim.
         """
-        self._append_record({"type": "snapshot", "ts": time.time(), "snapshot": snapshot_obj.__dict__})
+        self._append_record({"type": "snapshot", "ts": time.time(), "snapshot": snapshot_obj})
 
     def _append_record(self, rec: Dict[str, Any]) -> None:
-        with self._lock:
-            self._records.append(rec)
-            if len(self._records)>=10_000:
-                atomic_write_jsonl("runs/autosave_replay.jsonl", self._records)
+        self._incoming.put_nowait(rec)
+        autosave = self._autosave
+        if autosave is not None:
+            autosave.put(rec)  # encoded + written on the writer thread
+
+    def _drain_incoming(self) -> None:
+        # Caller holds self._lock
+        incoming = self._incoming
+        records = self._records
+        while True:
+            try:
+                records.append(incoming.get_nowait())
+            except queue.Empty:
+                return
+
+    def save(self, path_jsonl: str, durable: bool = False) -> None:
+        """
+        Save the stream as JSONL (see load).
+
+        Not synced to disk by default, like the autosave stream: a crash right
+        after saving may lose the latest file. Pass durable=True for a final save.
+        """
+        self._save_with(atomic_write_jsonl, path_jsonl, durable)
+
+    def save_columnar(self, path: str, durable: bool = False) -> None:
+        """
+        Save the stream as a compressed columnar file (see load_columnar).
+
+        Same records as save(), typically several times smaller and faster to load.
+        """
+        self._save_with(atomic_write_columnar, path, durable)
 
-    def save(self, path_jsonl: str) -> None:
+    def _save_with(self, writer: Callable[..., None], path: str, durable: bool) -> None:
+        # Events reach on_event via the simulator's dispatcher thread; drain it first.
+        if self._sim is not None and hasattr(self._sim, "flush_notifications"):
+            self._sim.flush_notifications()
         with self._lock:
-            atomic_write_jsonl(path_jsonl, self._records)
+            self._drain_incoming()
+            writer(path, self._records, durable=durable)
+            if self._autosave is not None:
+                self._autosave.flush()
 
     @staticmethod
     def load(path_jsonl: str) -> List[Dict[str, Any]]:
-        return read_jsonl(path_jsonl)
+        return _intern_tags(read_jsonl(path_jsonl))
+
+    @staticmethod
+    def load_columnar(path: str) -> List[Dict[str, Any]]:
+        return _intern_tags(read_columnar(path))
+
+
+def _intern_tags(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Intern the small fixed vocabularies ("type", "command") of decoded records in place."""
+    intern = sys.intern
+    for r in records:
+        tag = r.get("type")
+        if tag.__class__ is str:
+            r["type"] = intern(tag)
+            cmd = r.get("command")
+            if cmd.__class__ is str:
+                r["command"] = intern(cmd)
+    return records
 
 
 class ReplayPlayer:
@@ -94,7 +194,27 @@ class ReplayPlayer:
     """
 
     def __init__(self, records: List[Dict[str, Any]]):
-        self.records = sorted(records, key=lambda r: (r.get("ts", 0.0), r.get("type", "")))
+        # Stable sort on a timestamp array: equal timestamps keep recording order
+        ts = np.fromiter((r.get("ts", 0.0) for r in records), dtype=np.float64, count=len(records))
+        order = np.argsort(ts, kind="stable")
+        self.records = [records[i] for i in order.tolist()]
+        self._ts = ts[order]
+
+    @classmethod
+    def from_indexed(cls, path: str, t0: Optional[float] = None, t1: Optional[float] = None) -> "ReplayPlayer":
+        """
+        Load a block-indexed replay (ReplayManager autosave_block_size), optionally only
+        the [t0, t1] time range; blocks outside the range are never decompressed.
+        """
+        return cls(_intern_tags(read_indexed_jsonl(path, t0, t1)))
+
+    def iter_events_between(self, t0: float, t1: float):
+        """Events with t0 <= ts <= t1 (binary search over the sorted timestamps)."""
+        lo = int(np.searchsorted(self._ts, t0, side="left"))
+        hi = int(np.searchsorted(self._ts, t1, side="right"))
+        for r in self.records[lo:hi]:
+            if r.get("type") == "event":
+                yield r["event"]
 
     def iter_events(self):
         for r in self.records:
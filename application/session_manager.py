@@ -1,13 +1,16 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, asdict
+from dataclasses import asdict, dataclass
 from threading import RLock
-from typing import Dict, Optional, Tuple, Any
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Tuple, Any
+import itertools
+import os
 import time
-import uuid
 
 # Injected dependency
 from application.market_simulator import MarketSimulator
+from infrastructure.config import DifficultyConfig
 from infrastructure.persistence import atomic_write_json, read_json
 
 @dataclass(frozen=True)
@@ -19,6 +22,22 @@ class SessionMeta:
     user_id: str = "local"
 
 
+# Session ids only need to be unique, not unguessable: pid + process-wide counter + clock
+_session_counter = itertools.count()
+
+
+_DIFFICULTY_DISPATCH = {
+    "EASY": DifficultyConfig.EASY,
+    "MEDIUM": DifficultyConfig.MEDIUM,
+    "HARD": DifficultyConfig.HARD,
+    "AXXELA": DifficultyConfig.AXXELA,
+}
+
+
+def _new_session_id() -> str:
+    return f"{os.getpid():x}-{next(_session_counter):x}-{time.time_ns():x}"
+
+
 class SessionManager:
     """
     Owns simulator instances keyed by session_id.
@@ -30,10 +49,14 @@ class SessionManager:
         self._lock = RLock()
         self._sessions: Dict[str, MarketSimulator] = {}
         self._meta: Dict[str, SessionMeta] = {}
+        self._meta_dicts: Dict[str, Dict[str, Any]] = {}  # asdict(meta), built once (meta is frozen)
+        # Copy-on-write read view: rebuilt on create/close, shared by list_sessions() callers
+        self._meta_view: Mapping[str, SessionMeta] = MappingProxyType({})
+        self._meta_version = 0
 
     def create_session(self, config, *, seed: Optional[int] = None, user_id: str = "local") -> SessionMeta:
         with self._lock:
-            session_id = str(uuid.uuid4())
+            session_id = _new_session_id()
             
             # If no seed provided, generate one based on time
             if seed is None:
@@ -52,6 +75,8 @@ class SessionManager:
 
             self._sessions[session_id] = sim
             self._meta[session_id] = meta
+            self._meta_dicts[session_id] = asdict(meta)
+            self._publish_meta()
 
             return meta
 
@@ -69,14 +94,32 @@ class SessionManager:
 
     def close_session(self, session_id: str) -> bool:
         with self._lock:
-            existed = session_id in self._sessions
-            self._sessions.pop(session_id, None)
-            self._meta.pop(session_id, None)
-            return existed
-
-    def list_sessions(self) -> Dict[str, SessionMeta]:
+            sim = self._sessions.pop(session_id, None)
+            self._meta_dicts.pop(session_id, None)
+            if self._meta.pop(session_id, None) is not None:
+                self._publish_meta()
+        # Outside the lock: close() waits for subscriber callbacks still running
+        if sim is not None:
+            sim.close()
+        return sim is not None
+
+    def _publish_meta(self) -> None:
+        # Caller holds self._lock
+        self._meta_view = MappingProxyType(dict(self._meta))
+        self._meta_version += 1
+
+    def list_sessions(self) -> Mapping[str, SessionMeta]:
+        """Read-only view of all sessions; it does not change after it is returned."""
+        return self._meta_view
+
+    def list_sessions_if_changed(self, last_version: int) -> Tuple[int, Optional[Mapping[str, SessionMeta]]]:
+        """
+        Polling helper: returns (version, sessions), with sessions None when nothing
+        was created or closed since last_version.
+        """
         with self._lock:
-            return dict(self._meta)
+            version, view = self._meta_version, self._meta_view
+        return version, (None if version == last_version else view)
 
     def save_checkpoint(self, session_id: str, path: str) -> None:
         """
@@ -86,12 +129,11 @@ class SessionManager:
         """
         with self._lock:
             sim = self.get(session_id)
-            meta = self.get_meta(session_id)
             snap = sim.get_state_snapshot()
 
             payload = {
-                "meta": asdict(meta),
-                "snapshot": snap.__dict__,
+                "meta": self._meta_dicts[session_id],
+                "snapshot": snap,  # dataclasses are serialized by the persistence layer
                 "saved_at": time.time(),
             }
             atomic_write_json(path, payload)
@@ -108,11 +150,13 @@ class SessionManager:
 
         # Reconstruct config from name
         difficulty_name = meta_d.get("difficulty_name", "custom")
-        if hasattr(config_factory, difficulty_name):
+        if config_factory is DifficultyConfig:
+            config = _DIFFICULTY_DISPATCH.get(difficulty_name, DifficultyConfig.MEDIUM)()
+        elif hasattr(config_factory, difficulty_name):
             config = getattr(config_factory, difficulty_name)()
         else:
             # Fallback or custom handling
-            config = config_factory("MEDIUM") 
+            config = config_factory("MEDIUM")
 
         # Create new session with the SAME SEED
         meta = self.create_session(
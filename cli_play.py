@@ -2,28 +2,40 @@
 
 from __future__ import annotations
 
+import argparse
+import queue
 import threading
 import time
 from typing import Optional
 
 from infrastructure.config import DifficultyConfig
-from infrastructure.logger import configure_logging, LoggingConfig
+from infrastructure.logger import configure_logging, get_logger, LoggingConfig
 from application.session_manager import SessionManager
 from application.replay_manager import ReplayManager
-from application.market_simulator import GameState
+from application.market_simulator import EventType, GameState
 
 TICK_INTERVAL_SEC = 0.20  # market heartbeat
+TICK_ERROR_LOG_INTERVAL_SEC = 1.0  # at most one tick traceback per second
+TICK_MAX_BACKOFF_SEC = 5.0
+CHECKPOINT_PATH = "runs/last_checkpoint.json"
+REPLAY_PATH = "runs/last_replay.jsonl"
+PROMPT = "axxela> "
 
+_log = get_logger(__name__)
 
-def _fmt(x: Optional[float], fmt: str = "{:.1f}") -> str:
-    return "-" if x is None else fmt.format(x)
+# Queued by the simulator callback so the REPL wakes up and re-prints on round transitions
+_STATE_CHANGED = object()
+_WAKE_EVENTS = frozenset({EventType.ROUND_START, EventType.ROUND_END})
+
+
+def _fmt1(x: Optional[float]) -> str:
+    return "-" if x is None else f"{x:.1f}"
 
 
 def _fmt_lb(lb):
     if not lb:
         return "-"
-    top = lb[:5]
-    return " | ".join([f"{i+1}:{name}({pnl:.2f})" for i, (name, pnl) in enumerate(top)])
+    return " | ".join(f"{i}:{name}({pnl:.2f})" for i, (name, pnl) in enumerate(lb[:5], 1))
 
 
 def print_snap(s) -> None:
@@ -33,12 +45,12 @@ def print_snap(s) -> None:
     if s.game_state == GameState.ROUND_ENDING:
         state_display = "INTERMISSION (Next round soon...)"
 
-    print(
-        f"\nState={state_display} Round={s.current_round}/{s.total_rounds} T={s.time_remaining}s\n"
-        f"Digits: {digits_str}\n"
-        f"BB/BA={_fmt(s.best_bid)}/{_fmt(s.best_ask)} Spr={_fmt(s.spread)} Mid={_fmt(s.mid_price)}\n"
-        f"YOU: pos={s.user_position} cash={s.user_cash:.2f} fees={s.user_fees:.2f} pnl={s.user_pnl:.2f} tox={s.user_toxicity:.2f}\n"
-    )
+    print(f"""
+State={state_display} Round={s.current_round}/{s.total_rounds} T={s.time_remaining}s
+Digits: {digits_str}
+BB/BA={_fmt1(s.best_bid)}/{_fmt1(s.best_ask)} Spr={_fmt1(s.spread)} Mid={_fmt1(s.mid_price)}
+YOU: pos={s.user_position} cash={s.user_cash:.2f} fees={s.user_fees:.2f} pnl={s.user_pnl:.2f} tox={s.user_toxicity:.2f}
+""")
 
     if s.game_state == GameState.ROUND_ACTIVE:
         print("Bids:", s.bids)
@@ -71,28 +83,232 @@ class MarketRunner:
         self.thread.join(timeout=timeout)
 
     def _loop(self) -> None:
+        # Fixed-rate schedule on the monotonic clock; tick time does not add drift.
+        deadline = time.monotonic()
+        failures = 0
+        last_logged = -TICK_ERROR_LOG_INTERVAL_SEC
         while not self.stop.is_set():
             try:
                 self.sim.tick()
             except Exception:
-                pass
-            time.sleep(TICK_INTERVAL_SEC)
-
+                failures += 1
+                now = time.monotonic()
+                if now - last_logged >= TICK_ERROR_LOG_INTERVAL_SEC:
+                    last_logged = now
+                    _log.exception("Market tick failed (%d consecutive failures)", failures)
+                # Back off exponentially so a persistently failing tick cannot spin
+                backoff = min(TICK_INTERVAL_SEC * 2 ** min(failures, 5), TICK_MAX_BACKOFF_SEC)
+                if self.stop.wait(backoff):
+                    break
+                deadline = time.monotonic()
+                continue
+            if failures:
+                _log.info("Market tick recovered after %d failures", failures)
+                failures = 0
+            deadline += TICK_INTERVAL_SEC
+            wait = deadline - time.monotonic()
+            if wait > 0:
+                if self.stop.wait(wait):
+                    break
+            else:
+                # Fell behind: skip the missed beats instead of bursting to catch up
+                deadline = time.monotonic()
+
+
+class LineReader:
+    """Reads stdin on a daemon thread so the REPL can also react to simulator events."""
+
+    def __init__(self, lines: "queue.Queue"):
+        self.lines = lines
+        self.ready = threading.Event()  # set when the REPL wants the next command
+        self.thread = threading.Thread(target=self._loop, daemon=True, name="stdin-reader")
 
-def main() -> None:
-    configure_logging(LoggingConfig(level="INFO", log_file="runs/sim.log"))
+    def start(self) -> None:
+        self.thread.start()
 
-    cfg = DifficultyConfig.MEDIUM()
-    sessions = SessionManager()
-    meta = sessions.create_session(cfg, user_id="local")
-    sim = sessions.get(meta.session_id)
+    def _loop(self) -> None:
+        while True:
+            self.ready.wait()
+            try:
+                line = input(PROMPT)
+            except (EOFError, KeyboardInterrupt):
+                line = "quit"
+            self.ready.clear()
+            self.lines.put(line)
+            if line == "quit":
+                return
 
-    replay = ReplayManager()
-    replay.attach(sim=sim, session_meta=meta)
 
-    runner = MarketRunner(sim)
-    runner.start()
+class Cli:
+    """State shared by the REPL command handlers."""
 
+    def __init__(self, sim, replay, sessions, meta):
+        self.sim = sim
+        self.replay = replay
+        self.sessions = sessions
+        self.meta = meta
+        self.echo = True  # print a snapshot after each command
+        self.shown_phase = None
+
+    def show(self, snap) -> None:
+        self.shown_phase = (snap.game_state, snap.current_round)
+        if self.echo:
+            print_snap(snap)
+
+    def ensure_round_active(self, st):
+        """Start Round 1 if needed; returns a snapshot valid for the pre-checks."""
+        if st.game_state == GameState.NOT_STARTED:
+            self.sim.start_round(1)
+            return self.sim.get_state_snapshot()
+        return st
+
+    def save(self) -> None:
+        self.sessions.save_checkpoint(self.meta.session_id, CHECKPOINT_PATH)
+        self.replay.save(REPLAY_PATH)
+
+
+# Command handlers: (cli, pre-check snapshot, tokens) -> None
+
+def _do_start(cli: Cli, pre, parts) -> None:
+    if pre.game_state == GameState.NOT_STARTED:
+        cli.replay.record_command("start_round", {"round": 1})
+        cli.sim.start_round(1)
+    else:
+        print("Game already started! Use `snap` to see status.")
+    cli.show(cli.sim.get_state_snapshot())
+
+
+def _do_snap(cli: Cli, pre, parts) -> None:
+    cli.show(pre)
+
+
+def _do_mm(cli: Cli, pre, parts) -> None:
+    bid = float(parts[1])
+    ask = float(parts[2])
+    qty = int(parts[3]) if len(parts) > 3 else 1
+    cli.replay.record_command("make_market", {"bid": bid, "ask": ask, "qty": qty})
+    ok = cli.sim.make_market(bid, ask, qty)
+    if not ok: print("Rejected.")
+    cli.show(cli.sim.get_state_snapshot())
+
+
+def _do_buy(cli: Cli, pre, parts) -> None:
+    px = float(parts[1])
+    qty = int(parts[2]) if len(parts) > 2 else 1
+    cli.replay.record_command("aggress_buy", {"price": px, "qty": qty})
+    ok = cli.sim.aggress_buy(px, qty)
+    if not ok: print("Rejected.")
+    cli.show(cli.sim.get_state_snapshot())
+
+
+def _do_sell(cli: Cli, pre, parts) -> None:
+    px = float(parts[1])
+    qty = int(parts[2]) if len(parts) > 2 else 1
+    cli.replay.record_command("aggress_sell", {"price": px, "qty": qty})
+    ok = cli.sim.aggress_sell(px, qty)
+    if not ok: print("Rejected.")
+    cli.show(cli.sim.get_state_snapshot())
+
+
+def _do_lift(cli: Cli, pre, parts) -> None:
+    qty = int(parts[1]) if len(parts) > 1 else 1
+    if pre.best_ask is None:
+        print("No asks to lift.")
+    else:
+        px = float(pre.best_ask)
+        cli.replay.record_command("lift", {"price": px, "qty": qty})
+        ok = cli.sim.aggress_buy(px, qty)
+        if not ok: print("Rejected.")
+    cli.show(cli.sim.get_state_snapshot())
+
+
+def _do_hit(cli: Cli, pre, parts) -> None:
+    qty = int(parts[1]) if len(parts) > 1 else 1
+    if pre.best_bid is None:
+        print("No bids to hit.")
+    else:
+        px = float(pre.best_bid)
+        cli.replay.record_command("hit", {"price": px, "qty": qty})
+        ok = cli.sim.aggress_sell(px, qty)
+        if not ok: print("Rejected.")
+    cli.show(cli.sim.get_state_snapshot())
+
+
+def _do_cancel(cli: Cli, pre, parts) -> None:
+    cli.replay.record_command("cancel_user_orders", {})
+    cli.sim.cancel_user_orders()
+    cli.show(cli.sim.get_state_snapshot())
+
+
+def _do_save(cli: Cli, pre, parts) -> None:
+    cli.save()
+    print("Saved checkpoint.")
+
+
+HANDLERS = {
+    "start": _do_start,
+    "snap": _do_snap,
+    "mm": _do_mm,
+    "buy": _do_buy,
+    "sell": _do_sell,
+    "lift": _do_lift,
+    "hit": _do_hit,
+    "cancel": _do_cancel,
+    "save": _do_save,
+}
+
+# Trading commands implicitly start Round 1
+_TRADING_COMMANDS = frozenset({"mm", "buy", "sell", "lift", "hit", "cancel"})
+
+
+def dispatch(cli: Cli, line: str) -> bool:
+    """Run one command line; returns False when the session should end."""
+    parts = line.split()
+    if not parts:
+        return True
+    cmd = parts[0].lower()
+    if cmd == "quit":
+        return False
+
+    handler = HANDLERS.get(cmd)
+    if handler is None:
+        print("Unknown command.")
+        return True
+
+    try:
+        # One snapshot per command for the pre-checks; rebuilt once after mutating
+        pre = cli.sim.get_state_snapshot()
+        if cmd in _TRADING_COMMANDS:
+            pre = cli.ensure_round_active(pre)
+        handler(cli, pre, parts)
+    except Exception as e:
+        print("Error:", e)
+        cli.show(cli.sim.get_state_snapshot())
+    return True
+
+
+# Recorded replay commands -> equivalent CLI lines (recorded prices are replayed as-is)
+_REPLAY_COMMAND_LINES = {
+    "start_round": lambda p: "start",
+    "make_market": lambda p: f"mm {p['bid']} {p['ask']} {p['qty']}",
+    "aggress_buy": lambda p: f"buy {p['price']} {p['qty']}",
+    "aggress_sell": lambda p: f"sell {p['price']} {p['qty']}",
+    "lift": lambda p: f"buy {p['price']} {p['qty']}",
+    "hit": lambda p: f"sell {p['price']} {p['qty']}",
+    "cancel_user_orders": lambda p: "cancel",
+}
+
+
+def iter_replay_lines(path: str):
+    """CLI lines for the user commands recorded in a replay JSONL file."""
+    for rec in ReplayManager.load(path):
+        if rec.get("type") == "command":
+            to_line = _REPLAY_COMMAND_LINES.get(rec.get("command"))
+            if to_line is not None:
+                yield to_line(rec.get("payload") or {})
+
+
+def print_help() -> None:
     print("Commands:")
     print("  start            -> start Round 1")
     print("  snap             -> print snapshot")
@@ -107,122 +323,86 @@ def main() -> None:
     
     print("Tip: Rounds auto-advance after 10s intermission.")
     print("Type `start` to begin Round 1.\n")
-    
-    print_snap(sim.get_state_snapshot())
 
-    def ensure_round_active() -> None:
-        st = sim.get_state_snapshot()
-        if st.game_state == GameState.NOT_STARTED:
-             sim.start_round(1)
 
+def run_interactive(cli: Cli) -> None:
+    sim = cli.sim
+    lines: "queue.Queue" = queue.Queue()
+
+    def on_event(event) -> None:
+        if event.event_type in _WAKE_EVENTS:
+            lines.put(_STATE_CHANGED)
+
+    sim.subscribe_to_events(on_event)
+    reader = LineReader(lines)
+    reader.start()
+
+    line = None
     while True:
+        if line is not _STATE_CHANGED:
+            reader.ready.set()  # previous command is done; prompt for the next one
         try:
-            line = input("axxela> ").strip()
-        except (EOFError, KeyboardInterrupt):
+            line = lines.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        except KeyboardInterrupt:
             line = "quit"
 
-        if not line:
+        if line is _STATE_CHANGED:
+            snap = sim.get_state_snapshot()
+            if (snap.game_state, snap.current_round) != cli.shown_phase:  # not already printed by a command
+                cli.show(snap)
+                print(PROMPT, end="", flush=True)
             continue
 
-        parts = line.split()
-        cmd = parts[0].lower()
+        if not dispatch(cli, line):
+            break
 
-        try:
-            if cmd == "quit":
-                break
-
-            if cmd == "start":
-                st = sim.get_state_snapshot()
-                if st.game_state == GameState.NOT_STARTED:
-                    replay.record_command("start_round", {"round": 1})
-                    sim.start_round(1)
-                else:
-                    print("Game already started! Use `snap` to see status.")
-                print_snap(sim.get_state_snapshot())
-                continue
 
-            if cmd == "snap":
-                print_snap(sim.get_state_snapshot())
-                continue
+def run_replay(cli: Cli, path: str) -> None:
+    """Headless mode: feed recorded commands through the dispatch table without prompting."""
+    cli.echo = False
+    count = 0
+    for line in iter_replay_lines(path):
+        dispatch(cli, line)
+        count += 1
+    cli.echo = True
+    print(f"Replayed {count} commands from {path}.")
+    cli.show(cli.sim.get_state_snapshot())
 
-            if cmd in ("mm", "buy", "sell", "lift", "hit", "cancel"):
-                ensure_round_active()
-                
-                if cmd == "mm":
-                    bid = float(parts[1])
-                    ask = float(parts[2])
-                    qty = int(parts[3]) if len(parts) > 3 else 1
-                    replay.record_command("make_market", {"bid": bid, "ask": ask, "qty": qty})
-                    ok = sim.make_market(bid, ask, qty)
-                    if not ok: print("Rejected.")
-                    print_snap(sim.get_state_snapshot())
-                    continue
-
-                if cmd == "buy":
-                    px = float(parts[1])
-                    qty = int(parts[2]) if len(parts) > 2 else 1
-                    replay.record_command("aggress_buy", {"price": px, "qty": qty})
-                    ok = sim.aggress_buy(px, qty)
-                    if not ok: print("Rejected.")
-                    print_snap(sim.get_state_snapshot())
-                    continue
-
-                if cmd == "sell":
-                    px = float(parts[1])
-                    qty = int(parts[2]) if len(parts) > 2 else 1
-                    replay.record_command("aggress_sell", {"price": px, "qty": qty})
-                    ok = sim.aggress_sell(px, qty)
-                    if not ok: print("Rejected.")
-                    print_snap(sim.get_state_snapshot())
-                    continue
-
-                if cmd == "lift":
-                    qty = int(parts[1]) if len(parts) > 1 else 1
-                    snap = sim.get_state_snapshot()
-                    if snap.best_ask is None:
-                        print("No asks to lift.")
-                    else:
-                        px = float(snap.best_ask)
-                        replay.record_command("lift", {"price": px, "qty": qty})
-                        ok = sim.aggress_buy(px, qty)
-                        if not ok: print("Rejected.")
-                    print_snap(sim.get_state_snapshot())
-                    continue
-
-                if cmd == "hit":
-                    qty = int(parts[1]) if len(parts) > 1 else 1
-                    snap = sim.get_state_snapshot()
-                    if snap.best_bid is None:
-                        print("No bids to hit.")
-                    else:
-                        px = float(snap.best_bid)
-                        replay.record_command("hit", {"price": px, "qty": qty})
-                        ok = sim.aggress_sell(px, qty)
-                        if not ok: print("Rejected.")
-                    print_snap(sim.get_state_snapshot())
-                    continue
-
-                if cmd == "cancel":
-                    replay.record_command("cancel_user_orders", {})
-                    sim.cancel_user_orders()
-                    print_snap(sim.get_state_snapshot())
-                    continue
-
-            if cmd == "save":
-                sessions.save_checkpoint(meta.session_id, "runs/last_checkpoint.json")
-                replay.save("runs/last_replay.jsonl")
-                print("Saved checkpoint.")
-                continue
 
-            print("Unknown command.")
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Axxela market simulator (terminal)")
+    parser.add_argument(
+        "--replay-cmds",
+        metavar="FILE.jsonl",
+        help="run the user commands recorded in a replay file without prompting, then exit",
+    )
+    args = parser.parse_args(argv)
+
+    configure_logging(LoggingConfig(level="INFO", log_file="runs/sim.log"))
+
+    cfg = DifficultyConfig.MEDIUM()
+    sessions = SessionManager()
+    meta = sessions.create_session(cfg, user_id="local")
+    sim = sessions.get(meta.session_id)
+
+    replay = ReplayManager()
+    replay.attach(sim=sim, session_meta=meta)
+
+    runner = MarketRunner(sim)
+    runner.start()
 
-        except Exception as e:
-            print("Error:", e)
-            print_snap(sim.get_state_snapshot())
+    cli = Cli(sim, replay, sessions, meta)
+    if args.replay_cmds:
+        run_replay(cli, args.replay_cmds)
+    else:
+        print_help()
+        cli.show(sim.get_state_snapshot())
+        run_interactive(cli)
 
     runner.shutdown()
-    sessions.save_checkpoint(meta.session_id, "runs/last_checkpoint.json")
-    replay.save("runs/last_replay.jsonl")
+    cli.save()
     print("Bye.")
 
 
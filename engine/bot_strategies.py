@@ -6,11 +6,20 @@ import time
 from dataclasses import dataclass
 from typing import Deque, Dict, List, Optional, Tuple, Literal
 
+import numpy as np
+
 from engine.order_book import OrderBook, Order
 from engine.trader import Trader
 from engine.risk_manager import RiskManager
 BotType = Literal["hft_mm", "momentum", "arbitrage", "noise"]
 Side = Literal["buy", "sell"]
+Quote = Tuple[float, float]
+
+# Uniforms each bot gets per tick: [0] latency jitter, [1:] decide()
+RAND_POOL_WIDTH = 4
+
+# Tape prints a MomentumTrader reads for its order-flow imbalance
+FLOW_WINDOW = 12
 
 
 # ---------------------------------------------------------------------
@@ -37,6 +46,8 @@ class BotConfig:
 
 
 class _EWM:
+    __slots__ = ("alpha", "value")
+
     def __init__(self, alpha: float):
         self.alpha = float(alpha)
         self.value: Optional[float] = None
@@ -55,36 +66,86 @@ class _BotState:
         self.last_quote_time: float = 0.0
         self.last_bid: Optional[float] = None
         self.last_ask: Optional[float] = None
+        # Resting quote orders behind last_bid/last_ask (kept in place while the price holds)
+        self.bid_order: Optional[Order] = None
+        self.ask_order: Optional[Order] = None
 
         # For momentum/trend
         self.ema_fast = _EWM(alpha=0.35)
         self.ema_slow = _EWM(alpha=0.08)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class TradePrint:
     """
     Minimal tape print passed from simulator -> bots.
     taker_side: 'buy' means aggressor lifted offers (taker is buyer).
     """
-    timestamp: float
+    timestamp: float  # same clock as update_quotes(now=...): monotonic under MarketSimulator
     price: float
     qty: int
     taker_side: Side
 
 
+def _signed_flow(tape: List[TradePrint], window: int = FLOW_WINDOW) -> float:
+    """Order-flow imbalance of the last `window` prints: + means more aggressive buys."""
+    flow = 0.0
+    for p in tape[-window:]:
+        flow += (p.qty if p.taker_side == "buy" else -p.qty)
+    return flow
+
+
+def _snap_px(px: float, tick: float) -> float:
+    return round(round(float(px) / tick) * tick, 10)
+
+
+def _quote_changed(old: Optional[float], new: Optional[float], thr: float) -> bool:
+    # A side appearing/disappearing always counts; a price must move by >= thr
+    if old is None or new is None:
+        return (old is None) != (new is None)
+    return abs(old - new) >= thr
+
+
+def _allowed(risk_manager: RiskManager, book: OrderBook, trader: Trader, side: str, qty: int, px: float) -> bool:
+    ok, _ = risk_manager.validate_order(trader,side,qty,px)
+    if not ok:
+        return False
+    total_depth = book.get_total_depth()
+    if total_depth == 0:
+        return True
+
+    ok2, _ = risk_manager.check_concentration(trader,qty,total_depth)
+    return ok2
+
+
+def _untouched(book: OrderBook, order: Optional[Order], qty: int) -> bool:
+    return order is not None and order.quantity == qty and book.is_resting(order)
+
+
 class BaseBot:
     def __init__(self, cfg: BotConfig, *, rng: random.Random):
         self.cfg = cfg
         self._rng = rng
         self.state = _BotState()
 
-    def latency_ready(self, now: float, latency_mult: float) -> bool:
+        # Latency before jitter is base +/- 25%: wait = lo + span * u for a uniform u
+        jitter = 0.25 * cfg.base_latency
+        self._latency_lo = cfg.base_latency - jitter
+        self._latency_span = 2.0 * jitter
+
+    def _rand_pool(self, rand_pool: Optional[List[float]]) -> List[float]:
+        # Standalone callers (no BotManager batch) draw from the bot's own rng
+        if rand_pool is not None:
+            return rand_pool
+        return [self._rng.random() for _ in range(RAND_POOL_WIDTH)]
+
+    def latency_ready(self, now: float, latency_mult: float, u: Optional[float] = None) -> bool:
         if now < self.state.next_action_time:
             return False
-        # deterministic-ish latency with small jitter
-        jitter = 0.25 * self.cfg.base_latency
-        wait = max(0.01, (self.cfg.base_latency + self._rng.uniform(-jitter, jitter)) * latency_mult)
+        # deterministic-ish latency with small jitter (u comes from BotManager's batched draw)
+        if u is None:
+            u = self._rng.random()
+        wait = max(0.01, (self._latency_lo + self._latency_span * u) * latency_mult)
         self.state.next_action_time = now + wait
         return True
 
@@ -92,30 +153,30 @@ class BaseBot:
         return float(getattr(book, "min_tick_size", 0.1) or 0.1)
 
     def _snap(self, book: OrderBook, px: float) -> float:
-        t = self._tick(book)
-        ticks = round(float(px) / t)
-        return round(ticks * t, 10)
+        return _snap_px(px, self._tick(book))
+
+    def _should_refresh(
+        self,
+        book: OrderBook,
+        bid: Optional[float],
+        ask: Optional[float],
+        now: float,
+        tick_size: Optional[float] = None,
+    ) -> bool:
+        st = self.state
+        last_bid, last_ask = st.last_bid, st.last_ask
 
-    def _should_refresh(self, book: OrderBook, bid: Optional[float], ask: Optional[float], now: float) -> bool:
         # No previous quote => publish
-        if self.state.last_bid is None and self.state.last_ask is None:
+        if last_bid is None and last_ask is None:
             return True
 
         # Too soon => don't churn
-        if (now - self.state.last_quote_time) < self.cfg.refresh_min_s:
+        if (now - st.last_quote_time) < self.cfg.refresh_min_s:
             return False
 
-        t = self._tick(book)
+        t = tick_size if tick_size is not None else self._tick(book)
         thr = self.cfg.stickiness_ticks * t
-
-        def changed(a: Optional[float], b: Optional[float]) -> bool:
-            if a is None and b is None:
-                return False
-            if (a is None) != (b is None):
-                return True
-            return abs(float(a) - float(b)) >= thr
-
-        return changed(self.state.last_bid, bid) or changed(self.state.last_ask, ask)
+        return _quote_changed(last_bid, bid, thr) or _quote_changed(last_ask, ask, thr)
 
     def decide(
         self,
@@ -128,10 +189,19 @@ class BaseBot:
         user_toxicity: float,
         position_limit: int,
         tape: List[TradePrint],
+        quote: Optional[Quote] = None,
+        flow: Optional[float] = None,
+        rand_pool: Optional[List[float]] = None,
+        tick_size: Optional[float] = None,
     ) -> Tuple[Optional[float], Optional[float], List[Tuple[Side, int]]]:
         """
         Returns:
           (bid_px, ask_px, ioc_orders=[(side, qty), ...])
+        quote: snapped (bid, ask) already priced for this tick by BotManager's
+        cohort pass; when None the bot prices its own quote.
+        flow: _signed_flow(tape) shared across the tick; when None it is computed from tape.
+        rand_pool: this tick's RAND_POOL_WIDTH uniforms for the bot (decide() reads [1:]).
+        tick_size: the book's tick, read once per update_quotes; when None it is read from book.
         Default: do nothing.
         """
         return None, None, []
@@ -144,7 +214,22 @@ class HFTMarketMaker(BaseBot):
     - Tight in calm markets, widens/skews hard vs toxicity + inventory
     - Uses user_toxicity + its own adverse_selection_score to protect itself
     """
-    def decide(self, *, now, book, trader, fair_value, volatility, user_toxicity, position_limit, tape):
+    def decide(self, *, now, book, trader, fair_value, volatility, user_toxicity, position_limit, tape, quote=None, flow=None, rand_pool=None, tick_size=None):
+        pos = trader.position
+        if quote is None:
+            tick = tick_size if tick_size is not None else self._tick(book)
+            bid, ask = self._price(tick, trader, fair_value, volatility, user_toxicity, position_limit)
+        else:
+            bid, ask = quote
+
+        if pos >= position_limit:
+            bid = None
+        if pos <= -position_limit:
+            ask = None
+
+        return bid, ask, []
+
+    def _price(self, tick, trader, fair_value, volatility, user_toxicity, position_limit) -> Quote:
         pos = trader.position
         vol = max(0.25, float(volatility))
 
@@ -163,18 +248,12 @@ class HFTMarketMaker(BaseBot):
         inv = pos / max(1, position_limit)
         reservation = fair_value - (self.cfg.inventory_skew * self.cfg.risk_aversion * inv * (vol ** 2)) * 0.8
 
-        bid = self._snap(book, reservation - spread / 2.0)
-        ask = self._snap(book, reservation + spread / 2.0)
+        bid = _snap_px(reservation - spread / 2.0, tick)
+        ask = _snap_px(reservation + spread / 2.0, tick)
 
         if bid >= ask:
-            ask = self._snap(book, bid + self._tick(book))
-
-        if pos >= position_limit:
-            bid = None
-        if pos <= -position_limit:
-            ask = None
-
-        return bid, ask, []
+            ask = _snap_px(bid + tick, tick)
+        return bid, ask
 
 
 class MomentumTrader(BaseBot):
@@ -184,7 +263,7 @@ class MomentumTrader(BaseBot):
     - Also uses a mid-price EMA trend filter
     - Takes liquidity (IOC) when signal triggers
     """
-    def decide(self, *, now, book, trader, fair_value, volatility, user_toxicity, position_limit, tape):
+    def decide(self, *, now, book, trader, fair_value, volatility, user_toxicity, position_limit, tape, quote=None, flow=None, rand_pool=None, tick_size=None):
         bb, ba = book.get_best_bid_ask()
         if bb is None or ba is None:
             return None, None, []
@@ -195,28 +274,29 @@ class MomentumTrader(BaseBot):
         trend = fast - slow
 
         # Flow imbalance: + means more aggressive buys
-        flow = 0.0
-        for p in tape[-12:]:
-            flow += (p.qty if p.taker_side == "buy" else -p.qty)
+        if flow is None:
+            flow = _signed_flow(tape)
 
         vol = max(0.25, float(volatility))
         thr_trend = 0.25 * vol
         thr_flow = 2.0
 
+        u = self._rand_pool(rand_pool)
         iocs: List[Tuple[Side, int]] = []
         if trader.position < position_limit and (trend > thr_trend) and (flow > thr_flow):
-            if self._rng.random() < self.cfg.aggression:
+            if u[1] < self.cfg.aggression:
                 iocs.append(("buy", 1))
         if trader.position > -position_limit and (trend < -thr_trend) and (flow < -thr_flow):
-            if self._rng.random() < self.cfg.aggression:
+            if u[2] < self.cfg.aggression:
                 iocs.append(("sell", 1))
 
         # Passive leaning quotes (optional; makes them present even when not taking)
         spread = max(1.0, min(4.0, 1.2 + 0.9 * vol))
         lean = max(-1.0, min(1.0, trend / max(1e-6, 2.0 * thr_trend))) * 0.25 * spread
 
-        bid = self._snap(book, fair_value - spread / 2.0 + lean)
-        ask = self._snap(book, fair_value + spread / 2.0 + lean)
+        tick = tick_size if tick_size is not None else self._tick(book)
+        bid = _snap_px(fair_value - spread / 2.0 + lean, tick)
+        ask = _snap_px(fair_value + spread / 2.0 + lean, tick)
 
         if trader.position >= position_limit:
             bid = None
@@ -233,7 +313,7 @@ class Arbitrageur(BaseBot):
     - If mid deviates enough, hits the book (IOC) to correct
     - Otherwise may quote near FV (optional)
     """
-    def decide(self, *, now, book, trader, fair_value, volatility, user_toxicity, position_limit, tape):
+    def decide(self, *, now, book, trader, fair_value, volatility, user_toxicity, position_limit, tape, quote=None, flow=None, rand_pool=None, tick_size=None):
         bb, ba = book.get_best_bid_ask()
         if bb is None or ba is None:
             return None, None, []
@@ -244,18 +324,19 @@ class Arbitrageur(BaseBot):
         # Entry threshold: how wrong must the market be vs FV
         edge = max(0.8, 0.9 * vol)
 
+        u = self._rand_pool(rand_pool)
         iocs: List[Tuple[Side, int]] = []
         if (mid < fair_value - edge) and (trader.position < position_limit):
-            if self._rng.random() < self.cfg.aggression:
+            if u[1] < self.cfg.aggression:
                 iocs.append(("buy", 1))
         elif (mid > fair_value + edge) and (trader.position > -position_limit):
-            if self._rng.random() < self.cfg.aggression:
+            if u[1] < self.cfg.aggression:
                 iocs.append(("sell", 1))
 
         # Resting quote around FV (keeps them visible)
-        spread = max(1.0, min(4.0, 1.0 + 0.7 * vol))
-        bid = self._snap(book, fair_value - spread / 2.0)
-        ask = self._snap(book, fair_value + spread / 2.0)
+        if quote is None:
+            quote = self.price(tick_size if tick_size is not None else self._tick(book), fair_value, volatility)
+        bid, ask = quote
 
         if trader.position >= position_limit:
             bid = None
@@ -264,6 +345,13 @@ class Arbitrageur(BaseBot):
 
         return bid, ask, iocs
 
+    @staticmethod
+    def price(tick: float, fair_value: float, volatility: float) -> Quote:
+        # Depends only on market state, so one quote serves the whole cohort each tick
+        vol = max(0.25, float(volatility))
+        spread = max(1.0, min(4.0, 1.0 + 0.7 * vol))
+        return _snap_px(fair_value - spread / 2.0, tick), _snap_px(fair_value + spread / 2.0, tick)
+
 
 class NoiseTrader(BaseBot):
     """
@@ -271,21 +359,21 @@ class NoiseTrader(BaseBot):
     - Random IOC buys/sells regardless of FV
     - Also posts wide quotes sometimes (optional)
     """
-    def decide(self, *, now, book, trader, fair_value, volatility, user_toxicity, position_limit, tape):
+    def decide(self, *, now, book, trader, fair_value, volatility, user_toxicity, position_limit, tape, quote=None, flow=None, rand_pool=None, tick_size=None):
         iocs: List[Tuple[Side, int]] = []
 
         # Random immediate liquidity needs
-        if self._rng.random() < 0.08 and self._rng.random() < self.cfg.aggression:
-            if self._rng.random() < 0.5 and trader.position < position_limit:
+        u = self._rand_pool(rand_pool)
+        if u[1] < 0.08 and u[2] < self.cfg.aggression:
+            if u[3] < 0.5 and trader.position < position_limit:
                 iocs.append(("buy", 1))
             elif trader.position > -position_limit:
                 iocs.append(("sell", 1))
 
         # Wide passive quote so it doesn't dominate liquidity
-        vol = max(0.25, float(volatility))
-        spread = 3.5 + 0.8 * vol
-        bid = self._snap(book, fair_value - spread / 2.0)
-        ask = self._snap(book, fair_value + spread / 2.0)
+        if quote is None:
+            quote = self.price(tick_size if tick_size is not None else self._tick(book), fair_value, volatility)
+        bid, ask = quote
 
         if trader.position >= position_limit:
             bid = None
@@ -294,6 +382,12 @@ class NoiseTrader(BaseBot):
 
         return bid, ask, iocs
 
+    @staticmethod
+    def price(tick: float, fair_value: float, volatility: float) -> Quote:
+        vol = max(0.25, float(volatility))
+        spread = 3.5 + 0.8 * vol
+        return _snap_px(fair_value - spread / 2.0, tick), _snap_px(fair_value + spread / 2.0, tick)
+
 
 class BotManager:
     """
@@ -305,14 +399,37 @@ class BotManager:
     def __init__(self, difficulty_config, seed: Optional[int] = None):
         self.config = difficulty_config
         self._rng = random.Random(seed if seed is not None else 12345)
+        # Batched per-tick uniforms for every bot (RAND_POOL_WIDTH per roster row)
+        self._gen = np.random.Generator(np.random.Philox(seed if seed is not None else 12345))
 
         self._bots: Dict[str, BaseBot] = {}
-        self._bot_cfgs: List[BotConfig] = self._build_roster()
+        self._bot_cfgs: Tuple[BotConfig, ...] = self._build_roster()
         self._tape: List[TradePrint] = []
 
+        # Order flow pushed by the simulator: the last FLOW_WINDOW signed taker quantities
+        # (+ buy / - sell) in a ring, plus their running sum (the momentum imbalance)
+        self._flow_ring: List[int] = [0] * FLOW_WINDOW
+        self._flow_head = 0
+        self._flow_sum = 0
+        self._tape_given = False
+
         for cfg in self._bot_cfgs:
             self._bots[cfg.name] = self._make_bot(cfg)
 
+        # Per-tick iteration order with everything pre-resolved: (bot, name, quote_size)
+        self._roster: Tuple[Tuple[BaseBot, str, int], ...] = tuple(
+            (self._bots[cfg.name], cfg.name, int(cfg.quote_size)) for cfg in self._bot_cfgs
+        )
+        # Roster entries paired with their Trader (and the bot's _BotState); _bound_traders
+        # holds the Trader (or None) each roster slot was bound to, for revalidation
+        self._bound: List[Tuple[BaseBot, str, int, Trader, _BotState]] = []
+        self._bound_traders: Tuple[Optional[Trader], ...] = (None,) * len(self._roster)
+
+        # Same-type cohorts over _bound (row indices), priced together once per tick
+        self._arb_rows: List[int] = []
+        self._noise_rows: List[int] = []
+        self._has_momentum = False
+
     def _make_bot(self, cfg: BotConfig) -> BaseBot:
         if cfg.bot_type == "hft_mm":
             return HFTMarketMaker(cfg, rng=self._rng)
@@ -322,7 +439,7 @@ class BotManager:
             return Arbitrageur(cfg, rng=self._rng)
         return NoiseTrader(cfg, rng=self._rng)
 
-    def _build_roster(self) -> List[BotConfig]:
+    def _build_roster(self) -> Tuple[BotConfig, ...]:
         diff = str(getattr(self.config, "name", "MEDIUM")).upper()
 
         # More players => richer self-trading ecosystem
@@ -405,16 +522,63 @@ class BotManager:
                 )
             )
 
-        return out
+        return tuple(out)
+
+    def push_trade(self, qty: int, taker_side: Side) -> None:
+        """Record one executed trade for the order-flow signal (O(1); replaces passing a tape)."""
+        signed = qty if taker_side == "buy" else -qty
+        head = self._flow_head
+        self._flow_sum += signed - self._flow_ring[head]
+        self._flow_ring[head] = signed
+        self._flow_head = (head + 1) % FLOW_WINDOW
 
     def get_bot_names(self) -> List[str]:
         return [c.name for c in self._bot_cfgs]
 
     def initialize_bots(self, traders: Dict[str, Trader]) -> None:
-        # Keep it simple: ensure trader exists; optional cash seeding can be added later
-        for c in self._bot_cfgs:
-            if c.name not in traders:
-                continue
+        # Keep it simple: resolve each bot's Trader once; optional cash seeding can be added later
+        self._bind(traders)
+
+    def _bind(self, traders: Dict[str, Trader]) -> None:
+        resolved = tuple(traders.get(name) for _, name, _ in self._roster)
+        self._bound = [
+            (bot, name, qty, trader, bot.state)
+            for (bot, name, qty), trader in zip(self._roster, resolved)
+            if trader is not None
+        ]
+        self._bound_traders = resolved
+        self._build_cohorts()
+
+    def _bind_traders(self, traders: Dict[str, Trader]) -> List[Tuple[BaseBot, str, int, Trader, _BotState]]:
+        # Rebound whenever a bot's Trader was added, removed or replaced since the last bind
+        for (_, name, _), trader in zip(self._roster, self._bound_traders):
+            if traders.get(name) is not trader:
+                self._bind(traders)
+                break
+        return self._bound
+
+    def _build_cohorts(self) -> None:
+        bots = [entry[0] for entry in self._bound]
+        self._arb_rows = [i for i, bot in enumerate(bots) if type(bot) is Arbitrageur]
+        self._noise_rows = [i for i, bot in enumerate(bots) if type(bot) is NoiseTrader]
+        self._has_momentum = any(type(bot) is MomentumTrader for bot in bots)
+
+    def _cohort_quotes(self, tick: float, fair_value: float, volatility: float) -> List[Optional[Quote]]:
+        """
+        Pre-priced (bid, ask) per _bound row for this tick (None => the bot prices itself).
+        Arbitrage and noise quotes depend only on market state, so each cohort shares
+        one quote; market makers skew by their own inventory and price in decide().
+        """
+        quotes: List[Optional[Quote]] = [None] * len(self._bound)
+        if self._arb_rows:
+            quote = Arbitrageur.price(tick, fair_value, volatility)
+            for i in self._arb_rows:
+                quotes[i] = quote
+        if self._noise_rows:
+            quote = NoiseTrader.price(tick, fair_value, volatility)
+            for i in self._noise_rows:
+                quotes[i] = quote
+        return quotes
 
     def update_quotes(
         self,
@@ -431,6 +595,9 @@ class BotManager:
         """
         Main entrypoint called by MarketSimulator each tick.
 
+        Order flow comes from push_trade(); an explicit tape (list of TradePrint)
+        is still accepted and takes precedence for callers that keep their own.
+
         Returns list of IOC order_ids to cancel after matching (true IOC semantics).
         """
         if now is None:
@@ -438,66 +605,88 @@ class BotManager:
 
         if tape is not None:
             self._tape = tape
+            self._tape_given = True
 
         latency_mult = float(getattr(self.config, "bot_latency_mult", 1.0))
         position_limit = int(getattr(self.config, "position_limit", 2))
 
         ioc_order_ids: List[int] = []
 
-        def _allowed(trader: Trader, side: str, qty: int, px: float) -> bool:
-            if risk_manager is None:
-                return True
-            ok, _ = risk_manager.validate_order(trader,side,qty,px)
-            if not ok:
-                return False
-            total_depth = book.get_total_quantity("buy") + book.get_total_quantity("sell")
-            if total_depth == 0:
-                return True
-            
-            ok2, _ = risk_manager.check_concentration(trader,qty,total_depth)
-            return ok2
-        
-        for cfg in self._bot_cfgs:
-            bot = self._bots[cfg.name]
-            trader = traders.get(cfg.name)
-            if trader is None:
+        # No risk manager => every order is allowed and _allowed is never called
+        rm = risk_manager
+
+        bound = self._bind_traders(traders)
+        # Book tick size is read once per call and threaded through every snap/refresh check
+        tick_size = float(getattr(book, "min_tick_size", 0.1) or 0.1)
+        fair_value = float(fair_value)
+        volatility = float(volatility)
+        user_toxicity = float(user_toxicity)
+        quotes = self._cohort_quotes(tick_size, fair_value, volatility)
+        # Every momentum bot reads the same window, so the imbalance is resolved once per tick
+        flow = None
+        if self._has_momentum:
+            flow = _signed_flow(self._tape) if self._tape_given else float(self._flow_sum)
+
+        pools = self._gen.random((len(bound), RAND_POOL_WIDTH)).tolist()
+
+        for (bot, name, q, trader, st), quote, pool in zip(bound, quotes, pools):
+            # Most bots are still waiting out their latency on any given tick
+            if now < st.next_action_time:
                 continue
-
-            if not bot.latency_ready(now, latency_mult=latency_mult):
+            if not bot.latency_ready(now, latency_mult=latency_mult, u=pool[0]):
                 continue
 
             bid, ask, iocs = bot.decide(
                 now=now,
                 book=book,
                 trader=trader,
-                fair_value=float(fair_value),
-                volatility=float(volatility),
-                user_toxicity=float(user_toxicity),
+                fair_value=fair_value,
+                volatility=volatility,
+                user_toxicity=user_toxicity,
                 position_limit=position_limit,
                 tape=self._tape,
+                quote=quote,
+                flow=flow,
+                rand_pool=pool,
+                tick_size=tick_size,
             )
 
             # Passive quoting (cancel+replace only when needed)
-            if bot._should_refresh(book, bid, ask, now):
-                q = int(cfg.quote_size)
-
-                can_bid = (bid is not None and bid > 0 and _allowed(trader,"buy",q,float(bid)))
-                can_ask = (ask is not None and ask > 0 and _allowed(trader,"sell",q,float(ask)))
-
-                if not can_bid:
-                    book.cancel_orders(cfg.name,side="buy")
-                else:
-                    book.cancel_orders(cfg.name,side="buy")
-                    book.add_order(Order(cfg.name,"buy",float(bid),q,float(now)))
-                if not can_ask:
-                    book.cancel_orders(cfg.name,side="sell")
-                else:
-                    book.cancel_orders(cfg.name,side="sell")
-                    book.add_order(Order(cfg.name,"sell",float(ask),q,float(now)))
-
-                bot.state.last_bid = bid if can_bid else None
-                bot.state.last_ask = ask if can_ask else None
-                bot.state.last_quote_time = now
+            if bot._should_refresh(book, bid, ask, now, tick_size):
+                can_bid = (bid is not None and bid > 0 and (rm is None or _allowed(rm,book,trader,"buy",q,float(bid))))
+                can_ask = (ask is not None and ask > 0 and (rm is None or _allowed(rm,book,trader,"sell",q,float(ask))))
+
+                # A side whose price held and whose order is still resting untouched keeps
+                # its place in the queue; a side with no previous quote has nothing to cancel.
+                keep_bid = can_bid and bid == st.last_bid and _untouched(book, st.bid_order, q)
+                keep_ask = can_ask and ask == st.last_ask and _untouched(book, st.ask_order, q)
+                cancel_bid = not keep_bid and st.last_bid is not None
+                cancel_ask = not keep_ask and st.last_ask is not None
+
+                if cancel_bid and cancel_ask:
+                    book.cancel_orders(name)
+                elif cancel_bid:
+                    book.cancel_orders(name,side="buy")
+                elif cancel_ask:
+                    book.cancel_orders(name,side="sell")
+
+                # Replaced quotes are canceled or filled by now and only referenced here
+                if not keep_bid and st.bid_order is not None:
+                    st.bid_order.release()
+                    st.bid_order = None
+                if not keep_ask and st.ask_order is not None:
+                    st.ask_order.release()
+                    st.ask_order = None
+                if can_bid and not keep_bid:
+                    st.bid_order = Order.acquire(name,"buy",float(bid),q,float(now))
+                    book.add_order(st.bid_order)
+                if can_ask and not keep_ask:
+                    st.ask_order = Order.acquire(name,"sell",float(ask),q,float(now))
+                    book.add_order(st.ask_order)
+
+                st.last_bid = bid if can_bid else None
+                st.last_ask = ask if can_ask else None
+                st.last_quote_time = now
 
             # Aggressive IOC intentions: place marketable limit at top-of-book
             bb, ba = book.get_best_bid_ask()
@@ -519,8 +708,8 @@ class BotManager:
                     if trader.position - qty < -position_limit:
                         continue
 
-                o = Order(cfg.name, side, px, int(qty), float(now))
-                if _allowed(trader,side,int(qty),float(px)):
+                o = Order(name, side, px, int(qty), float(now))
+                if rm is None or _allowed(rm,book,trader,side,int(qty),float(px)):
                     book.add_order(o)
                     ioc_order_ids.append(int(o.order_id))
 
@@ -21,39 +21,38 @@ Edge cases handled:
 """
 from __future__ import annotations
 
+import os
 from typing import List, Callable, Optional, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 
-from .order_book import OrderBook
+from .order_book import Order, OrderBook, PriceLevel
 
+# The matcher guarantees MatchEvent invariants; set MATCH_VALIDATE=1 to re-check
+# them on every event while debugging (skipped under python -O).
+_VALIDATE_MATCHES = __debug__ and bool(os.environ.get("MATCH_VALIDATE"))
 
-def _get_attr(obj, *names, default=None):
-    for n in names:
-        if hasattr(obj, n):
-            return getattr(obj, n)
-    return default
 
-
-@dataclass
+@dataclass(frozen=True, slots=True)
 class MatchEvent:
     """
-    Immutable match event (by convention).
+    Immutable match event.
 
-    Downstream consumers (risk, P&L, analytics, UI) should treat this as read-only.
+    Downstream consumers (risk, P&L, analytics, UI) receive it read-only.
     """
     buyer_id: str
     seller_id: str
     price: float
     quantity: int
     taker_id: str
-    timestamp: float
+    timestamp: float  # monotonic, same clock as Order.timestamp (match_orders' current_time)
     match_id: int = 0
 
-    def __post_init__(self):
-        assert self.quantity > 0, "Quantity must be positive"
-        assert self.price > 0, "Price must be positive"
-        assert self.buyer_id != self.seller_id, "Cannot self-trade"
-        assert self.taker_id in (self.buyer_id, self.seller_id), "Taker must be buyer or seller"
+    if _VALIDATE_MATCHES:
+        def __post_init__(self):
+            assert self.quantity > 0, "Quantity must be positive"
+            assert self.price > 0, "Price must be positive"
+            assert self.buyer_id != self.seller_id, "Cannot self-trade"
+            assert self.taker_id in (self.buyer_id, self.seller_id), "Taker must be buyer or seller"
 
     # Compatibility aliases (so older code using buyerid/sellerid/takerid doesn't break)
     @property
@@ -73,163 +72,219 @@ class MatchEvent:
         return self.match_id
 
 
+_MATCH_SLOT_SETTERS = tuple(MatchEvent.__dict__[f.name].__set__ for f in fields(MatchEvent))
+
+
+def _emit_match_event(buyer_id, seller_id, price, quantity, taker_id, timestamp, match_id,
+                      _new=object.__new__, _setters=_MATCH_SLOT_SETTERS) -> MatchEvent:
+    """
+    Matcher-side MatchEvent constructor (positional, field order).
+
+    The frozen dataclass __init__ goes through object.__setattr__ once per field;
+    writing the slots through their descriptors builds the same event in about
+    half the time. The event stays frozen for everyone who receives it.
+    """
+    ev = _new(MatchEvent)
+    set_buyer, set_seller, set_price, set_qty, set_taker, set_ts, set_id = _setters
+    set_buyer(ev, buyer_id)
+    set_seller(ev, seller_id)
+    set_price(ev, price)
+    set_qty(ev, quantity)
+    set_taker(ev, taker_id)
+    set_ts(ev, timestamp)
+    set_id(ev, match_id)
+    return ev
+
+
+if _VALIDATE_MATCHES:
+    _emit_match_event = MatchEvent  # noqa: F811  (keep __post_init__ checks)
+
+
 class MatchingEngine:
     def __init__(self, order_book: OrderBook):
         self.book = order_book
         self.match_listeners: List[Callable[[MatchEvent], None]] = []
+        self.batch_listeners: List[Callable[[List[MatchEvent]], None]] = []
         self._match_id_counter = 0
         self._total_matches = 0
         self._total_volume = 0.0
 
+        # Optional book hooks, resolved once: a lock to hold while matching and an
+        # index_remove(order_id) to call for orders leaving the book.
+        self._book_lock = getattr(order_book, "lock", None)
+        self._index_remove = getattr(order_book, "index_remove", None)
+        self._run: Callable[[List[MatchEvent], float], None] = (
+            self._match_locked if self._book_lock is not None else self._match_loop
+        )
+
     def subscribe_to_matches(self, callback: Callable[[MatchEvent], None]):
         if not callable(callback):
             raise TypeError("Callback must be callable")
         self.match_listeners.append(callback)
 
+    def subscribe_to_matches_batch(self, callback: Callable[[List[MatchEvent]], None]):
+        """Receive all matches of one match_orders() call as a single list (only if non-empty)."""
+        if not callable(callback):
+            raise TypeError("Callback must be callable")
+        self.batch_listeners.append(callback)
+
     def match_orders(self, current_time: float) -> List[MatchEvent]:
         """
         Execute matching algorithm on current book state.
 
         Maker/taker is determined by (timestamp, order_id).
         Execution price is maker's resting limit price.
+        Listeners are notified once matching is done, after the book lock is released.
         """
-        matches: List[MatchEvent] = []
+        # Fast path: an uncrossed book (the common case) has nothing to match. A stale
+        # empty top level can only make the book look crossed, never hide a cross.
+        best_bid = self._best_bid_price()
+        best_ask = self._best_ask_price()
+        if best_bid is None or best_ask is None or best_bid < best_ask:
+            return []
 
-        book_lock = getattr(self.book, "lock", None)
-
-        def order_key(o) -> Tuple[float, int]:
-            ts = _get_attr(o, "timestamp")
-            oid = _get_attr(o, "order_id", "orderid")
-            if ts is None or oid is None:
-                raise AttributeError("Order must have timestamp and order_id/orderid")
-            return (float(ts), int(oid))
-
-        def trader_id(o) -> str:
-            tid = _get_attr(o, "trader_id", "traderid")
-            if tid is None:
-                raise AttributeError("Order must have trader_id/traderid")
-            return str(tid)
-
-        def index_remove_if_present(order) -> None:
-            remover = getattr(self.book, "index_remove", None)
-            if remover is None:
-                return
-            oid = _get_attr(order, "order_id", "orderid")
-            if oid is None:
-                return
-            remover(int(oid))
-
-        def loop() -> None:
-            nonlocal matches
-
-            while True:
-                best_bid_price, best_ask_price = self._get_best_prices()
-                if best_bid_price is None or best_ask_price is None:
-                    break
-                if best_bid_price < best_ask_price:
-                    break  # spread exists
-
-                bid_queue = self.book.bids.get(best_bid_price)
-                ask_queue = self.book.asks.get(best_ask_price)
-                if not bid_queue or not ask_queue:
-                    self._clean_empty_levels()
-                    continue
-
-                bid_order = bid_queue[0]
-                ask_order = ask_queue[0]
-
-                bid_tid = trader_id(bid_order)
-                ask_tid = trader_id(ask_order)
-
-                bid_key = order_key(bid_order)
-                ask_key = order_key(ask_order)
-
-                # Older order is maker; newer is taker.
-                if bid_key <= ask_key:
-                    # Bid is maker, ask is taker, trade at bid (maker) price.
-                    execution_price = float(_get_attr(bid_order, "price"))
-                    taker_id = ask_tid
-                    taker_side = "ask"
-                else:
-                    # Ask is maker, bid is taker, trade at ask (maker) price.
-                    execution_price = float(_get_attr(ask_order, "price"))
-                    taker_id = bid_tid
-                    taker_side = "bid"
-
-                # Self-trade prevention: remove the taker order (newer one) deterministically.
-                if bid_tid == ask_tid:
-                    if taker_side == "bid":
-                        removed = bid_queue.popleft()
-                        index_remove_if_present(removed)
-                        if not bid_queue:
-                            self.book.bids.pop(best_bid_price, None)
-                    else:
-                        removed = ask_queue.popleft()
-                        index_remove_if_present(removed)
-                        if not ask_queue:
-                            self.book.asks.pop(best_ask_price, None)
-                    self._clean_empty_levels()
-                    continue
-
-                bid_qty = int(_get_attr(bid_order, "quantity"))
-                ask_qty = int(_get_attr(ask_order, "quantity"))
-                match_qty = min(bid_qty, ask_qty)
-
-                self._match_id_counter += 1
-                event = MatchEvent(
-                    buyer_id=bid_tid,
-                    seller_id=ask_tid,
-                    price=execution_price,
-                    quantity=match_qty,
-                    taker_id=taker_id,
-                    timestamp=float(current_time),
-                    match_id=self._match_id_counter,
-                )
-
-                matches.append(event)
-                self._total_matches += 1
-                self._total_volume += match_qty * execution_price
-
-                self._notify_listeners(event)
-
-                # Update quantities on the live Order objects
-                bid_order.quantity -= match_qty
-                ask_order.quantity -= match_qty
-
-                # Remove fully filled orders + keep OrderBook indices consistent
-                if int(_get_attr(bid_order, "quantity")) == 0:
-                    removed = bid_queue.popleft()
-                    index_remove_if_present(removed)
-                    if not bid_queue:
-                        self.book.bids.pop(best_bid_price, None)
-
-                if int(_get_attr(ask_order, "quantity")) == 0:
-                    removed = ask_queue.popleft()
-                    index_remove_if_present(removed)
-                    if not ask_queue:
-                        self.book.asks.pop(best_ask_price, None)
-
-        if book_lock is None:
-            loop()
-        else:
-            with book_lock:
-                loop()
+        matches: List[MatchEvent] = []
+        self._run(matches, float(current_time))
 
+        if matches:
+            self._notify_listeners(matches)
         return matches
 
+    def _match_locked(self, matches: List[MatchEvent], current_time: float) -> None:
+        with self._book_lock:
+            self._match_loop(matches, current_time)
+
+    def _match_loop(self, matches: List[MatchEvent], current_time: float) -> None:
+        """Cross the book until a spread exists, appending fills to matches."""
+        index_remove = self._index_remove
+
+        def unindex(order: Order) -> None:
+            if index_remove is not None:
+                index_remove(order.order_id)
+
+        bids = self.book.bids
+        asks = self.book.asks
+
+        # Top-of-book levels are cached across iterations and only re-derived when
+        # a level is removed (listeners run after matching, so the book is stable).
+        def top_bid() -> Tuple[Optional[float], Optional[PriceLevel]]:
+            price = self._best_bid_price()
+            return price, (bids[price] if price is not None else None)
+
+        def top_ask() -> Tuple[Optional[float], Optional[PriceLevel]]:
+            price = self._best_ask_price()
+            return price, (asks[price] if price is not None else None)
+
+        best_bid_price, bid_level = top_bid()
+        best_ask_price, ask_level = top_ask()
+        while True:
+            if bid_level is None or ask_level is None:
+                break
+            if best_bid_price < best_ask_price:
+                break  # spread exists
+
+            bid_order = bid_level.head
+            ask_order = ask_level.head
+            if bid_order is None or ask_order is None:
+                # Stale empty level at the top: drop just that level
+                if bid_order is None:
+                    bids.pop(best_bid_price, None)
+                    best_bid_price, bid_level = top_bid()
+                if ask_order is None:
+                    asks.pop(best_ask_price, None)
+                    best_ask_price, ask_level = top_ask()
+                continue
+
+            bid_tid = bid_order.trader_id
+            ask_tid = ask_order.trader_id
+
+            # Older order is maker; newer is taker: (timestamp, order_id) ordering.
+            bid_ts = bid_order.timestamp
+            ask_ts = ask_order.timestamp
+            bid_is_maker = bid_ts < ask_ts or (bid_ts == ask_ts and bid_order.order_id <= ask_order.order_id)
+
+            # Self-trade prevention: remove the taker order (newer one) deterministically.
+            if bid_tid == ask_tid:
+                if bid_is_maker:
+                    unindex(ask_level.popleft())
+                    if ask_level.head is None:
+                        asks.pop(best_ask_price, None)
+                        best_ask_price, ask_level = top_ask()
+                else:
+                    unindex(bid_level.popleft())
+                    if bid_level.head is None:
+                        bids.pop(best_bid_price, None)
+                        best_bid_price, bid_level = top_bid()
+                continue
+
+            if bid_is_maker:
+                # Bid is maker, ask is taker, trade at bid (maker) price.
+                execution_price = bid_order.price
+                taker_id = ask_tid
+            else:
+                # Ask is maker, bid is taker, trade at ask (maker) price.
+                execution_price = ask_order.price
+                taker_id = bid_tid
+
+            bid_qty = bid_order.quantity
+            ask_qty = ask_order.quantity
+            match_qty = bid_qty if bid_qty < ask_qty else ask_qty
+
+            self._match_id_counter += 1
+            event = _emit_match_event(
+                bid_tid, ask_tid, execution_price, match_qty, taker_id, current_time, self._match_id_counter
+            )
+
+            matches.append(event)
+            self._total_matches += 1
+            self._total_volume += match_qty * execution_price
+
+            # Update quantities on the live Order objects (and the level totals)
+            bid_order.quantity = bid_qty - match_qty
+            ask_order.quantity = ask_qty - match_qty
+            bid_level.total_qty -= match_qty
+            ask_level.total_qty -= match_qty
+            bids.total_qty -= match_qty
+            asks.total_qty -= match_qty
+
+            # Remove fully filled orders + keep OrderBook indices consistent
+            if bid_qty == match_qty:
+                unindex(bid_level.popleft())
+                if bid_level.head is None:
+                    bids.pop(best_bid_price, None)
+                    best_bid_price, bid_level = top_bid()
+
+            if ask_qty == match_qty:
+                unindex(ask_level.popleft())
+                if ask_level.head is None:
+                    asks.pop(best_ask_price, None)
+                    best_ask_price, ask_level = top_ask()
+
     def _get_best_prices(self) -> Tuple[Optional[float], Optional[float]]:
-        best_bid = max(self.book.bids.keys()) if self.book.bids else None
-        best_ask = min(self.book.asks.keys()) if self.book.asks else None
-        return best_bid, best_ask
+        return self._best_bid_price(), self._best_ask_price()
 
-    def _notify_listeners(self, event: MatchEvent):
-        for listener in self.match_listeners:
+    def _best_bid_price(self) -> Optional[float]:
+        return self.book.bids.max_price()  # sorted by price: best bid is the last key
+
+    def _best_ask_price(self) -> Optional[float]:
+        return self.book.asks.min_price()
+
+    def _notify_listeners(self, matches: List[MatchEvent]):
+        for listener in self.batch_listeners:
             try:
-                listener(event)
+                listener(matches)
             except Exception as e:
                 print(f"Error in match listener: {e}")
+        # Per-event listeners: one pass over the batch per listener
+        for listener in self.match_listeners:
+            for event in matches:
+                try:
+                    listener(event)
+                except Exception as e:
+                    print(f"Error in match listener: {e}")
 
     def _clean_empty_levels(self):
+        """Full sweep for empty levels; a reset/debug utility, not used while matching."""
         empty_bid_prices = [p for p, q in self.book.bids.items() if not q]
         for price in empty_bid_prices:
             self.book.bids.pop(price, None)
@@ -242,7 +297,7 @@ class MatchingEngine:
         return {
             "total_matches": self._total_matches,
             "total_volume": self._total_volume,
-            "active_listeners": len(self.match_listeners),
+            "active_listeners": len(self.match_listeners) + len(self.batch_listeners),
         }
 
     def reset_stats(self):
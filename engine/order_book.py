@@ -1,23 +1,46 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from collections import defaultdict, deque
+from collections import defaultdict
+from heapq import heapify, heappop, heappush
+from itertools import islice
 from threading import RLock
-from typing import DefaultDict, Deque, Dict, List, Optional, Set, Tuple
+from typing import Callable, DefaultDict, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 import itertools
+import os
+
+from sortedcontainers import SortedDict
 
 
 _order_id_counter = itertools.count(1)
+_expiry_seq = itertools.count()  # tie-breaker so expiry-heap entries never compare Orders
+
+# Bound on memoized raw price -> tick-grid price entries per book (cleared when full)
+SNAP_CACHE_SIZE = 4096
+
+# Bound on released Order objects kept for reuse by Order.acquire
+ORDER_POOL_SIZE = 65536
+
+# Set BOOK_VALIDATE=1 to re-check the cached top-of-book prices against the
+# sorted keys on every read while debugging (skipped under python -O).
+_VALIDATE_TOP = __debug__ and bool(os.environ.get("BOOK_VALIDATE"))
+
+# Expiry-heap entries allowed beyond twice the resting orders before stale ones are purged
+EXPIRY_HEAP_SLACK = 1024
 
 
-@dataclass
+@dataclass(slots=True)
 class Order:
     trader_id: str
     side: str                 # 'buy' | 'sell'
     price: float
     quantity: int
-    timestamp: float
+    timestamp: float          # monotonic clock (time.monotonic()): expiry/time priority only
     order_id: int = field(default_factory=lambda: next(_order_id_counter))
+    # Intrusive FIFO links, owned by the PriceLevel the order rests in (None once it leaves)
+    _prev: Optional["Order"] = field(default=None, init=False, repr=False, compare=False)
+    _next: Optional["Order"] = field(default=None, init=False, repr=False, compare=False)
+    _level: Optional["PriceLevel"] = field(default=None, init=False, repr=False, compare=False)
 
     def __post_init__(self) -> None:
         if not self.trader_id:
@@ -36,21 +59,278 @@ class Order:
     def __repr__(self) -> str:
         return f"Order(id={self.order_id}, trader={self.trader_id}, {self.side} {self.quantity}@{self.price:.1f})"
 
+    @classmethod
+    def _unchecked(cls, trader_id: str, side: str, price: float, quantity: int, timestamp: float) -> "Order":
+        """Build an order without __post_init__ validation (trusted internal callers only)."""
+        order = object.__new__(cls)
+        order.trader_id = trader_id
+        order.side = side
+        order.price = price
+        order.quantity = quantity
+        order.timestamp = timestamp
+        order.order_id = next(_order_id_counter)
+        order._prev = order._next = order._level = None
+        return order
+
+    @classmethod
+    def acquire(cls, trader_id: str, side: str, price: float, quantity: int, timestamp: float) -> "Order":
+        """
+        Like Order(...), but reuses a released instance when one is pooled (fresh order_id).
+        Internal fast path: arguments are NOT validated, so callers must pass a valid
+        side, price > 0, int quantity > 0 and timestamp >= 0.
+        """
+        if not _ORDER_POOL:
+            return cls._unchecked(trader_id, side, price, quantity, timestamp)
+        order = _ORDER_POOL.pop()
+        order.trader_id = trader_id
+        order.side = side
+        order.price = price
+        order.quantity = quantity
+        order.timestamp = timestamp
+        order.order_id = next(_order_id_counter)
+        return order
+
+    def release(self) -> bool:
+        """
+        Hand this order back for reuse by acquire(). Only the owner may call it, once
+        nothing else references the order; orders still resting in a book are refused.
+        """
+        if self._level is not None or len(_ORDER_POOL) >= ORDER_POOL_SIZE:
+            return False
+        _ORDER_POOL.append(self)
+        return True
+
+
+_ORDER_POOL: List[Order] = []
+
+
+class PriceLevel:
+    """
+    FIFO queue of the orders resting at one price (intrusive doubly-linked list).
+
+    Orders carry their own prev/next links, so append/popleft and unlinking any
+    order are O(1) without per-node allocations. Supports the deque operations
+    the book, matcher and tests use (append, popleft, [i], len, iteration).
+
+    total_qty is the resting quantity, and every append/unlink also updates the
+    owning side's running total (side.total_qty). Appends also enter the side's
+    expiry heap. Whoever shrinks an order in
+    place must decrement both by the same amount (OrderBook.on_fill does this;
+    the matcher inlines it on its hot path).
+    """
+
+    __slots__ = ("price", "head", "tail", "_len", "total_qty", "side")
+
+    def __init__(self, price: float = 0.0, orders: Iterable[Order] = (), side: Optional["_LevelMap"] = None):
+        self.price = price
+        self.head: Optional[Order] = None
+        self.tail: Optional[Order] = None
+        self._len = 0
+        self.total_qty = 0
+        self.side = side if side is not None else _LevelMap()
+        for o in orders:
+            self.append(o)
+
+    def append(self, order: Order) -> None:
+        tail = self.tail
+        order._prev = tail
+        order._next = None
+        order._level = self
+        if tail is None:
+            self.head = order
+        else:
+            tail._next = order
+        self.tail = order
+        self._len += 1
+        side = self.side
+        self.total_qty += order.quantity
+        side.total_qty += order.quantity
+        heap = side.expiry_heap
+        heappush(heap, (order.timestamp, next(_expiry_seq), order))
+        if len(heap) > side.expiry_heap_limit:
+            side.purge_expiry_heap()
+
+    def popleft(self) -> Order:
+        order = self.head
+        if order is None:
+            raise IndexError("pop from an empty PriceLevel")
+        self.remove(order)
+        return order
+
+    def remove(self, order: Order) -> None:
+        """Unlink an order that rests in this level."""
+        prev, nxt = order._prev, order._next
+        if prev is None:
+            self.head = nxt
+        else:
+            prev._next = nxt
+        if nxt is None:
+            self.tail = prev
+        else:
+            nxt._prev = prev
+        order._prev = order._next = None
+        order._level = None
+        self._len -= 1
+        self.total_qty -= order.quantity
+        self.side.total_qty -= order.quantity
+
+    def remove_if(self, predicate: Callable[[Order], bool]) -> List[Order]:
+        """Unlink every order matching predicate (FIFO order of the rest is kept)."""
+        removed: List[Order] = []
+        o = self.head
+        while o is not None:
+            nxt = o._next
+            if predicate(o):
+                self.remove(o)
+                removed.append(o)
+            o = nxt
+        return removed
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[Order]:
+        o = self.head
+        while o is not None:
+            nxt = o._next
+            yield o
+            o = nxt
+
+    def __getitem__(self, index: int) -> Order:
+        n = self._len
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("PriceLevel index out of range")
+        if index <= n // 2:
+            o = self.head
+            for _ in range(index):
+                o = o._next
+        else:
+            o = self.tail
+            for _ in range(n - 1 - index):
+                o = o._prev
+        return o
+
+    def __repr__(self) -> str:
+        return f"PriceLevel({self.price}, {list(self)!r})"
+
+
+class _LevelMap(SortedDict):
+    """
+    price -> PriceLevel kept in ascending price order (best ask first, best bid last).
+    A missing price gets a new empty level (like defaultdict).
+    total_qty is the resting quantity summed over all levels of the side.
+
+    expiry_heap is a min-heap of (timestamp, seq, order) for every append. Entries
+    are never removed on cancel/fill, so consumers must check that the order still
+    rests here (order._level.side is self) and is still that old.
+
+    min_price()/max_price() are cached: a new level can only extend them, and
+    removing the level holding either one drops that cache (re-read lazily).
+    Every key-set mutator below keeps the cache honest.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.total_qty = 0
+        self.expiry_heap: List[Tuple[float, int, Order]] = []
+        self.expiry_heap_limit = EXPIRY_HEAP_SLACK
+        self._lo: Optional[float] = None  # None = unknown (or empty)
+        self._hi: Optional[float] = None
+
+    def min_price(self) -> Optional[float]:
+        lo = self._lo
+        if lo is None and self:
+            lo = self._lo = self.peekitem(0)[0]
+        if _VALIDATE_TOP:
+            assert lo == (self.peekitem(0)[0] if self else None), "stale cached min price"
+        return lo
+
+    def max_price(self) -> Optional[float]:
+        hi = self._hi
+        if hi is None and self:
+            hi = self._hi = self.peekitem(-1)[0]
+        if _VALIDATE_TOP:
+            assert hi == (self.peekitem(-1)[0] if self else None), "stale cached max price"
+        return hi
+
+    def _forget(self, price: float) -> None:
+        if price == self._lo:
+            self._lo = None
+        if price == self._hi:
+            self._hi = None
+
+    def __setitem__(self, price: float, level: PriceLevel) -> None:
+        if price not in self:
+            lo, hi = self._lo, self._hi
+            if lo is not None and price < lo:
+                self._lo = price
+            if hi is not None and price > hi:
+                self._hi = price
+        super().__setitem__(price, level)
+
+    def __delitem__(self, price: float) -> None:
+        super().__delitem__(price)
+        self._forget(price)
+
+    def pop(self, price: float, *default):
+        level = super().pop(price, *default)
+        self._forget(price)
+        return level
+
+    def popitem(self, index: int = -1):
+        self._lo = self._hi = None
+        return super().popitem(index)
+
+    def setdefault(self, price: float, default=None):
+        if price in self:
+            return self[price]
+        self[price] = default
+        return default
+
+    def update(self, *args, **kwargs) -> None:
+        self._lo = self._hi = None
+        super().update(*args, **kwargs)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def purge_expiry_heap(self) -> None:
+        """Rebuild the expiry heap from the orders still resting on this side."""
+        heap = [(o.timestamp, next(_expiry_seq), o) for level in self.values() for o in level]
+        heapify(heap)
+        self.expiry_heap = heap
+        self.expiry_heap_limit = 2 * len(heap) + EXPIRY_HEAP_SLACK
+
+    def __missing__(self, price: float) -> PriceLevel:
+        level = self[price] = PriceLevel(price, side=self)
+        return level
+
+    def clear(self) -> None:
+        super().clear()
+        self.total_qty = 0
+        self._lo = self._hi = None
+        self.expiry_heap = []
+        self.expiry_heap_limit = EXPIRY_HEAP_SLACK
+
 
 class OrderBook:
     """
     Thread-safe CLOB book storage with:
-    - price->deque FIFO at each level
+    - price->PriceLevel FIFO at each level
     - order_id index for cancels
-    - trader_id -> set(order_id) index for fast mass-cancel
+    - (trader_id, side) -> set(order_id) index for fast mass-cancel
     - deterministic expiration via expire_orders(current_time) called by main loop
 
     Compatibility targets (your existing code expects):
     - self.bids / self.asks are dict-like keyed by float price
-    - values are deques containing mutable Order objects (quantity mutates on fills)
+    - values are deque-like PriceLevels of mutable Order objects (quantity mutates on fills)
     - add_order(order) -> bool
     - cancel_orders(trader_id, side=None) -> int
     - cancel_order_by_id(order_id) -> bool
+    - is_resting(order) -> bool
     - expire_orders(current_time) -> int
     - get_best_bid_ask/get_spread/get_mid_price/get_depth/get_stats/clear
     """
@@ -66,12 +346,16 @@ class OrderBook:
         self.quote_lifetime = float(quote_lifetime)
         self.min_tick_size = float(min_tick_size)
 
-        self.bids: DefaultDict[float, Deque[Order]] = defaultdict(deque)
-        self.asks: DefaultDict[float, Deque[Order]] = defaultdict(deque)
+        self.bids: _LevelMap = _LevelMap()
+        self.asks: _LevelMap = _LevelMap()
+
+        # Quotes cluster on a few dozen prices, so snapping is memoized per tick size
+        self._snap_cache: Dict[float, float] = {}
+        self._snap_tick = self.min_tick_size
 
         # Indices
-        self._order_index: Dict[int, Tuple[str, float, str]] = {}            # order_id -> (side, price, trader_id)
-        self._trader_order_ids: DefaultDict[str, Set[int]] = defaultdict(set)
+        self._order_index: Dict[int, Order] = {}                             # order_id -> resting Order
+        self._trader_side_ids: DefaultDict[Tuple[str, str], Set[int]] = defaultdict(set)  # (trader_id, side) -> ids
 
         # Stats
         self._total_orders_added = 0
@@ -82,10 +366,23 @@ class OrderBook:
 
     def _snap_price(self, price: float) -> float:
         # snap to tick grid (float key stays stable)
-        ticks = round(float(price) / self.min_tick_size)
-        return round(ticks * self.min_tick_size, 10)
-
-    def _book_for_side(self, side: str) -> DefaultDict[float, Deque[Order]]:
+        cache = self._snap_cache
+        if self._snap_tick != self.min_tick_size:
+            cache.clear()
+            self._snap_tick = self.min_tick_size
+        snapped = cache.get(price)
+        if snapped is None:
+            ticks = round(float(price) / self.min_tick_size)
+            snapped = round(ticks * self.min_tick_size, 10)
+            if len(cache) >= SNAP_CACHE_SIZE:
+                cache.clear()
+            cache[price] = snapped
+        return snapped
+
+    def _best_bid_ask_locked(self) -> Tuple[Optional[float], Optional[float]]:
+        return self.bids.max_price(), self.asks.min_price()
+
+    def _book_for_side(self, side: str) -> Dict[float, PriceLevel]:
         return self.bids if side == "buy" else self.asks
 
     def _clean_empty_level(self, side: str, price: float) -> None:
@@ -95,100 +392,112 @@ class OrderBook:
             del book[price]
 
     def _index_add(self, order: Order) -> None:
-        self._order_index[order.order_id] = (order.side, order.price, order.trader_id)
-        self._trader_order_ids[order.trader_id].add(order.order_id)
+        self._order_index[order.order_id] = order
+        self._trader_side_ids[order.trader_id, order.side].add(order.order_id)
 
     def _index_remove(self, order_id: int) -> None:
-        loc = self._order_index.pop(order_id, None)
-        if not loc:
+        order = self._order_index.pop(order_id, None)
+        if order is None:
             return
-        _, _, trader_id = loc
-        s = self._trader_order_ids.get(trader_id)
+        key = (order.trader_id, order.side)
+        s = self._trader_side_ids.get(key)
         if s is not None:
             s.discard(order_id)
             if not s:
-                self._trader_order_ids.pop(trader_id, None)
+                del self._trader_side_ids[key]
+
+    @staticmethod
+    def _unlink(order: Order) -> bool:
+        """O(1) removal of a resting order from its level (dropping the level if emptied)."""
+        level = order._level
+        if level is None:
+            return False  # already filled / canceled / expired
+        level.remove(order)
+        if not level:
+            level.side.pop(level.price, None)
+        return True
 
     # ---------- public API ----------
 
     def add_order(self, order: Order) -> bool:
+        # Hot path: helper calls are inlined (memo hit of _snap_price, _book_for_side, _index_add)
         with self._lock:
             # normalize price to tick grid (critical for stable dict keys)
-            order.price = self._snap_price(order.price)
+            price = self._snap_cache.get(order.price) if self._snap_tick == self.min_tick_size else None
+            if price is None:
+                price = self._snap_price(order.price)
+            order.price = price
 
-            book = self._book_for_side(order.side)
-            book[order.price].append(order)
+            (self.bids if order.side == "buy" else self.asks)[price].append(order)
 
-            self._index_add(order)
+            order_id = order.order_id
+            self._order_index[order_id] = order
+            self._trader_side_ids[order.trader_id, order.side].add(order_id)
             self._total_orders_added += 1
             return True
 
-    def cancel_order_by_id(self, order_id: int) -> bool:
+    def index_remove(self, order_id: int) -> None:
+        """Drop an order that left the book outside the cancel/expire paths (matcher fill hook)."""
         with self._lock:
-            loc = self._order_index.get(order_id)
-            if not loc:
-                return False
-
-            side, price, _trader_id = loc
-            book = self._book_for_side(side)
-            q = book.get(price)
-            if not q:
-                # stale index; clean up
-                self._index_remove(order_id)
-                return False
+            self._index_remove(order_id)
 
-            old_len = len(q)
-            new_q = deque(o for o in q if o.order_id != order_id)
-            if len(new_q) == old_len:
+    def cancel_order_by_id(self, order_id: int) -> bool:
+        with self._lock:
+            order = self._order_index.get(order_id)
+            if order is None:
                 return False
 
-            book[price] = new_q
-            self._clean_empty_level(side, price)
             self._index_remove(order_id)
+            level = order._level
+            if level is None:
+                return False  # already filled / expired
+
+            # _unlink, inlined
+            level.remove(order)
+            if not level:
+                level.side.pop(level.price, None)
 
             self._total_orders_canceled += 1
             return True
 
+    def cancel_orders_by_ids(self, order_ids: Iterable[int]) -> int:
+        """
+        Cancel many orders by id, each an O(1) unlink.
+        Ids that are unknown or already filled are ignored. Returns number canceled.
+        """
+        with self._lock:
+            index = self._order_index
+            canceled = 0
+            for oid in order_ids:
+                order = index.get(oid)
+                if order is None:
+                    continue
+                self._index_remove(oid)
+                if self._unlink(order):
+                    canceled += 1
+
+            self._total_orders_canceled += canceled
+            return canceled
+
     def cancel_orders(self, trader_id: str, side: Optional[str] = None) -> int:
         """
         Cancel all orders for trader_id; if side specified, cancel only that side.
         Uses indices so we don't scan the whole book.
         """
         with self._lock:
-            ids = self._trader_order_ids.get(trader_id)
-            if not ids:
-                return 0
-
-            # group by (side, price) so each deque is filtered once
-            targets: DefaultDict[Tuple[str, float], Set[int]] = defaultdict(set)
-            for oid in list(ids):
-                loc = self._order_index.get(oid)
-                if not loc:
-                    continue
-                s, p, t = loc
-                if t != trader_id:
-                    continue
-                if side is None or side == s:
-                    targets[(s, p)].add(oid)
-
+            by_side = self._trader_side_ids
+            index = self._order_index
             canceled = 0
-            for (s, p), oids in targets.items():
-                book = self._book_for_side(s)
-                q = book.get(p)
-                if not q:
-                    continue
-
-                old_len = len(q)
-                new_q = deque(o for o in q if o.order_id not in oids)
-                removed = old_len - len(new_q)
-                if removed <= 0:
+            for s in (side,) if side is not None else ("buy", "sell"):
+                # The whole (trader, side) bucket goes, so drop it in one step
+                ids = by_side.pop((trader_id, s), None)
+                if not ids:
                     continue
-
-                book[p] = new_q
-                self._clean_empty_level(s, p)
-                for oid in oids:
-                    self._index_remove(oid)
-                canceled += removed
+                for oid in ids:
+                    order = index.pop(oid, None)
+                    # Orders that already left the book are dropped from the index too
+                    if order is not None and self._unlink(order):
+                        canceled += 1
 
             self._total_orders_canceled += canceled
             return canceled
@@ -201,102 +510,122 @@ class OrderBook:
             cutoff = float(current_time) - self.quote_lifetime
             expired = 0
 
-            for side, book in (("buy", self.bids), ("sell", self.asks)):
-                for price in list(book.keys()):
-                    q = book[price]
-                    keep: Deque[Order] = deque()
-                    for o in q:
-                        if o.timestamp >= cutoff:
-                            keep.append(o)
-                        else:
-                            expired += 1
-                            self._index_remove(o.order_id)
-
-                    if keep:
-                        book[price] = keep
-                    else:
-                        del book[price]
+            # Pop only entries older than cutoff; skip orders that left the book
+            # (or were re-added with a newer timestamp) since they were pushed
+            for book in (self.bids, self.asks):
+                heap = book.expiry_heap
+                while heap and heap[0][0] < cutoff:
+                    o = heappop(heap)[2]
+                    level = o._level
+                    if level is None or level.side is not book or not o.timestamp < cutoff:
+                        continue
+                    self._index_remove(o.order_id)
+                    self._unlink(o)
+                    expired += 1
 
             self._total_orders_expired += expired
             return expired
 
     def get_best_bid_ask(self) -> Tuple[Optional[float], Optional[float]]:
         with self._lock:
-            best_bid = max(self.bids.keys()) if self.bids else None
-            best_ask = min(self.asks.keys()) if self.asks else None
-            return best_bid, best_ask
+            return self._best_bid_ask_locked()
 
     def get_spread(self) -> Optional[float]:
-        bb, ba = self.get_best_bid_ask()
+        with self._lock:
+            bb, ba = self._best_bid_ask_locked()
         if bb is None or ba is None:
             return None
         return ba - bb
 
     def get_mid_price(self) -> Optional[float]:
-        bb, ba = self.get_best_bid_ask()
+        with self._lock:
+            bb, ba = self._best_bid_ask_locked()
         if bb is None or ba is None:
             return None
         return (bb + ba) / 2.0
 
     def get_depth(self, levels: int = 6) -> Tuple[List[Tuple[float, int]], List[Tuple[float, int]]]:
         with self._lock:
-            bid_prices = sorted(self.bids.keys(), reverse=True)[:levels]
-            ask_prices = sorted(self.asks.keys())[:levels]
-
-            bids = [(p, sum(o.quantity for o in self.bids[p])) for p in bid_prices]
-            asks = [(p, sum(o.quantity for o in self.asks[p])) for p in ask_prices]
+            bid_levels = self.bids
+            ask_levels = self.asks
+            bids = [(p, bid_levels[p].total_qty) for p in islice(reversed(bid_levels), levels)]
+            asks = [(p, ask_levels[p].total_qty) for p in islice(ask_levels, levels)]
             return bids, asks
 
+    def is_resting(self, order: Order) -> bool:
+        """True while order still rests in the book (not filled, canceled or expired)."""
+        with self._lock:
+            # Fills drain quantity before the order is unlinked, so check both
+            return order.quantity > 0 and order._level is not None
+
     def get_orders_by_trader(self, trader_id: str) -> List[Order]:
         with self._lock:
-            ids = self._trader_order_ids.get(trader_id)
-            if not ids:
-                return []
-
-            out: List[Order] = []
-            for oid in ids:
-                loc = self._order_index.get(oid)
-                if not loc:
-                    continue
-                side, price, _t = loc
-                book = self._book_for_side(side)
-                q = book.get(price)
-                if not q:
-                    continue
-                for o in q:
-                    if o.order_id == oid:
-                        out.append(o)
-                        break
+            by_side = self._trader_side_ids
+            index = self._order_index
+            out = [
+                o
+                for s in ("buy", "sell")
+                for o in map(index.get, by_side.get((trader_id, s), ()))
+                if o is not None and o._level is not None
+            ]
 
             out.sort(key=lambda o: (o.timestamp, o.order_id))
             return out
 
+    def on_fill(self, order: Order, filled_qty: int) -> None:
+        """
+        Shrink a resting order by filled_qty, keeping the running level/side totals
+        in step. A fully filled order leaves the book (and the indices).
+        """
+        if not 0 < filled_qty <= order.quantity:
+            raise ValueError(f"filled_qty must be in 1..{order.quantity}, got {filled_qty}")
+        with self._lock:
+            level = order._level
+            order.quantity -= filled_qty
+            if level is None:
+                return
+            level.total_qty -= filled_qty
+            level.side.total_qty -= filled_qty
+            if order.quantity == 0:
+                self._index_remove(order.order_id)
+                self._unlink(order)
+
     def get_total_quantity(self, side: str) -> int:
         with self._lock:
             book = self.bids if side == "buy" else self.asks
-            return sum(sum(o.quantity for o in q) for q in book.values())
+            return book.total_qty
+
+    def get_total_depth(self) -> int:
+        """Resting quantity on both sides (O(1): running totals)."""
+        with self._lock:
+            return self.bids.total_qty + self.asks.total_qty
 
     def get_stats(self) -> dict:
         with self._lock:
-            bb, ba = self.get_best_bid_ask()
+            # One acquisition for a consistent snapshot; no public getter is re-entered
+            bb, ba = self._best_bid_ask_locked()
+            both = bb is not None and ba is not None
             return {
                 "total_orders_added": self._total_orders_added,
                 "total_orders_canceled": self._total_orders_canceled,
                 "total_orders_expired": self._total_orders_expired,
                 "active_bid_levels": len(self.bids),
                 "active_ask_levels": len(self.asks),
-                "total_bid_quantity": self.get_total_quantity("buy"),
-                "total_ask_quantity": self.get_total_quantity("sell"),
+                "total_bid_quantity": self.bids.total_qty,
+                "total_ask_quantity": self.asks.total_qty,
                 "best_bid": bb,
                 "best_ask": ba,
-                "spread": self.get_spread(),
-                "mid_price": self.get_mid_price(),
-                "active_traders": len(self._trader_order_ids),
+                "spread": ba - bb if both else None,
+                "mid_price": (bb + ba) / 2.0 if both else None,
+                "active_traders": len({t for t, _ in self._trader_side_ids}),
             }
 
     def clear(self) -> None:
         with self._lock:
+            for book in (self.bids, self.asks):
+                for level in book.values():
+                    level.remove_if(lambda o: True)  # detach orders so they no longer look resting
             self.bids.clear()
             self.asks.clear()
             self._order_index.clear()
-            self._trader_order_ids.clear()
+            self._trader_side_ids.clear()
@@ -22,11 +22,20 @@ Production extensions:
 - Stress testing
 - Real-time P&L streaming to risk desk
 """
-from typing import Optional, Dict, List, Tuple
+from typing import Deque, Optional, Dict, List, Tuple
+from collections import deque
 from dataclasses import dataclass
 from enum import Enum
+from itertools import islice
 import math
 
+import numpy as np
+
+
+# One-sided z-scores for calculate_var; any other confidence uses the 99% value
+VAR_Z_SCORES = {0.95: 1.65, 0.99: 2.33}
+VAR_WINDOW = 10  # recent fills used to estimate volatility
+
 
 class RiskViolation(Enum):
     """Types of risk violations."""
@@ -37,14 +46,14 @@ class RiskViolation(Enum):
     CONCENTRATION = "concentration"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class RiskEvent:
     """
     Immutable risk event record.
     
     Logged for audit trail and compliance.
     """
-    timestamp: float
+    timestamp: float  # wall-clock (time.time()), as passed by the simulator
     trader_id: str
     violation_type: RiskViolation
     severity: str  # 'warning', 'critical'
@@ -79,7 +88,8 @@ class RiskManager:
         margin_threshold: float = -50.0,
         loss_limit: float = -100.0,
         max_order_size: int = 10,
-        concentration_limit: float = 0.5
+        concentration_limit: float = 0.5,
+        max_events_kept: int = 100_000
     ):
         """
         Initialize risk manager with limits.
@@ -90,6 +100,7 @@ class RiskManager:
             loss_limit: Daily loss limit (trading stops)
             max_order_size: Max quantity per order (fat-finger protection)
             concentration_limit: Max % of total book depth (0.0-1.0)
+            max_events_kept: Audit-log capacity; oldest events are dropped beyond it
         """
         # Core limits
         self.position_limit = position_limit
@@ -98,8 +109,9 @@ class RiskManager:
         self.max_order_size = max_order_size
         self.concentration_limit = concentration_limit
         
-        # Event log (for audit)
-        self.risk_events: List[RiskEvent] = []
+        # Event log (for audit), bounded so long sessions don't grow it without limit
+        self.risk_events: Deque[RiskEvent] = deque(maxlen=max_events_kept)
+        self._total_events = 0
         
         # Statistics
         self._total_blocks = 0
@@ -123,6 +135,10 @@ class RiskManager:
         """
         new_position = trader.position + quantity
         
+        # Hot path: one combined test when the order passes (the common case)
+        if abs(new_position) <= self.position_limit and quantity <= self.max_order_size:
+            return True, None
+        
         if abs(new_position) > self.position_limit:
             self._total_blocks += 1
             return False, f"Position limit ({self.position_limit}) would be exceeded"
@@ -148,6 +164,9 @@ class RiskManager:
         """
         new_position = trader.position - quantity
         
+        if abs(new_position) <= self.position_limit and quantity <= self.max_order_size:
+            return True, None
+        
         if abs(new_position) > self.position_limit:
             self._total_blocks += 1
             return False, f"Position limit ({self.position_limit}) would be exceeded"
@@ -173,6 +192,11 @@ class RiskManager:
         Returns:
             (allowed, reason): Validation result
         """
+        # Hot path: everything passes -> no per-check branches or extra calls
+        new_position = trader.position + quantity if side == 'buy' else trader.position - quantity
+        if 0 < quantity <= self.max_order_size and price > 0 and abs(new_position) <= self.position_limit:
+            return True, None
+        
         # Size check
         if quantity <= 0:
             return False, "Quantity must be positive"
@@ -231,6 +255,7 @@ class RiskManager:
                 action_taken='liquidated'
             )
             self.risk_events.append(event)
+            self._total_events += 1
             
             return True
         
@@ -265,6 +290,7 @@ class RiskManager:
                 action_taken='trading_halted'
             )
             self.risk_events.append(event)
+            self._total_events += 1
             
             return True
         
@@ -291,21 +317,21 @@ class RiskManager:
         if trader.num_fills < 2:
             return 0.0
         
-        # Estimate volatility from recent fills
-        recent_fills = trader.fills[-10:]
-        prices = [f.price for f in recent_fills]
+        # Estimate volatility from recent fills: slice the trader's fill-price array
+        # (O(window), unlike trader.fills which copies the whole history)
+        prices = trader.fill_arrays()[0][-VAR_WINDOW:].tolist()
         
         if len(prices) < 2:
             return 0.0
         
-        # Calculate price volatility (std dev)
+        # Calculate price volatility (std dev); plain floats beat NumPy at this size
         mean_price = sum(prices) / len(prices)
-        variance = sum((p - mean_price) ** 2 for p in prices) / len(prices)
+        variance = sum([(p - mean_price) ** 2 for p in prices]) / len(prices)
         volatility = math.sqrt(variance)
         
         # VAR formula (simplified)
         # VAR = position × volatility × z_score × sqrt(time_fraction)
-        z_score = 1.65 if confidence == 0.95 else 2.33  # 95% or 99%
+        z_score = VAR_Z_SCORES.get(confidence, 2.33)
         time_fraction = math.sqrt(horizon_seconds / 86400.0)  # Fraction of day
         
         var = abs(trader.position) * volatility * z_score * time_fraction
@@ -366,18 +392,14 @@ class RiskManager:
         # Liquidation slippage (penalty for forced exit)
         slippage = 5.0  # Ticks of slippage
         
-        # Liquidate by adjusting cash (simulate forced trade)
+        # Long position: force sell at bad price; short: force buy at bad price
         if trader.position > 0:
-            # Long position: force sell at bad price
             liquidation_price = fair_value - slippage
-            trader._cash += trader.position * liquidation_price
         else:
-            # Short position: force buy at bad price
             liquidation_price = fair_value + slippage
-            trader._cash -= abs(trader.position) * liquidation_price
         
-        # Flatten position
-        trader._position = 0
+        # Flatten position (simulated forced trade)
+        trader.liquidate(liquidation_price)
     
     # ==================== Analytics ====================
     
@@ -395,7 +417,7 @@ class RiskManager:
         pnl = trader.mark_to_market(current_price)
         threshold = self.margin_threshold
         cushion = pnl - threshold
-        band = 0.2 * abs(threshold) if threshold !=0 else 0.0
+        band = 0.2 * abs(threshold)  # 0.0 when threshold is 0
         var_95 = self.calculate_var(trader, current_price, confidence=0.95)
         at_risk = cushion<=band
         return {
@@ -410,17 +432,46 @@ class RiskManager:
             'at_risk': at_risk,  # Within 20% of margin call
         }
     
+    def get_risk_metrics_bulk(self, positions: np.ndarray, cash: np.ndarray, current_price: float) -> Dict[str, np.ndarray]:
+        """
+        Vectorized subset of get_risk_metrics for many traders at once.
+        
+        Args:
+            positions: Position per trader
+            cash: Cash per trader (same order as positions)
+            current_price: Current market price
+        
+        Returns:
+            Dict of per-trader arrays: mtm_pnl, margin_cushion, position_utilization, at_risk
+            (var_95 needs each trader's fill history; use get_risk_metrics for it)
+        """
+        threshold = self.margin_threshold
+        pnl = cash + positions * current_price  # Trader.mark_to_market
+        cushion = pnl - threshold
+        band = 0.2 * abs(threshold)  # 0.0 when threshold is 0
+        if self.position_limit > 0:
+            utilization = np.abs(positions) / self.position_limit
+        else:
+            utilization = np.zeros_like(pnl)
+        return {
+            'mtm_pnl': pnl,
+            'margin_cushion': cushion,
+            'position_utilization': utilization,
+            'at_risk': cushion <= band,
+        }
+    
     def get_stats(self) -> dict:
         """Get risk manager statistics."""
         return {
             'total_blocks': self._total_blocks,
             'total_liquidations': self._total_liquidations,
             'total_warnings': self._total_warnings,
-            'total_events': len(self.risk_events),
+            'total_events': self._total_events,
             'position_limit': self.position_limit,
             'margin_threshold': self.margin_threshold
         }
     
     def get_recent_events(self, max_events: int = 10) -> List[RiskEvent]:
         """Get recent risk events."""
-        return self.risk_events[-max_events:]
+        events = self.risk_events
+        return list(islice(events, max(0, len(events) - max_events) if max_events else 0, None))
@@ -8,7 +8,7 @@ Design philosophy:
    - Does NOT enforce limits (that's RiskManager's job)
    
 2. Immutable history:
-   - All fills stored in immutable list
+   - Every fill recorded append-only (columnar arrays; Fill records in a bounded window)
    - Can reconstruct state at any point in time
    - Critical for debugging, compliance, dispute resolution
    
@@ -24,15 +24,24 @@ Design philosophy:
 
 Production considerations:
 - In real systems, this would be backed by database
-- Fill history would be paginated (not in-memory list)
+- Fill records would be paginated from storage (here: a bounded in-memory window)
 - Position reconciliation against exchange feeds
 - Real-time P&L streaming to risk systems
 """
+from collections import deque
 from dataclasses import dataclass
-from typing import List, Optional
+from itertools import islice
+from typing import Deque, List, Optional, Tuple
 from enum import Enum
 import math
 
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is an optional accelerator (pip install .[perf])
+    njit = None
+
 
 class TradeSide(Enum):
     """Trade direction enum for type safety."""
@@ -40,7 +49,7 @@ class TradeSide(Enum):
     SELL = "sell"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Fill:
     """
     Immutable fill record.
@@ -55,7 +64,7 @@ class Fill:
         price: Execution price
         quantity: Number of lots filled
         side: BUY or SELL
-        timestamp: Execution time
+        timestamp: Execution time (wall-clock, time.time())
         counterparty: Optional counterparty ID (for analysis)
         fee: Fee paid on this fill (taker fee)
     """
@@ -90,14 +99,55 @@ class Fill:
         Returns:
             float: P&L from this fill (excluding fees)
         """
-        if self.side == TradeSide.BUY:
+        if self.side is TradeSide.BUY:
             return (settlement_price - self.price) * self.quantity
         else:  # SELL
             return (self.price - settlement_price) * self.quantity
     
     def signed_quantity(self) -> int:
         """Quantity with sign (+ for buy, - for sell)."""
-        return self.quantity if self.side == TradeSide.BUY else -self.quantity
+        return self.quantity if self.side is TradeSide.BUY else -self.quantity
+
+
+def _sharpe_ratio_numpy(price: np.ndarray, qty: np.ndarray, side_sign: np.ndarray,
+                        current_price: float) -> float:
+    """Mean / population std of per-fill P&L contributions at current_price."""
+    if price.shape[0] == 0:
+        return 0.0
+    returns = (current_price - price) * side_sign * qty
+    std_dev = float(returns.std())
+    return float(returns.mean()) / std_dev if std_dev != 0 else 0.0
+
+
+def _sharpe_ratio_loop(price, qty, side_sign, current_price):
+    """
+    Same ratio as _sharpe_ratio_numpy in two plain loops (JIT target).
+    
+    Summation runs in fill order, matching the original per-Fill Python sums.
+    """
+    n = price.shape[0]
+    if n == 0:
+        return 0.0
+    
+    total = 0.0
+    for i in range(n):
+        total += side_sign[i] * (current_price - price[i]) * qty[i]
+    mean_return = total / n
+    
+    sq_dev = 0.0
+    for i in range(n):
+        d = side_sign[i] * (current_price - price[i]) * qty[i] - mean_return
+        sq_dev += d * d
+    std_dev = math.sqrt(sq_dev / n)
+    
+    if std_dev == 0:
+        return 0.0
+    return mean_return / std_dev
+
+
+# No fastmath: the window is ~10 fills, and strict ordering keeps the result
+# identical to the pre-JIT pure-Python version.
+_sharpe_ratio = njit(cache=True)(_sharpe_ratio_loop) if njit is not None else _sharpe_ratio_numpy
 
 
 class Trader:
@@ -106,7 +156,8 @@ class Trader:
     
     State management:
         - Mutable state: position, cash, fees
-        - Immutable history: fills list (append-only)
+        - Immutable history: fill arrays (append-only, complete) plus the
+          most recent max_fill_history Fill records
         - Computed on demand: PnL, VWAP, Greeks
     
     Thread safety:
@@ -120,7 +171,20 @@ class Trader:
         - fees_paid = sum(fill.fee)
     """
     
-    def __init__(self, trader_id: str, is_bot: bool = True, initial_cash: float = 0.0):
+    __slots__ = (
+        "trader_id", "is_bot",
+        "_position", "_cash", "_fees_paid", "_fills", "_num_fills",
+        "_avg_cost", "_realized_pnl",
+        "_sum_notional", "_sum_qty", "_buy_fills",
+        "_fill_price", "_fill_qty", "_fill_side_sign", "_fill_fee",
+        "_adverse_selection_score", "_ema_alpha",
+        "_metrics_cache", "_cache_valid",
+    )
+    
+    _INITIAL_FILL_CAPACITY = 16
+    
+    def __init__(self, trader_id: str, is_bot: bool = True, initial_cash: float = 0.0,
+                 max_fill_history: int = 100_000):
         """
         Initialize trader.
         
@@ -128,6 +192,8 @@ class Trader:
             trader_id: Unique trader identifier
             is_bot: True for bots, False for human user
             initial_cash: Starting cash (doesn't affect P&L calculation)
+            max_fill_history: Fill records kept (oldest dropped first); the
+                columnar fill arrays and all aggregates cover every fill
         """
         # Immutable attributes
         self.trader_id = trader_id
@@ -137,7 +203,24 @@ class Trader:
         self._position = 0
         self._cash = initial_cash
         self._fees_paid = 0.0
-        self._fills: List[Fill] = []
+        self._fills: Deque[Fill] = deque(maxlen=max_fill_history)
+        self._num_fills = 0
+        
+        # Average-cost accounting, maintained per fill
+        self._avg_cost = 0.0        # average entry price of the open position
+        self._realized_pnl = 0.0    # closed-trade P&L, before fees
+        
+        # Running fill aggregates, maintained per fill (VWAP / fill summary)
+        self._sum_notional = 0.0
+        self._sum_qty = 0
+        self._buy_fills = 0
+        
+        # Columnar record of every fill for vectorized analytics.
+        # Buffers grow by doubling; only the first _num_fills slots are live.
+        self._fill_price = np.empty(self._INITIAL_FILL_CAPACITY, dtype=np.float64)
+        self._fill_qty = np.empty(self._INITIAL_FILL_CAPACITY, dtype=np.int64)
+        self._fill_side_sign = np.empty(self._INITIAL_FILL_CAPACITY, dtype=np.int8)
+        self._fill_fee = np.empty(self._INITIAL_FILL_CAPACITY, dtype=np.float64)
         
         # Adverse selection tracking (EMA of fill quality)
         self._adverse_selection_score = 0.0
@@ -172,13 +255,26 @@ class Trader:
     @property
     def fills(self) -> List[Fill]:
         """
-        All fills (immutable copies).
+        Retained fills, oldest first (the last max_fill_history of them).
         
-        Returns a copy to prevent external mutation.
-        In production, this would be paginated.
+        Returns a copy to prevent external mutation; use get_fills() to page.
         """
         return list(self._fills)
     
+    def get_fills(self, start: int = 0, end: Optional[int] = None) -> List[Fill]:
+        """Slice [start:end] of the retained fills without copying the rest."""
+        return list(islice(self._fills, start, end))
+    
+    @property
+    def avg_cost(self) -> float:
+        """Average entry price of the open position (0.0 when flat)."""
+        return self._avg_cost
+    
+    @property
+    def realized_pnl(self) -> float:
+        """P&L locked in by closing trades (average cost basis, before fees)."""
+        return self._realized_pnl
+    
     @property
     def adverse_selection_score(self) -> float:
         """
@@ -195,8 +291,22 @@ class Trader:
     
     @property
     def num_fills(self) -> int:
-        """Total number of fills."""
-        return len(self._fills)
+        """Total number of fills (including records dropped from the window)."""
+        return self._num_fills
+    
+    def fill_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Fill history as parallel read-only arrays.
+        
+        Returns:
+            (price, quantity, side_sign, fee), one entry per fill in order.
+            side_sign is +1 for buys and -1 for sells.
+        """
+        n = self._num_fills
+        views = (self._fill_price[:n], self._fill_qty[:n], self._fill_side_sign[:n], self._fill_fee[:n])
+        for v in views:
+            v.flags.writeable = False
+        return views
     
     # ==================== Core calculations ====================
     
@@ -231,63 +341,45 @@ class Trader:
         Returns:
             float: VWAP, or 0.0 if no fills
         
-        Complexity: O(N) where N = number of fills
+        Complexity: O(1) (running totals updated in apply_fill)
         """
-        if not self._fills:
-            return 0.0
+        return self._sum_notional / self._sum_qty if self._sum_qty > 0 else 0.0
+    
+    def unrealized_pnl(self, current_price: float) -> float:
+        """
+        Open-position P&L against the average cost basis.
         
-        total_value = sum(f.notional_value() for f in self._fills)
-        total_quantity = sum(f.quantity for f in self._fills)
+        Args:
+            current_price: Current market price
         
-        return total_value / total_quantity if total_quantity > 0 else 0.0
+        Returns:
+            float: position × (current_price - avg_cost)
+        """
+        return self._position * (current_price - self._avg_cost)
     
     def calculate_realized_pnl(self, current_price: float) -> float:
         """
-        Calculate realized P&L (closed positions only).
-        
-        This is more complex than it looks. Need to track:
-        - Cost basis of position
-        - FIFO or LIFO accounting (we use average cost)
+        Calculate realized P&L (closed positions only), net of fees.
         
-        For simplicity, we calculate total P&L and subtract unrealized.
+        Uses average cost accounting, maintained incrementally in apply_fill,
+        so total P&L = realized + unrealized at any mark.
         
         Args:
-            current_price: Current market price
+            current_price: Current market price (kept for API compatibility)
         
         Returns:
             float: Realized P&L
         """
-        total_pnl = self.mark_to_market(current_price)
-        unrealized_pnl = self._position * (current_price - self._get_average_cost())
-        return total_pnl - unrealized_pnl
+        return self._realized_pnl - self._fees_paid
     
     def _get_average_cost(self) -> float:
         """
-        Calculate average cost basis of current position.
+        Average cost basis of current position.
         
         Returns:
-            float: Average price paid (buys) or received (sells)
+            float: Average price paid (long) or received (short)
         """
-        if not self._fills:
-            return 0.0
-        
-        # Separate buys and sells
-        buy_value = sum(f.notional_value() for f in self._fills if f.side == TradeSide.BUY)
-        buy_qty = sum(f.quantity for f in self._fills if f.side == TradeSide.BUY)
-        
-        sell_value = sum(f.notional_value() for f in self._fills if f.side == TradeSide.SELL)
-        sell_qty = sum(f.quantity for f in self._fills if f.side == TradeSide.SELL)
-        
-        # Net position
-        if self._position > 0:
-            # Long: average buy price
-            return buy_value / buy_qty if buy_qty > 0 else 0.0
-        elif self._position < 0:
-            # Short: average sell price
-            return sell_value / sell_qty if sell_qty > 0 else 0.0
-        else:
-            # Flat: doesn't matter
-            return 0.0
+        return self._avg_cost
     
     def calculate_return(self, current_price: float, initial_capital: float = 1000.0) -> float:
         """
@@ -316,25 +408,16 @@ class Trader:
         Returns:
             float: Sharpe ratio (higher = better risk-adjusted returns)
         """
-        if len(self._fills) < 2:
-            return 0.0
-        
-        # Calculate returns for each fill
-        recent_fills = self._fills[-num_periods:]
-        returns = [f.pnl_contribution(current_price) for f in recent_fills]
-        
-        if not returns:
-            return 0.0
-        
-        # Mean and std dev
-        mean_return = sum(returns) / len(returns)
-        variance = sum((r - mean_return) ** 2 for r in returns) / len(returns)
-        std_dev = math.sqrt(variance)
-        
-        if std_dev == 0:
+        if self._num_fills < 2:
             return 0.0
         
-        return mean_return / std_dev
+        # Per-fill P&L contributions over the last num_periods fills,
+        # reduced in one kernel call straight off the columnar buffers
+        start, end, _ = slice(-num_periods, None).indices(self._num_fills)
+        return float(_sharpe_ratio(
+            self._fill_price[start:end], self._fill_qty[start:end], self._fill_side_sign[start:end],
+            float(current_price),
+        ))
     
     # ==================== State mutations ====================
     
@@ -361,24 +444,90 @@ class Trader:
         # Validate fill
         assert isinstance(fill, Fill), "Must be a Fill object"
         
-        # Update position
-        if fill.side == TradeSide.BUY:
-            self._position += fill.quantity
-            self._cash -= fill.notional_value()
+        # Side resolved once; signed_qty drives position and cash
+        qty = fill.quantity
+        if fill.side is TradeSide.BUY:
+            sign = 1
+            self._buy_fills += 1
         else:  # SELL
-            self._position -= fill.quantity
-            self._cash += fill.notional_value()
-        
-        # Deduct fees
-        self._cash -= fill.fee
-        self._fees_paid += fill.fee
-        
-        # Append to history (immutable)
+            sign = -1
+        signed_qty = sign * qty
+        
+        # Average cost / realized P&L (uses position before this fill)
+        self._update_cost_basis(signed_qty, fill.price)
+        
+        # Update position (sign flips the notional exactly, no rounding)
+        notional = fill.price * qty
+        self._position += signed_qty
+        self._cash -= sign * notional
+        self._sum_notional += notional
+        self._sum_qty += qty
+        
+        # Deduct fees (zero-fee games skip the float updates)
+        if fill.fee:
+            self._cash -= fill.fee
+            self._fees_paid += fill.fee
+        
+        # Append to history (immutable) and its columnar mirror
+        self._append_fill_arrays(fill, sign)
         self._fills.append(fill)
+        self._num_fills += 1
         
         # Invalidate metrics cache
         self._cache_valid = False
     
+    def liquidate(self, price: float):
+        """
+        Flatten the whole position at price without recording a fill.
+        
+        Used for forced exits (margin calls). Cash, realized P&L and cost
+        basis stay consistent, unlike writing position/cash directly.
+        
+        Args:
+            price: Liquidation price
+        """
+        if self._position == 0:
+            return
+        
+        self._update_cost_basis(-self._position, price)
+        self._cash += self._position * price
+        self._position = 0
+        self._cache_valid = False
+    
+    def _update_cost_basis(self, signed_qty: int, price: float):
+        """Apply a trade of signed_qty @ price to average cost and realized P&L."""
+        pos = self._position
+        if pos == 0 or (pos > 0) == (signed_qty > 0):
+            # Opening / adding: blend into the average cost
+            new_pos = pos + signed_qty
+            self._avg_cost = (abs(pos) * self._avg_cost + abs(signed_qty) * price) / abs(new_pos)
+            return
+        
+        # Reducing / closing / flipping
+        closed = min(abs(signed_qty), abs(pos))
+        direction = 1 if pos > 0 else -1
+        self._realized_pnl += closed * (price - self._avg_cost) * direction
+        
+        if abs(signed_qty) > abs(pos):
+            self._avg_cost = price      # flipped: remainder opens at this price
+        elif abs(signed_qty) == abs(pos):
+            self._avg_cost = 0.0        # flat
+    
+    def _append_fill_arrays(self, fill: Fill, sign: int):
+        """Write fill into slot _num_fills of the columnar buffers, doubling if full."""
+        n = self._num_fills
+        if n == len(self._fill_price):
+            capacity = 2 * n
+            self._fill_price = np.resize(self._fill_price, capacity)
+            self._fill_qty = np.resize(self._fill_qty, capacity)
+            self._fill_side_sign = np.resize(self._fill_side_sign, capacity)
+            self._fill_fee = np.resize(self._fill_fee, capacity)
+        
+        self._fill_price[n] = fill.price
+        self._fill_qty[n] = fill.quantity
+        self._fill_side_sign[n] = sign
+        self._fill_fee[n] = fill.fee
+    
     def update_adverse_selection(self, fill_price: float, fair_value: float, is_buyer: bool):
         """
         Update adverse selection score based on fill quality.
@@ -418,7 +567,7 @@ class Trader:
         Returns:
             Dict with fill metrics
         """
-        if not self._fills:
+        if not self._num_fills:
             return {
                 'total_fills': 0,
                 'buy_fills': 0,
@@ -428,17 +577,15 @@ class Trader:
                 'avg_fill_size': 0.0
             }
         
-        buy_fills = [f for f in self._fills if f.side == TradeSide.BUY]
-        sell_fills = [f for f in self._fills if f.side == TradeSide.SELL]
-        
-        total_volume = sum(f.notional_value() for f in self._fills)
+        n = self._num_fills
+        total_volume = self._sum_notional
         avg_price = self.calculate_vwap()
-        avg_size = sum(f.quantity for f in self._fills) / len(self._fills)
+        avg_size = self._sum_qty / n
         
         return {
-            'total_fills': len(self._fills),
-            'buy_fills': len(buy_fills),
-            'sell_fills': len(sell_fills),
+            'total_fills': n,
+            'buy_fills': self._buy_fills,
+            'sell_fills': n - self._buy_fills,
             'total_volume': total_volume,
             'avg_fill_price': avg_price,
             'avg_fill_size': avg_size
@@ -465,7 +612,7 @@ class Trader:
             'fees_paid': self._fees_paid,
             'mtm_pnl': self.mark_to_market(current_price),
             'vwap': self.calculate_vwap(),
-            'num_fills': len(self._fills),
+            'num_fills': self._num_fills,
             'adverse_selection_score': self._adverse_selection_score,
             'return_pct': self.calculate_return(current_price),
             'sharpe_ratio': self.calculate_sharpe_ratio(current_price),
@@ -490,7 +637,13 @@ class Trader:
         self._position = 0
         self._cash = 0.0
         self._fees_paid = 0.0
+        self._avg_cost = 0.0
+        self._realized_pnl = 0.0
+        self._sum_notional = 0.0
+        self._sum_qty = 0
+        self._buy_fills = 0
         self._fills.clear()
+        self._num_fills = 0
         self._adverse_selection_score = 0.0
         self._cache_valid = False
     
@@ -498,14 +651,14 @@ class Trader:
     
     def __repr__(self):
         return (f"Trader(id={self.trader_id}, pos={self._position}, "
-                f"cash=${self._cash:.2f}, fills={len(self._fills)}, "
+                f"cash=${self._cash:.2f}, fills={self._num_fills}, "
                 f"is_bot={self.is_bot})")
     
     def print_fill_history(self, max_fills: int = 10):
         """Print recent fill history (for debugging)."""
         print(f"\n=== Fill History for {self.trader_id} ===")
-        recent = self._fills[-max_fills:]
+        recent = islice(self._fills, max(len(self._fills) - max_fills, 0), None)
         for i, fill in enumerate(recent, 1):
             print(f"{i}. {fill.side.value.upper()} {fill.quantity}@{fill.price:.1f} "
                   f"(fee: ${fill.fee:.2f})")
-        print(f"Total fills: {len(self._fills)}\n")
+        print(f"Total fills: {self._num_fills}\n")
@@ -3,21 +3,48 @@
 from __future__ import annotations
 
 import json
+import logging
 import os
+import math
+import queue
+import struct
 import tempfile
+import threading
+import zlib
 from dataclasses import asdict, is_dataclass
 from enum import Enum
-from typing import Any, Dict, Iterable, List
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import orjson  # optional C encoder (pip install .[perf]); stdlib json otherwise
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard  # optional block compressor (pip install .[perf]); zlib otherwise
+except ImportError:
+    zstandard = None
+
+_log = logging.getLogger(__name__)
 
 def _ensure_parent_dir(path: str) -> None:
     parent = os.path.dirname(os.path.abspath(path))
     if parent:
         os.makedirs(parent, exist_ok=True)
 
-def _atomic_write_bytes(path: str, data: bytes) -> None:
+# fdatasync skips the metadata-only flush; not available on macOS/Windows
+_datasync = getattr(os, "fdatasync", os.fsync)
+
+def _atomic_write_with(path: str, write: Callable[[int], None], durable: bool = True) -> None:
     """
-    Write to a temp file in the same directory and replace.
+    Let write(fd) fill a temp file in the same directory, sync it and replace.
     This is the standard pattern for atomic-ish replacement with os.replace.
+
+    durable=False skips the data sync: the call no longer blocks on the disk,
+    but a crash soon after may lose the new contents (the previous file or a
+    truncated one may be what survives).
     """
     _ensure_parent_dir(path)
     target_dir = os.path.dirname(os.path.abspath(path)) or "."
@@ -26,11 +53,11 @@ def _atomic_write_bytes(path: str, data: bytes) -> None:
     tmp_path = None
     try:
         fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", dir=target_dir)
-        with os.fdopen(fd, "wb") as f:
-            fd = None
-            f.write(data)
-            f.flush()
-            os.fsync(f.fileno())
+        write(fd)
+        if durable:
+            _datasync(fd)
+        os.close(fd)
+        fd = None
         
         os.replace(tmp_path, path)
         tmp_path = None
@@ -46,46 +73,395 @@ def _atomic_write_bytes(path: str, data: bytes) -> None:
             except OSError:
                 pass
 
+def atomic_write_bytes(path: str, data: bytes, durable: bool = True) -> None:
+    """
+    Write to a temp file in the same directory and replace.
+    The payload goes out with as few write() calls as the kernel allows.
+    """
+    def write(fd: int) -> None:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    
+    _atomic_write_with(path, write, durable)
+
+def _json_key(k: Any) -> str:
+    # Same spelling orjson uses under OPT_NON_STR_KEYS
+    if isinstance(k, str):
+        return k
+    if k is None or isinstance(k, bool):
+        return json.dumps(k)
+    if isinstance(k, Enum):
+        return _json_key(k.value)
+    return str(k)
+
 def to_jsonable(x: Any) -> Any:
     """
     Convert common Python objects used in this project into JSON-serializable
     primitives (dict/list/str/int/float/bool/None).
+
+    Output matches orjson's: NaN/inf become None, numpy scalars and arrays
+    become plain numbers and lists.
     """
-    if x is None or isinstance(x, (str, int, float, bool)):
+    if isinstance(x, float):
+        return x if math.isfinite(x) else None
+    if x is None or isinstance(x, (str, int, bool)):
         return x
     if isinstance(x, Enum):
-        return x.value
+        return to_jsonable(x.value)
+    if isinstance(x, (np.generic, np.ndarray)):
+        return to_jsonable(x.tolist())
     if is_dataclass(x):
         return to_jsonable(asdict(x))
     if isinstance(x, dict):
-        return {str(k): to_jsonable(v) for k, v in x.items()}
+        return {_json_key(k): to_jsonable(v) for k, v in x.items()}
     if isinstance(x, (list, tuple)):
         return [to_jsonable(v) for v in x]
     return str(x)
 
-def atomic_write_json(path: str, obj: Dict[str, Any]) -> None:
-    safe_obj = to_jsonable(obj)
-    payload = json.dumps(safe_obj, ensure_ascii=False, indent=2, sort_keys=True).encode("utf-8")
-    _atomic_write_bytes(path, payload)
+def _json_dumps(obj: Any, **kwargs: Any) -> str:
+    """
+    json.dumps that walks obj in the C encoder and calls to_jsonable only for
+    values it cannot encode itself (dataclasses, plain Enums, unknown types).
+    """
+    try:
+        return json.dumps(obj, default=to_jsonable, ensure_ascii=False, allow_nan=False, **kwargs)
+    except (TypeError, ValueError):
+        # Dict keys the encoder rejects (e.g. tuples) or NaN/inf: the full walk
+        # stringifies those keys and maps non-finite floats to null, as orjson does
+        return json.dumps(to_jsonable(obj), ensure_ascii=False, **kwargs)
+
+if orjson is not None:
+    # orjson walks dataclasses, enums, tuples and numpy values natively;
+    # anything else goes through to_jsonable. Both encoders write NaN/inf as
+    # null and numpy values as plain JSON numbers/lists (see to_jsonable).
+    _ORJSON_OPTS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def _orjson_default(x: Any) -> Any:
+        return to_jsonable(x)
+
+def atomic_write_json(path: str, obj: Dict[str, Any], durable: bool = True) -> None:
+    if orjson is not None:
+        payload = orjson.dumps(
+            obj, default=_orjson_default, option=_ORJSON_OPTS | orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS
+        )
+    else:
+        payload = _json_dumps(obj, indent=2, sort_keys=True).encode("utf-8")
+    atomic_write_bytes(path, payload, durable)
 
 def read_json(path: str) -> Dict[str, Any]:
     with open(path, "rb") as f:
-        return json.loads(f.read().decode("utf-8"))
+        data = f.read()
+    return orjson.loads(data) if orjson is not None else json.loads(data.decode("utf-8"))
 
-def atomic_write_jsonl(path: str, records: Iterable[Dict[str, Any]]) -> None:
-    lines: List[str] = []
-    for r in records:
-        lines.append(json.dumps(to_jsonable(r), ensure_ascii=False, separators=(",", ":")))
-    
-    data = ("\n".join(lines) + ("\n" if lines else "")).encode("utf-8")
-    _atomic_write_bytes(path, data)
+def encode_jsonl_line(record: Dict[str, Any]) -> bytes:
+    """One JSONL line (compact JSON + newline) as UTF-8 bytes."""
+    if orjson is not None:
+        return orjson.dumps(record, default=_orjson_default, option=_ORJSON_OPTS | orjson.OPT_APPEND_NEWLINE)
+    return (_json_dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+
+def encode_json(obj: Any) -> bytes:
+    """Compact JSON document as UTF-8 bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_orjson_default, option=_ORJSON_OPTS)
+    return _json_dumps(obj, separators=(",", ":")).encode("utf-8")
+
+def decode_json(data: bytes) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data.decode("utf-8"))
+
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+def compress_bytes(data: bytes) -> bytes:
+    """zstd frame when zstandard is installed, zlib stream otherwise."""
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return zlib.compress(data, 6)
+
+def decompress_bytes(data: bytes) -> bytes:
+    """Inverse of compress_bytes; the codec is detected from the frame magic."""
+    if data[:4] == _ZSTD_MAGIC:
+        if zstandard is None:
+            raise RuntimeError("zstd-compressed data requires the zstandard package")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+def atomic_write_jsonl(
+    path: str, records: Iterable[Dict[str, Any]], buffering: int = 1 << 20, durable: bool = True
+) -> None:
+    """
+    Atomically write records as JSONL, encoding them straight into the temp file.
+
+    Lines stream through a buffered writer, so memory stays at one buffer
+    rather than the whole payload.
+    """
+    def write(fd: int) -> None:
+        with open(fd, "wb", buffering=buffering, closefd=False) as fh:
+            for r in records:
+                fh.write(encode_jsonl_line(r))
+
+    _atomic_write_with(path, write, durable)
 
 def read_jsonl(path: str) -> List[Dict[str, Any]]:
+    loads = orjson.loads if orjson is not None else json.loads
     out: List[Dict[str, Any]] = []
     with open(path, "rb") as f:
         for raw in f:
-            s = raw.decode("utf-8").strip()
+            s = raw.strip()
             if not s:
                 continue
-            out.append(json.loads(s))
+            out.append(loads(s))
+    return out
+
+def _columnar_pivot(records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    # Rows are grouped by shape (type + key set) so every column is dense and the
+    # original key order/presence round-trips; "order" restores the interleaving.
+    shapes: Dict[tuple, int] = {}
+    schema: List[Dict[str, Any]] = []
+    columns: List[List[List[Any]]] = []
+    order: List[int] = []
+    for rec in records:
+        key = (rec.get("type"), tuple(rec))
+        idx = shapes.get(key)
+        if idx is None:
+            idx = shapes[key] = len(schema)
+            schema.append({"type": key[0], "fields": list(key[1])})
+            columns.append([[] for _ in key[1]])
+        cols = columns[idx]
+        for col, value in zip(cols, rec.values()):
+            col.append(value)
+        order.append(idx)
+    return {"version": 1, "schema": schema, "order": order, "columns": columns}
+
+def _columnar_unpivot(doc: Dict[str, Any]) -> List[Dict[str, Any]]:
+    rows = []
+    for shape, cols in zip(doc["schema"], doc["columns"]):
+        fields = shape["fields"]
+        # iter(dict, None) keeps yielding {} for the (degenerate) empty-record shape
+        rows.append(iter([dict(zip(fields, vals)) for vals in zip(*cols)]) if fields else iter(dict, None))
+    return [next(rows[i]) for i in doc["order"]]
+
+def atomic_write_columnar(path: str, records: Iterable[Dict[str, Any]], durable: bool = True) -> None:
+    """
+    Write records as one compressed columnar document.
+
+    Field names are stored once per record shape instead of once per line,
+    which compresses far better than JSONL and loads with a single decode.
+    """
+    atomic_write_bytes(path, compress_bytes(encode_json(_columnar_pivot(records))), durable)
+
+def read_columnar(path: str) -> List[Dict[str, Any]]:
+    with open(path, "rb") as f:
+        data = f.read()
+    return _columnar_unpivot(decode_json(decompress_bytes(data)))
+
+_STOP = object()
+
+class BackgroundJsonlWriter:
+    """
+    Append-only JSONL file fed through a queue and drained by a daemon thread.
+
+    put() never touches the disk: the writer thread encodes whatever is queued
+    and issues one write() per batch into a large userspace buffer. Data is
+    pushed to the OS on flush()/close() boundaries (or when the buffer fills).
+    An existing file is appended to, or truncated first with append=False.
+    """
+
+    BATCH_MAX = 1024
+
+    def __init__(self, path: str, buffering: int = 1 << 20, append: bool = True):
+        _ensure_parent_dir(path)
+        self.path = path
+        self._fh = open(path, "ab" if append else "wb", buffering=buffering)
+        self._queue: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True, name="jsonl-writer")
+        self._thread.start()
+
+    def put(self, record: Dict[str, Any]) -> None:
+        self._queue.put(record)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything queued so far is written and flushed."""
+        if self._closed:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self) -> None:
+        """Write out the queue, close the file and stop the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self) -> None:
+        q = self._queue
+        fh = self._fh
+        while True:
+            item = q.get()
+            lines: List[bytes] = []
+            records: List[Dict[str, Any]] = []
+            barriers: List[threading.Event] = []
+            stop = False
+            while True:
+                if item is _STOP:
+                    stop = True
+                    break
+                if isinstance(item, threading.Event):
+                    barriers.append(item)
+                else:
+                    try:
+                        lines.append(encode_jsonl_line(item))
+                        records.append(item)
+                    except Exception:
+                        _log.exception("Dropping unserializable record")
+                if len(lines) >= self.BATCH_MAX:
+                    break
+                try:
+                    item = q.get_nowait()
+                except queue.Empty:
+                    break
+
+            try:
+                if lines:
+                    self._emit(lines, records)
+                if barriers or stop:
+                    self._sync()
+            except Exception:
+                # Keep the thread alive: a dead writer would hang flush() and drop records silently
+                _log.exception("JSONL append to %s failed", self.path)
+            finally:
+                for b in barriers:
+                    b.set()
+
+            if stop:
+                try:
+                    self._shutdown()
+                except Exception:
+                    _log.exception("Closing %s failed", self.path)
+                return
+
+    # Writer-thread hooks (overridden by BlockIndexedJsonlWriter)
+
+    def _emit(self, lines: List[bytes], records: List[Dict[str, Any]]) -> None:
+        self._fh.write(b"".join(lines))
+
+    def _sync(self) -> None:
+        self._fh.flush()
+
+    def _shutdown(self) -> None:
+        self._fh.close()
+
+BLOCK_INDEX_SUFFIX = ".bidx"
+# min_ts, max_ts, byte offset, compressed length, raw length
+_BLOCK_ENTRY = struct.Struct("<ddQII")
+
+BlockIndexEntry = Tuple[float, float, int, int, int]
+
+class BlockIndexedJsonlWriter(BackgroundJsonlWriter):
+    """
+    Background JSONL writer that stores the stream as compressed, seekable blocks.
+
+    Lines are gathered into blocks of ~block_size raw bytes. Each block is
+    compressed (compress_bytes) and appended to path, and a fixed 32-byte entry
+    (min_ts, max_ts, offset, comp_len, raw_len) is appended to path + ".bidx".
+    flush()/close() also cut the current partial block. read_indexed_jsonl()
+    uses the index to decompress only the blocks overlapping a time range.
+    """
+
+    def __init__(self, path: str, block_size: int = 1 << 20, ts_key: str = "ts", append: bool = True):
+        if block_size <= 0:
+            raise ValueError("block_size must be positive")
+        _ensure_parent_dir(path)
+        self.index_path = path + BLOCK_INDEX_SUFFIX
+        self.block_size = block_size
+        self._ts_key = ts_key
+        self._offset = os.path.getsize(path) if append and os.path.exists(path) else 0
+        self._idx = open(self.index_path, "ab" if append else "wb")
+        self._pending: List[bytes] = []
+        self._pending_len = 0
+        self._min_ts = math.inf
+        self._max_ts = -math.inf
+        super().__init__(path, append=append)
+
+    def _emit(self, lines: List[bytes], records: List[Dict[str, Any]]) -> None:
+        ts_key = self._ts_key
+        for line, rec in zip(lines, records):
+            try:
+                ts = float(rec.get(ts_key, 0.0))
+            except (TypeError, ValueError):
+                ts = math.nan
+            if not math.isfinite(ts):
+                _log.error("Dropping record with invalid %r: %r", ts_key, rec.get(ts_key))
+                continue
+            if ts < self._min_ts:
+                self._min_ts = ts
+            if ts > self._max_ts:
+                self._max_ts = ts
+            self._pending.append(line)
+            self._pending_len += len(line)
+            if self._pending_len >= self.block_size:
+                self._write_block()
+
+    def _write_block(self) -> None:
+        if not self._pending:
+            return
+        raw = b"".join(self._pending)
+        comp = compress_bytes(raw)
+        self._fh.write(comp)
+        self._idx.write(_BLOCK_ENTRY.pack(self._min_ts, self._max_ts, self._offset, len(comp), len(raw)))
+        self._offset += len(comp)
+        self._pending = []
+        self._pending_len = 0
+        self._min_ts = math.inf
+        self._max_ts = -math.inf
+
+    def _sync(self) -> None:
+        self._write_block()
+        self._fh.flush()  # data before index: an index entry never points past the data
+        self._idx.flush()
+
+    def _shutdown(self) -> None:
+        try:
+            self._sync()
+        finally:
+            self._fh.close()
+            self._idx.close()
+
+def read_block_index(index_path: str) -> List[BlockIndexEntry]:
+    """Entries of a .bidx file; a torn trailing entry (crash mid-write) is ignored."""
+    with open(index_path, "rb") as f:
+        data = f.read()
+    usable = len(data) - len(data) % _BLOCK_ENTRY.size
+    return list(_BLOCK_ENTRY.iter_unpack(data[:usable]))
+
+def read_indexed_jsonl(
+    path: str,
+    t0: Optional[float] = None,
+    t1: Optional[float] = None,
+    ts_key: str = "ts",
+) -> List[Dict[str, Any]]:
+    """
+    Records of a BlockIndexedJsonlWriter file with t0 <= ts <= t1 (bounds optional).
+
+    Only blocks whose [min_ts, max_ts] overlaps the range are read and decompressed.
+    """
+    lo = -math.inf if t0 is None else t0
+    hi = math.inf if t1 is None else t1
+    loads = orjson.loads if orjson is not None else json.loads
+    out: List[Dict[str, Any]] = []
+    with open(path, "rb") as f:
+        for min_ts, max_ts, offset, comp_len, _raw_len in read_block_index(path + BLOCK_INDEX_SUFFIX):
+            if max_ts < lo or min_ts > hi:
+                continue
+            f.seek(offset)
+            for line in decompress_bytes(f.read(comp_len)).splitlines():
+                if not line:
+                    continue
+                rec = loads(line)
+                if lo <= rec.get(ts_key, 0.0) <= hi:
+                    out.append(rec)
     return out
+
@@ -0,0 +1,71 @@
+# infrastructure/ring_buffer.py
+from __future__ import annotations
+
+from typing import Generic, Iterator, List, Optional, Tuple, TypeVar, overload
+
+T = TypeVar("T")
+
+
+class RingBuffer(Generic[T]):
+    """
+    Fixed-capacity FIFO log backed by a preallocated list.
+
+    Appends overwrite the oldest entry once full (like deque(maxlen=...)).
+    view() returns the contents oldest-first as a tuple that is cached until
+    the next append, so repeated readers between appends share one copy.
+    """
+
+    __slots__ = ("_buf", "_head", "_size", "_view")
+
+    def __init__(self, maxlen: int):
+        if maxlen <= 0:
+            raise ValueError("maxlen must be positive")
+        self._buf: List[Optional[T]] = [None] * maxlen
+        self._head = 0  # next write slot (== oldest entry once full)
+        self._size = 0
+        self._view: Optional[Tuple[T, ...]] = ()
+
+    @property
+    def maxlen(self) -> int:
+        return len(self._buf)
+
+    def append(self, item: T) -> None:
+        buf = self._buf
+        buf[self._head] = item
+        self._head = (self._head + 1) % len(buf)
+        if self._size < len(buf):
+            self._size += 1
+        self._view = None
+
+    def clear(self) -> None:
+        self._buf = [None] * len(self._buf)
+        self._head = 0
+        self._size = 0
+        self._view = ()
+
+    def view(self) -> Tuple[T, ...]:
+        """Contents oldest-first (immutable, shared until the next append)."""
+        if self._view is None:
+            if self._size < len(self._buf):
+                self._view = tuple(self._buf[: self._size])  # type: ignore[arg-type]
+            else:
+                self._view = tuple(self._buf[self._head :] + self._buf[: self._head])  # type: ignore[arg-type]
+        return self._view
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self.view())
+
+    @overload
+    def __getitem__(self, index: int) -> T: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Tuple[T, ...]: ...
+
+    def __getitem__(self, index):
+        return self.view()[index]
+
+    def __repr__(self) -> str:
+        return f"RingBuffer({list(self.view())!r}, maxlen={len(self._buf)})"
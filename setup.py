@@ -22,17 +22,22 @@ setup(
         "Intended Audience :: Education",
         "Topic :: Office/Business :: Financial",
         "License :: OSI Approved :: MIT License",
-        "Programming Language :: Python :: 3.9",
         "Programming Language :: Python :: 3.10",
         "Programming Language :: Python :: 3.11",
     ],
-    python_requires=">=3.9",
+    python_requires=">=3.10",
     install_requires=[
         "numpy>=1.24.0",
+        "sortedcontainers>=2.4.0",
         "PyQt6>=6.5.0",
         "pyqtgraph>=0.13.0",
     ],
     extras_require={
+        "perf": [
+            "numba>=0.57.0",
+            "orjson>=3.8.0",
+            "zstandard>=0.21.0",
+        ],
         "dev": [
             "pytest>=7.4.0",
             "pytest-cov>=4.1.0",
@@ -0,0 +1,114 @@
+"""
+Analytics engine tests.
+
+Coverage:
+- Risk-adjusted returns (volatility, Sharpe, Sortino, max drawdown)
+- Execution quality (VWAP, edge, adverse fill rate)
+- Report assembly
+"""
+import pytest
+import time
+import numpy as np
+from engine.trader import Trader, Fill, TradeSide
+from application.analytics_engine import AnalyticsEngine, _risk_stats, _risk_stats_numpy
+
+
+class TestRiskAdjustedReturns:
+    """Test risk-adjusted return metrics."""
+
+    def test_no_fills_all_zero(self):
+        """Trader without fills reports zeroed metrics."""
+        metrics = AnalyticsEngine.calculate_risk_adjusted_returns(Trader("t1"), current_price=100.0)
+
+        assert metrics['sharpe_ratio'] == 0.0
+        assert metrics['max_drawdown'] == 0.0
+        assert metrics['volatility'] == 0.0
+
+    def test_max_drawdown_peak_to_trough(self):
+        """Max drawdown is the largest fall of the cumulative P&L curve."""
+        trader = Trader("t1")
+
+        # Contributions at settlement 100: +10, -4, -3, +1  -> curve 10, 6, 3, 4
+        trader.apply_fill(Fill(90.0, 1, TradeSide.BUY, time.time()))
+        trader.apply_fill(Fill(104.0, 1, TradeSide.BUY, time.time()))
+        trader.apply_fill(Fill(97.0, 1, TradeSide.SELL, time.time()))
+        trader.apply_fill(Fill(101.0, 1, TradeSide.SELL, time.time()))
+
+        metrics = AnalyticsEngine.calculate_risk_adjusted_returns(trader, current_price=100.0)
+
+        assert metrics['max_drawdown'] == pytest.approx(7.0)  # 10 -> 3
+
+    def test_volatility_and_ratios(self):
+        """Volatility, Sharpe and Sortino use fill-to-fill returns."""
+        trader = Trader("t1")
+
+        # Contributions at settlement 100: +2, +4, -2  -> returns [4, -2]
+        trader.apply_fill(Fill(98.0, 1, TradeSide.BUY, time.time()))
+        trader.apply_fill(Fill(96.0, 1, TradeSide.BUY, time.time()))
+        trader.apply_fill(Fill(98.0, 1, TradeSide.SELL, time.time()))
+
+        metrics = AnalyticsEngine.calculate_risk_adjusted_returns(trader, current_price=100.0)
+
+        assert metrics['volatility'] == pytest.approx(3.0)
+        assert metrics['sharpe_ratio'] == pytest.approx(1.0 / 3.0)
+        assert metrics['sortino_ratio'] == pytest.approx(0.5)
+        assert isinstance(metrics['max_drawdown'], float)
+
+    @pytest.mark.parametrize("n", [1, 2, 7, 500])
+    def test_kernel_matches_numpy_reference(self, n):
+        """Fused risk kernel agrees with the NumPy reference path."""
+        contribs = np.random.default_rng(n).normal(size=n)
+
+        fused = _risk_stats(contribs)
+        reference = _risk_stats_numpy(contribs)
+
+        assert fused[3] == reference[3]
+        assert fused == pytest.approx(reference)
+
+
+class TestExecutionQuality:
+    """Test execution quality metrics."""
+
+    def test_adverse_fill_rate(self):
+        """Losing fills at settlement count as adverse."""
+        trader = Trader("t1")
+        trader.apply_fill(Fill(95.0, 1, TradeSide.BUY, time.time()))   # +5
+        trader.apply_fill(Fill(105.0, 1, TradeSide.BUY, time.time()))  # -5
+        trader.apply_fill(Fill(110.0, 2, TradeSide.SELL, time.time())) # +20
+        trader.apply_fill(Fill(90.0, 1, TradeSide.SELL, time.time()))  # -10
+
+        quality = AnalyticsEngine.calculate_execution_quality(trader, settlement=100.0)
+
+        assert quality['total_trades'] == 4
+        assert quality['adverse_fill_rate'] == pytest.approx(50.0)
+        assert quality['avg_edge'] == pytest.approx(10.0 / 4)
+
+    def test_vectorized_edge_matches_fill_contributions(self):
+        """Edge and adverse count agree with Fill.pnl_contribution (fees excluded)."""
+        trader = Trader("t1")
+        rng = np.random.default_rng(7)
+        for _ in range(200):
+            side = TradeSide.BUY if rng.random() < 0.5 else TradeSide.SELL
+            price = round(float(rng.uniform(90.0, 110.0)), 1)
+            trader.apply_fill(Fill(price, int(rng.integers(1, 5)), side, time.time(), fee=0.05))
+
+        quality = AnalyticsEngine.calculate_execution_quality(trader, settlement=100.0)
+
+        contribs = [f.pnl_contribution(100.0) for f in trader.fills]
+        assert quality['avg_edge'] == pytest.approx(sum(contribs) / len(contribs))
+        assert quality['adverse_fill_rate'] == pytest.approx(100.0 * sum(c < 0 for c in contribs) / len(contribs))
+
+
+class TestPerformanceReport:
+    """Test report assembly."""
+
+    def test_report_sections(self):
+        """Report contains every analytics section."""
+        trader = Trader("t1")
+        trader.apply_fill(Fill(100.0, 1, TradeSide.BUY, time.time(), fee=0.1))
+
+        report = AnalyticsEngine.generate_performance_report(trader, settlement=102.0)
+
+        assert set(report) == {'pnl', 'execution', 'risk_adjusted', 'summary'}
+        assert report['pnl']['fees_paid'] == pytest.approx(0.1)
+        assert report['summary']['total_fills'] == 1
@@ -3,395 +3,251 @@ Bot strategy tests.
 
 Critical tests:
 1. Strategies produce valid quotes
-2. Inventory management works (positions mean-revert)
-3. Adverse selection detection works
-4. Latency simulation works
-5. Position limits respected
+2. Same seed => same order flow (Philox-batched uniforms)
+3. Quote refresh keeps an unchanged side in place and replaces the other
+4. Replaced quote orders go back to the Order pool and are reused
+5. push_trade() keeps the same order-flow imbalance as a tape
+6. Position limits respected
 """
+import random
 import pytest
-import time
-from engine.order_book import OrderBook
+from engine.order_book import OrderBook, _ORDER_POOL
 from engine.trader import Trader
 from engine.bot_strategies import (
     BotManager,
-    MarketMakingStrategy,
-    MomentumStrategy,
-    ArbitrageStrategy,
-    AggressiveHFTStrategy
+    BotConfig,
+    HFTMarketMaker,
+    Arbitrageur,
+    NoiseTrader,
+    TradePrint,
+    FLOW_WINDOW,
+    _signed_flow,
 )
 from infrastructure.config import DifficultyConfig
 
 
-class TestMarketMakingStrategy:
-    """Test Avellaneda-Stoikov market making."""
-    
-    def test_quotes_around_fair_value(self):
-        """Market maker quotes around fair value."""
-        strategy = MarketMakingStrategy(risk_aversion=0.5)
-        
-        bid, ask = strategy.calculate_quotes(
-            fair_value=100.0,
-            volatility=1.0,
-            current_position=0,
-            position_limit=10,
-            uncertainty=5.0
-        )
-        
-        assert bid is not None
-        assert ask is not None
-        assert bid < 100.0 < ask  # Quotes straddle FV
-    
-    def test_inventory_skewing(self):
-        """Long position → lower quotes (incentivize selling)."""
-        strategy = MarketMakingStrategy(risk_aversion=0.5, inventory_penalty=1.0)
-        
-        # Flat position
-        bid_flat, ask_flat = strategy.calculate_quotes(
-            fair_value=100.0,
-            volatility=1.0,
-            current_position=0,
-            position_limit=10,
-            uncertainty=5.0
-        )
-        
-        # Long position
-        bid_long, ask_long = strategy.calculate_quotes(
-            fair_value=100.0,
-            volatility=1.0,
-            current_position=5,
-            position_limit=10,
-            uncertainty=5.0
+MM = "MM_Citadel_1"
+
+
+def _run(mgr, book, traders, ticks, start=1.0, step=0.05):
+    """Drive update_quotes over a deterministic fair-value path; returns IOC counts per tick."""
+    iocs = []
+    for i in range(ticks):
+        fv = 100.0 + 0.3 * ((i % 7) - 3)
+        ids = mgr.update_quotes(
+            book=book, traders=traders, fair_value=fv, volatility=1.0, user_toxicity=0.0, now=start + step * i
         )
-        
-        # Long quotes should be lower (skewed down)
+        iocs.append(len(ids))
+    return iocs
+
+
+def _snapshot(book, names):
+    """Resting orders without their (process-global) order ids."""
+    return [
+        (o.trader_id, o.side, o.price, o.quantity, o.timestamp)
+        for name in names
+        for o in book.get_orders_by_trader(name)
+    ]
+
+
+class TestStrategies:
+    """Quote pricing of the individual archetypes."""
+
+    def setup_method(self):
+        cfg = BotConfig(name="mm", bot_type="hft_mm", base_latency=0.1, inventory_skew=1.1, risk_aversion=0.7)
+        self.mm = HFTMarketMaker(cfg, rng=random.Random(1))
+
+    def test_mm_quotes_straddle_fair_value(self):
+        """Flat market maker quotes around fair value."""
+        bid, ask = self.mm._price(0.1, Trader("mm"), 100.0, 1.0, 0.0, 2)
+
+        assert bid < 100.0 < ask
+
+    def test_mm_inventory_skew(self):
+        """Long inventory => quotes skewed lower."""
+        flat = Trader("mm")
+        long = Trader("mm")
+        long._position = 2
+
+        bid_flat, ask_flat = self.mm._price(0.1, flat, 100.0, 1.0, 0.0, 2)
+        bid_long, ask_long = self.mm._price(0.1, long, 100.0, 1.0, 0.0, 2)
+
         assert bid_long < bid_flat
         assert ask_long < ask_flat
-    
-    def test_wider_spread_with_uncertainty(self):
-        """Higher uncertainty → wider spread."""
-        strategy = MarketMakingStrategy(risk_aversion=0.5)
-        
-        # Low uncertainty
-        bid_low, ask_low = strategy.calculate_quotes(
-            fair_value=100.0,
-            volatility=1.0,
-            current_position=0,
-            position_limit=10,
-            uncertainty=1.0
-        )
-        
-        # High uncertainty
-        bid_high, ask_high = strategy.calculate_quotes(
-            fair_value=100.0,
-            volatility=1.0,
-            current_position=0,
-            position_limit=10,
-            uncertainty=10.0
-        )
-        
-        spread_low = ask_low - bid_low
-        spread_high = ask_high - bid_high
-        
-        assert spread_high > spread_low
-    
-    def test_no_bid_at_position_limit(self):
-        """At max long, don't post bids."""
-        strategy = MarketMakingStrategy()
-        
-        bid, ask = strategy.calculate_quotes(
-            fair_value=100.0,
-            volatility=1.0,
-            current_position=10,  # At limit
-            position_limit=10,
-            uncertainty=5.0
-        )
-        
-        assert bid is None  # Can't buy more
-        assert ask is not None  # Can still sell
-
-
-class TestMomentumStrategy:
-    """Test trend-following strategy."""
-    
-    def test_uptrend_bias(self):
-        """Uptrend → quotes biased higher."""
-        strategy = MomentumStrategy()
-        
-        # Simulate uptrend (rising prices)
-        for price in [100, 101, 102, 103, 104]:
-            bid, ask = strategy.calculate_quotes(
-                fair_value=price,
-                volatility=1.0,
-                current_position=0,
-                position_limit=10
-            )
-        
-        # Final quotes should be biased above fair value
-        final_bid, final_ask = strategy.calculate_quotes(
-            fair_value=105.0,
-            volatility=1.0,
-            current_position=0,
-            position_limit=10
-        )
-        
-        mid = (final_bid + final_ask) / 2.0
-        assert mid > 105.0  # Biased above FV due to uptrend
-    
-    def test_downtrend_bias(self):
-        """Downtrend → quotes biased lower."""
-        strategy = MomentumStrategy()
-        
-        # Simulate downtrend
-        for price in [100, 99, 98, 97, 96]:
-            bid, ask = strategy.calculate_quotes(
-                fair_value=price,
-                volatility=1.0,
-                current_position=0,
-                position_limit=10
-            )
-        
-        # Final quotes should be biased below fair value
-        final_bid, final_ask = strategy.calculate_quotes(
-            fair_value=95.0,
-            volatility=1.0,
-            current_position=0,
-            position_limit=10
-        )
-        
-        mid = (final_bid + final_ask) / 2.0
-        assert mid < 95.0  # Biased below FV
-
-
-class TestArbitrageStrategy:
-    """Test stat arb strategy."""
-    
-    def test_buy_when_undervalued(self):
-        """Buy aggressively when market < FV."""
-        strategy = ArbitrageStrategy()
-        
-        # Market ask below fair value (undervalued)
-        bid, ask = strategy.calculate_quotes(
-            fair_value=100.0,
-            best_bid=98.0,
-            best_ask=98.5,  # Below FV - 0.5 threshold
-            current_position=0,
-            position_limit=10
-        )
-        
-        # Should lift the offer
-        assert bid == 98.5
-        assert ask is None
-    
-    def test_sell_when_overvalued(self):
-        """Sell aggressively when market > FV."""
-        strategy = ArbitrageStrategy()
-        
-        # Market bid above fair value (overvalued)
-        bid, ask = strategy.calculate_quotes(
-            fair_value=100.0,
-            best_bid=101.0,  # Above FV + 0.5 threshold
-            best_ask=101.5,
-            current_position=0,
-            position_limit=10
-        )
-        
-        # Should hit the bid
-        assert bid is None
-        assert ask == 101.0
-    
-    def test_exit_near_fair_value(self):
-        """Exit position when market near fair value."""
-        strategy = ArbitrageStrategy()
-        
-        # Has long position, market near FV
-        bid, ask = strategy.calculate_quotes(
-            fair_value=100.0,
-            best_bid=99.9,
-            best_ask=100.1,
-            current_position=5,  # Long
-            position_limit=10
-        )
-        
-        # Should sell to exit
-        assert ask is not None
-        assert ask < 100.0  # Aggressive sell
-
-
-class TestAggressiveHFTStrategy:
-    """Test HFT strategy with toxicity detection."""
-    
-    def test_widen_spread_with_toxicity(self):
-        """High toxicity → wider spread."""
-        strategy = AggressiveHFTStrategy(toxicity_sensitivity=1.0)
-        
-        # Low toxicity
-        bid_low, ask_low = strategy.calculate_quotes(
-            fair_value=100.0,
-            volatility=1.0,
-            user_toxicity=0.0,
-            current_position=0,
-            position_limit=10,
-            best_bid=99.0,
-            best_ask=101.0
-        )
-        
-        # High toxicity
-        bid_high, ask_high = strategy.calculate_quotes(
-            fair_value=100.0,
-            volatility=1.0,
-            user_toxicity=3.0,  # User is informed
-            current_position=0,
-            position_limit=10,
-            best_bid=99.0,
-            best_ask=101.0
-        )
-        
-        if bid_low and ask_low and bid_high and ask_high:
-            spread_low = ask_low - bid_low
-            spread_high = ask_high - bid_high
-            assert spread_high >= spread_low
-    
-    def test_pull_quotes_extreme_toxicity(self):
-        """Very high toxicity → sometimes pull quotes."""
-        strategy = AggressiveHFTStrategy(toxicity_sensitivity=1.5)
-        
-        pulls = 0
-        attempts = 50
-        
-        for _ in range(attempts):
-            bid, ask = strategy.calculate_quotes(
-                fair_value=100.0,
-                volatility=1.0,
-                user_toxicity=5.0,  # Extremely toxic
-                current_position=0,
-                position_limit=10,
-                best_bid=99.0,
-                best_ask=101.0
-            )
-            
-            if bid is None and ask is None:
-                pulls += 1
-        
-        # Should pull at least sometimes (probabilistic)
-        assert pulls > 0
+
+    def test_mm_widens_with_toxicity(self):
+        """Higher user toxicity => wider spread."""
+        bid_low, ask_low = self.mm._price(0.1, Trader("mm"), 100.0, 1.0, 0.0, 2)
+        bid_high, ask_high = self.mm._price(0.1, Trader("mm"), 100.0, 1.0, 3.0, 2)
+
+        assert ask_high - bid_high > ask_low - bid_low
+
+    def test_cohort_prices_are_on_tick(self):
+        """Arbitrage / noise cohort quotes are snapped to the tick and straddle FV."""
+        for bid, ask in (Arbitrageur.price(0.1, 100.03, 1.0), NoiseTrader.price(0.1, 100.03, 1.0)):
+            assert bid < 100.03 < ask
+            assert round(bid * 10) == pytest.approx(bid * 10)
+            assert round(ask * 10) == pytest.approx(ask * 10)
 
 
 class TestBotManager:
-    """Test bot manager integration."""
-    
+    """Roster, determinism and quote lifecycle."""
+
     def setup_method(self):
-        """Setup for each test."""
         self.config = DifficultyConfig.MEDIUM()
-        self.bot_manager = BotManager(self.config)
-        self.book = OrderBook(quote_lifetime=5.0)
-        
-        # Create traders
-        self.traders = {}
-        for bot_name in self.bot_manager.get_bot_names():
-            self.traders[bot_name] = Trader(bot_name, is_bot=True)
-    
-    def test_all_bots_created(self):
-        """All expected bots created."""
-        bot_names = self.bot_manager.get_bot_names()
-        
-        assert "HFT_Shark" in bot_names
-        assert "MMaker_Citadel" in bot_names
-        assert "FOMO_Retail" in bot_names
-        assert "Arb_Fund" in bot_names
-    
+        self.mgr = BotManager(self.config, seed=7)
+        self.book = OrderBook(quote_lifetime=0.0)
+        self.traders = {name: Trader(name, is_bot=True) for name in self.mgr.get_bot_names()}
+        self.mgr.initialize_bots(self.traders)
+
+    def test_roster(self):
+        """MEDIUM builds 3 market makers, 3 momentum, 2 arbitrage and 8 retail bots."""
+        names = self.mgr.get_bot_names()
+
+        assert sum(n.startswith("MM_Citadel_") for n in names) == 3
+        assert sum(n.startswith("Mom_Trend_") for n in names) == 3
+        assert sum(n.startswith("Arb_Vulture_") for n in names) == 2
+        assert sum(n.startswith("Retail_") for n in names) == 8
+
     def test_bots_post_quotes(self):
-        """Bots post quotes to book."""
-        # Run bot update multiple times (probabilistic participation)
-        for _ in range(20):
-            self.bot_manager.update_quotes(
-                book=self.book,
-                traders=self.traders,
-                fair_value=100.0,
-                volatility=1.0,
-                user_toxicity=0.0
-            )
-        
-        # Should have some quotes
+        """Bots post two-sided liquidity."""
+        _run(self.mgr, self.book, self.traders, 20)
+
         bb, ba = self.book.get_best_bid_ask()
-        assert bb is not None or ba is not None
-    
-    def test_latency_affects_participation(self):
-        """Higher latency = fewer quotes."""
-        # Fast bots (low latency)
-        fast_config = DifficultyConfig.AXXELA()
-        fast_mgr = BotManager(fast_config)
-        fast_book = OrderBook()
-        fast_traders = {name: Trader(name, True) for name in fast_mgr.get_bot_names()}
-        
-        # Slow bots (high latency)
-        slow_config = DifficultyConfig.EASY()
-        slow_mgr = BotManager(slow_config)
-        slow_book = OrderBook()
-        slow_traders = {name: Trader(name, True) for name in slow_mgr.get_bot_names()}
-        
-        # Run same number of ticks
-        for _ in range(50):
-            fast_mgr.update_quotes(fast_book, fast_traders, 100.0, 1.0, 0.0)
-            slow_mgr.update_quotes(slow_book, slow_traders, 100.0, 1.0, 0.0)
-        
-        # Fast bots should have more depth
-        fast_depth = len(fast_book.bids) + len(fast_book.asks)
-        slow_depth = len(slow_book.bids) + len(slow_book.asks)
-        
-        assert fast_depth >= slow_depth
-    
+        assert bb is not None and ba is not None
+
+    def test_same_seed_same_orders(self):
+        """Two managers with the same seed produce identical order flow."""
+        other = BotManager(self.config, seed=7)
+        other_book = OrderBook(quote_lifetime=0.0)
+        other_traders = {name: Trader(name, is_bot=True) for name in other.get_bot_names()}
+        other.initialize_bots(other_traders)
+        names = self.mgr.get_bot_names()
+
+        iocs = _run(self.mgr, self.book, self.traders, 60)
+        other_iocs = _run(other, other_book, other_traders, 60)
+
+        assert iocs == other_iocs
+        assert _snapshot(self.book, names) == _snapshot(other_book, names)
+
+    def test_different_seed_differs(self):
+        """The seed actually drives the per-tick uniforms."""
+        other = BotManager(self.config, seed=8)
+        other_book = OrderBook(quote_lifetime=0.0)
+        other_traders = {name: Trader(name, is_bot=True) for name in other.get_bot_names()}
+        names = self.mgr.get_bot_names()
+
+        _run(self.mgr, self.book, self.traders, 60)
+        _run(other, other_book, other_traders, 60)
+
+        assert _snapshot(self.book, names) != _snapshot(other_book, names)
+
     def test_bots_respect_position_limits(self):
-        """Bots don't post quotes at position limits."""
-        # Put bot at max position
-        bot_name = "MMaker_Citadel"
-        self.traders[bot_name]._position = self.config.position_limit
-        
-        # Update quotes
-        for _ in range(10):
-            self.bot_manager.update_quotes(
-                self.book,
-                self.traders,
-                fair_value=100.0,
-                volatility=1.0,
-                user_toxicity=0.0
-            )
-        
-        # Bot shouldn't post buy orders
-        for price, queue in self.book.bids.items():
-            for order in queue:
-                assert order.trader_id != bot_name
-    
-    def test_toxicity_causes_quote_pulling(self):
-        """High user toxicity → bots pull quotes."""
-        # Low toxicity run
-        low_tox_book = OrderBook()
-        low_traders = {name: Trader(name, True) for name in self.bot_manager.get_bot_names()}
-        
-        for _ in range(30):
-            self.bot_manager.update_quotes(
-                low_tox_book,
-                low_traders,
-                fair_value=100.0,
-                volatility=1.0,
-                user_toxicity=0.0  # Not toxic
-            )
-        
-        # High toxicity run
-        high_tox_book = OrderBook()
-        high_traders = {name: Trader(name, True) for name in self.bot_manager.get_bot_names()}
-        
-        for _ in range(30):
-            self.bot_manager.update_quotes(
-                high_tox_book,
-                high_traders,
-                fair_value=100.0,
-                volatility=1.0,
-                user_toxicity=5.0  # Very toxic
-            )
-        
-        # High toxicity should have less liquidity
-        low_depth = len(low_tox_book.bids) + len(low_tox_book.asks)
-        high_depth = len(high_tox_book.bids) + len(high_tox_book.asks)
-        
-        # Might be same due to randomness, but shouldn't be much more
-        assert high_depth <= low_depth * 1.5
+        """A bot at its long limit posts no bids."""
+        self.traders[MM]._position = self.config.position_limit
+
+        _run(self.mgr, self.book, self.traders, 20)
+
+        assert all(o.side != "buy" for o in self.book.get_orders_by_trader(MM))
+
+    def test_replaced_trader_is_rebound(self):
+        """Swapping a Trader in the same dict (same size) is picked up on the next tick."""
+        _run(self.mgr, self.book, self.traders, 5)
+        replacement = Trader(MM, is_bot=True)
+        replacement._position = self.config.position_limit
+        self.traders[MM] = replacement
+
+        bound = {entry[1]: entry[3] for entry in self.mgr._bind_traders(self.traders)}
+
+        assert bound[MM] is replacement
+
+    def test_added_trader_is_bound(self):
+        """A bot whose Trader appears after initialize_bots starts quoting."""
+        traders = {name: t for name, t in self.traders.items() if name != MM}
+        self.mgr.initialize_bots(traders)
+        _run(self.mgr, self.book, traders, 5)
+        assert self.book.get_orders_by_trader(MM) == []
+
+        del traders[next(iter(traders))]
+        traders[MM] = self.traders[MM]
+        _run(self.mgr, self.book, traders, 5, start=2.0)
+
+        assert self.book.get_orders_by_trader(MM)
+
+
+class TestQuoteRefresh:
+    """Cancel/replace of a single market maker's resting quotes."""
+
+    def setup_method(self):
+        self.config = DifficultyConfig.MEDIUM()
+        self.mgr = BotManager(self.config, seed=3)
+        self.book = OrderBook(quote_lifetime=0.0)
+        # Bind only one market maker so every order in the book is its quote
+        self.trader = Trader(MM, is_bot=True)
+        self.traders = {MM: self.trader}
+        self.mgr.initialize_bots(self.traders)
+        self.state = self.mgr._bots[MM].state
+
+    def _tick(self, now):
+        self.mgr.update_quotes(
+            book=self.book, traders=self.traders, fair_value=100.0, volatility=0.25, user_toxicity=0.0, now=now
+        )
+
+    def test_unchanged_side_kept_other_side_canceled(self):
+        """Hitting the long limit pulls the bid; the unchanged ask keeps its order and queue place."""
+        self._tick(1.0)
+        bid_order, ask_order = self.state.bid_order, self.state.ask_order
+        ask_id = ask_order.order_id
+        assert bid_order is not None and ask_order is not None
+
+        self.trader._position = self.config.position_limit
+        self._tick(2.0)
+
+        assert self.state.bid_order is None
+        assert self.state.ask_order is ask_order
+        assert ask_order.order_id == ask_id
+        assert self.book.is_resting(ask_order)
+        assert not self.book.is_resting(bid_order)
+        assert [o.side for o in self.book.get_orders_by_trader(MM)] == ["sell"]
+
+    def test_replaced_order_released_and_reused(self):
+        """The pulled bid goes back to the Order pool and backs the next bid quote."""
+        self._tick(1.0)
+        bid_order = self.state.bid_order
+        old_id = bid_order.order_id
+
+        self.trader._position = self.config.position_limit
+        self._tick(2.0)
+        assert any(o is bid_order for o in _ORDER_POOL)
+
+        self.trader._position = 0
+        self._tick(3.0)
+
+        assert self.state.bid_order is bid_order
+        assert bid_order.order_id != old_id
+        assert self.book.is_resting(bid_order)
+        assert not any(o is bid_order for o in _ORDER_POOL)
+
+
+class TestTradeFlow:
+    """push_trade() ring vs the tape-based imbalance."""
+
+    def test_push_trade_matches_tape(self):
+        """The running sum equals _signed_flow over the same prints, across ring wrap-around."""
+        mgr = BotManager(DifficultyConfig.MEDIUM(), seed=1)
+        tape = []
+        for i in range(3 * FLOW_WINDOW + 5):
+            qty = 1 + i % 4
+            side = "buy" if (i * 7) % 3 else "sell"
+            mgr.push_trade(qty, side)
+            tape.append(TradePrint(float(i), 100.0, qty, side))
+
+            assert mgr._flow_sum == _signed_flow(tape)
+
+    def test_signed_flow_window(self):
+        """Only the last FLOW_WINDOW prints count."""
+        tape = [TradePrint(0.0, 100.0, 5, "sell")] + [
+            TradePrint(float(i), 100.0, 1, "buy") for i in range(FLOW_WINDOW)
+        ]
+
+        assert _signed_flow(tape) == FLOW_WINDOW
@@ -0,0 +1,74 @@
+"""
+Market simulator tests.
+
+Coverage:
+- Clock domains: orders/matches run on time.monotonic(), while fills,
+  risk events and market events are stamped wall-clock (time.time())
+"""
+import time
+
+from infrastructure.config import DifficultyConfig
+from application.market_simulator import MarketSimulator, EventType
+
+
+class TestClockDomains:
+    """Test which clock each recorded timestamp uses."""
+
+    def setup_method(self):
+        self.sim = MarketSimulator(DifficultyConfig.MEDIUM(), seed=5)
+
+    def teardown_method(self):
+        self.sim.close(timeout=5.0)
+
+    def _trade(self):
+        """Let the bots quote, then lift the best offer once."""
+        self.sim.start_round(1)
+        for _ in range(50):
+            self.sim.tick()
+            _, ask = self.sim.book.get_best_bid_ask()
+            if ask is not None:
+                break
+        assert ask is not None
+        fills_before = self.sim.user.num_fills
+        assert self.sim.aggress_buy(ask, 1)
+        assert self.sim.user.num_fills > fills_before
+
+    def test_fill_and_trade_event_share_wall_clock(self):
+        """A user fill carries the same wall-clock time as its TRADE_EXECUTED event."""
+        wall_before = time.time()
+        self._trade()
+        wall_after = time.time()
+
+        fill = self.sim.user.fills[-1]
+        trades = [ev for ev in self.sim.events if ev.event_type == EventType.TRADE_EXECUTED]
+
+        assert wall_before <= fill.timestamp <= wall_after
+        assert trades[-1].timestamp == fill.timestamp
+
+    def test_orders_stay_monotonic(self):
+        """Resting orders are stamped with the monotonic clock used for expiry."""
+        mono_before = time.monotonic()
+        self.sim.start_round(1)
+        self.sim.tick()
+        mono_after = time.monotonic()
+
+        orders = [o for name in self.sim.traders for o in self.sim.book.get_orders_by_trader(name)]
+
+        assert orders
+        assert all(mono_before <= o.timestamp <= mono_after for o in orders)
+
+    def test_margin_call_risk_event_is_wall_clock(self):
+        """Liquidation audit events line up with the wall-clock market events."""
+        self.sim.start_round(1)
+        self.sim.user._cash = -10_000.0
+        self.sim._sync_trader_state("YOU")
+        wall_before = time.time()
+        self.sim.tick()
+        wall_after = time.time()
+
+        risk = [ev for ev in self.sim.risk_manager.risk_events if ev.trader_id == "YOU"]
+        calls = [ev for ev in self.sim.events if ev.event_type == EventType.MARGIN_CALL]
+
+        assert risk and calls
+        assert wall_before <= risk[-1].timestamp <= wall_after
+        assert risk[-1].timestamp == calls[-1].timestamp
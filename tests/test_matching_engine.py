@@ -2,6 +2,7 @@
 Unit tests for matching engine.
 Critical: Ensures price-time priority and deterministic execution.
 """
+import dataclasses
 import pytest
 import time
 from engine.order_book import OrderBook, Order
@@ -120,3 +121,31 @@ class TestMatchingEngine:
         assert matches[0].taker_id == "taker"  # Newer order is taker
         assert matches[0].buyer_id == "taker"
         assert matches[0].seller_id == "maker"
+    
+    def test_batch_listener_gets_one_call_per_match_run(self):
+        """Batch listeners see every match of a run at once; per-event listeners still see each."""
+        batches = []
+        self.engine.subscribe_to_matches_batch(batches.append)
+        t0 = time.time()
+        self.book.add_order(Order("s1", "sell", 100.0, 1, t0))
+        self.book.add_order(Order("s2", "sell", 101.0, 1, t0 + 0.001))
+        self.book.add_order(Order("b1", "buy", 101.0, 2, t0 + 0.002))
+        
+        matches = self.engine.match_orders(time.time())
+        self.engine.match_orders(time.time())  # nothing crosses: no batch
+        
+        assert len(batches) == 1
+        assert batches[0] == matches
+        assert self.matched_events == matches
+
+    def test_emitted_events_are_frozen_dataclasses(self):
+        """Matcher-built events equal constructor-built ones and stay immutable."""
+        t0 = time.time()
+        self.book.add_order(Order("trader1", "buy", 100.0, 2, t0))
+        self.book.add_order(Order("trader2", "sell", 100.0, 2, t0 + 0.001))
+        
+        event = self.engine.match_orders(t0 + 0.002)[0]
+        
+        assert event == MatchEvent("trader1", "trader2", 100.0, 2, "trader2", t0 + 0.002, event.match_id)
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            event.price = 1.0
@@ -284,6 +284,19 @@ class TestMatchingEngineEdgeCases:
         assert len(matches) == 1
         assert matches[0].buyer_id == "t1"
     
+    def test_stale_empty_top_level_is_skipped(self):
+        """An empty level at the top of the book is dropped and matching continues below it."""
+        t0 = time.time()
+        self.book.add_order(Order("t1", "buy", 100.0, 1, t0))
+        self.book.add_order(Order("t2", "sell", 100.0, 1, t0 + 0.01))
+        self.book.bids[101.0]  # leaves an empty deque at the best bid
+
+        matches = self.engine.match_orders(t0 + 0.02)
+
+        assert len(matches) == 1
+        assert matches[0].price == 100.0
+        assert 101.0 not in self.book.bids
+    
     def test_zero_quantity_order_rejected(self):
         """Orders with zero quantity should be rejected."""
         with pytest.raises(ValueError):
@@ -10,7 +10,7 @@ Focus areas:
 """
 import pytest
 import time
-from engine.order_book import OrderBook, Order
+from engine.order_book import OrderBook, Order, PriceLevel
 
 
 class TestOrderBookBasics:
@@ -166,6 +166,67 @@ class TestOrderCancellation:
         result = self.book.cancel_order_by_id(99999)
         assert result is False
     
+    def test_cancel_orders_by_ids_bulk(self):
+        """Bulk cancel removes only the given ids, ignoring unknown ones."""
+        t0 = time.time()
+        o1 = Order("t1", "buy", 100.0, 1, t0)
+        o2 = Order("t2", "buy", 100.0, 1, t0)
+        o3 = Order("t1", "sell", 105.0, 1, t0)
+        for o in (o1, o2, o3):
+            self.book.add_order(o)
+        
+        canceled = self.book.cancel_orders_by_ids([o1.order_id, o3.order_id, 99999])
+        
+        assert canceled == 2
+        assert [o.order_id for o in self.book.bids[100.0]] == [o2.order_id]
+        assert len(self.book.asks) == 0
+        assert self.book.get_orders_by_trader("t1") == []
+    
+    def test_is_resting_tracks_cancel_and_fill(self):
+        """is_resting is False once an order is canceled or fully filled."""
+        t0 = time.time()
+        kept = Order("t1", "buy", 100.0, 2, t0)
+        canceled = Order("t1", "sell", 105.0, 1, t0)
+        self.book.add_order(kept)
+        self.book.add_order(canceled)
+        
+        self.book.cancel_orders("t1", side="sell")
+        
+        assert self.book.is_resting(kept)
+        assert not self.book.is_resting(canceled)
+        
+        kept.quantity = 0  # drained by a fill
+        assert not self.book.is_resting(kept)
+
+    def test_side_cancel_leaves_other_side_indexed(self):
+        """Canceling one side keeps the trader's other-side orders reachable."""
+        t0 = time.time()
+        ask = Order("t1", "sell", 105.0, 1, t0)
+        self.book.add_order(Order("t1", "buy", 100.0, 1, t0))
+        self.book.add_order(ask)
+
+        assert self.book.cancel_orders("t1", side="buy") == 1
+        assert self.book.cancel_orders("t1", side="buy") == 0
+
+        assert self.book.get_orders_by_trader("t1") == [ask]
+        assert self.book.get_stats()["active_traders"] == 1
+        assert self.book.cancel_orders("t1") == 1
+        assert self.book.get_stats()["active_traders"] == 0
+
+    def test_cancel_mid_level_keeps_fifo(self):
+        """Canceling from the middle of a level unlinks only that order."""
+        t0 = time.time()
+        orders = [Order(f"t{i}", "buy", 100.0, 1, t0 + i) for i in range(3)]
+        for o in orders:
+            self.book.add_order(o)
+
+        assert self.book.cancel_order_by_id(orders[1].order_id)
+        assert not self.book.cancel_order_by_id(orders[1].order_id)
+
+        assert [o.order_id for o in self.book.bids[100.0]] == [orders[0].order_id, orders[2].order_id]
+        assert self.book.get_total_quantity("buy") == 2
+        assert self.book.get_orders_by_trader("t1") == []
+
     def test_empty_price_level_cleaned_up(self):
         """Price level removed when last order canceled."""
         o1 = Order("t1", "buy", 100.0, 1, time.time())
@@ -237,6 +298,25 @@ class TestOrderExpiration:
         assert expired == 3
         assert 100.0 not in book.bids  # Level removed
 
+    def test_expiry_skips_orders_that_left_or_were_refreshed(self):
+        """Canceled orders are not counted; a re-added order expires by its new timestamp."""
+        book = OrderBook(quote_lifetime=1.0)
+        t0 = time.time()
+
+        canceled = Order("t1", "buy", 100.0, 1, t0 - 2.0)
+        refreshed = Order("t2", "sell", 101.0, 1, t0 - 2.0)
+        book.add_order(canceled)
+        book.add_order(refreshed)
+        book.cancel_orders("t1")
+        book.cancel_orders("t2")
+        refreshed.timestamp = t0
+        book.add_order(refreshed)
+
+        assert book.expire_orders(t0) == 0
+        assert book.is_resting(refreshed)
+        assert book.expire_orders(t0 + 1.5) == 1
+        assert len(book.asks) == 0
+
 
 class TestOrderBookDepth:
     """Test market depth aggregation."""
@@ -267,6 +347,44 @@ class TestOrderBookDepth:
         # Second bid (100.0) with aggregated quantity
         assert bids[1] == (100.0, 10)  # 5 + 3 + 2
     
+    def test_total_quantity_running_totals(self):
+        """Side totals follow adds, cancels and expiry without rescanning levels."""
+        book = OrderBook(quote_lifetime=1.0)
+        t0 = time.time()
+        
+        book.add_order(Order("t1", "buy", 100.0, 5, t0))
+        book.add_order(Order("t2", "buy", 99.0, 3, t0 - 2.0))
+        book.add_order(Order("t3", "sell", 101.0, 4, t0))
+        assert book.get_total_quantity("buy") == 8
+        assert book.get_total_depth() == 12
+        
+        book.cancel_orders("t1")
+        book.expire_orders(t0)
+        assert book.get_total_quantity("buy") == 0
+        assert book.get_total_quantity("sell") == 4
+        
+        book.clear()
+        assert book.get_total_depth() == 0
+
+    def test_on_fill_updates_level_totals(self):
+        """on_fill shrinks level/side totals and drops fully filled orders."""
+        t0 = time.time()
+        first = Order("t1", "sell", 101.0, 5, t0)
+        second = Order("t2", "sell", 101.0, 2, t0)
+        self.book.add_order(first)
+        self.book.add_order(second)
+
+        self.book.on_fill(first, 3)
+        assert self.book.get_depth()[1] == [(101.0, 4)]
+
+        self.book.on_fill(first, 2)
+        assert not self.book.is_resting(first)
+        assert self.book.get_total_quantity("sell") == 2
+        assert self.book.get_orders_by_trader("t1") == []
+
+        with pytest.raises(ValueError):
+            self.book.on_fill(second, 3)
+
     def test_depth_sorted_correctly(self):
         """Bids descending, asks ascending."""
         t0 = time.time()
@@ -332,7 +450,28 @@ class TestOrderBookEdgeCases:
         
         spread = book.get_spread()
         assert spread is None
-    
+
+    def test_cached_best_prices_follow_level_changes(self):
+        """Cached best bid/ask track level creation, emptying and clear()."""
+        book = OrderBook()
+        t0 = time.time()
+        orders = [Order("t1", "buy", p, 1, t0) for p in (100.0, 101.0, 99.0)]
+        for o in orders:
+            book.add_order(o)
+        book.add_order(Order("t2", "sell", 103.0, 1, t0))
+        assert book.get_best_bid_ask() == (101.0, 103.0)
+
+        book.cancel_order_by_id(orders[1].order_id)
+        assert book.get_best_bid_ask() == (100.0, 103.0)
+
+        book.add_order(Order("t2", "sell", 102.0, 1, t0))
+        book.asks.pop(102.0)
+        book.add_order(Order("t2", "buy", 100.5, 1, t0))
+        assert book.get_best_bid_ask() == (100.5, 103.0)
+
+        book.clear()
+        assert book.get_best_bid_ask() == (None, None)
+
     def test_get_orders_by_trader_multiple_levels(self):
         """Trader's orders retrieved across all price levels."""
         book = OrderBook()
@@ -358,3 +497,67 @@ class TestOrderBookEdgeCases:
         
         # Should be rounded to 100.5
         assert 100.5 in book.bids or 100.0 in book.bids  # Either round up or down
+    
+    def test_snap_follows_tick_size_change(self):
+        """Memoized snapping is dropped when the tick size changes."""
+        book = OrderBook(min_tick_size=0.5)
+        book.add_order(Order("t1", "buy", 100.3, 1, time.time()))
+        
+        book.min_tick_size = 0.1
+        order = Order("t1", "buy", 100.3, 1, time.time())
+        book.add_order(order)
+        
+        assert order.price == 100.3
+
+    def test_released_order_is_reused_with_fresh_id(self):
+        """acquire() reuses released orders; resting orders cannot be released."""
+        book = OrderBook()
+        order = Order.acquire("t1", "buy", 100.0, 1, time.time())
+        book.add_order(order)
+        assert not order.release()
+
+        book.cancel_order_by_id(order.order_id)
+        old_id = order.order_id
+        assert order.release()
+
+        reused = Order.acquire("t2", "sell", 101.0, 3, time.time())
+        assert reused is order
+        assert reused.order_id > old_id
+        assert (reused.trader_id, reused.side, reused.quantity) == ("t2", "sell", 3)
+
+    def test_unchecked_order_matches_validated_constructor(self):
+        """Order._unchecked builds the same order as Order(...) minus validation."""
+        t0 = time.time()
+        checked = Order("t1", "buy", 100.0, 2, t0)
+        unchecked = Order._unchecked("t1", "buy", 100.0, 2, t0)
+
+        assert unchecked.order_id == checked.order_id + 1
+        assert unchecked == Order("t1", "buy", 100.0, 2, t0, order_id=unchecked.order_id)
+        book = OrderBook()
+        book.add_order(unchecked)
+        assert book.is_resting(unchecked)
+
+
+class TestPriceLevel:
+    """Test the linked FIFO queue behind each price level."""
+    
+    def test_fifo_indexing_and_unlink(self):
+        """Indexing follows FIFO order; unlinking keeps the rest in order."""
+        t0 = time.time()
+        orders = [Order(f"t{i}", "buy", 100.0, i + 1, t0) for i in range(5)]
+        level = PriceLevel(100.0, orders)
+        
+        assert [level[i].trader_id for i in range(5)] == ["t0", "t1", "t2", "t3", "t4"]
+        assert level[-1].trader_id == "t4"
+        assert level.total_qty == 15
+        
+        level.remove(orders[2])
+        assert [o.trader_id for o in level] == ["t0", "t1", "t3", "t4"]
+        assert level.popleft() is orders[0]
+        assert level.remove_if(lambda o: o.trader_id == "t4") == [orders[4]]
+        
+        assert [o.trader_id for o in level] == ["t1", "t3"]
+        assert len(level) == 2
+        assert level.total_qty == 2 + 4
+        with pytest.raises(IndexError):
+            level[2]
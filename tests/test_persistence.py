@@ -0,0 +1,242 @@
+"""
+Persistence tests.
+
+Coverage:
+- Background JSONL writer (ordering, flush barrier, close)
+- Columnar compressed format (round trip, codec detection)
+- Block-indexed writer (time-range reads, partial blocks, append)
+- Stdlib JSON fallback encoding
+- Atomic JSONL writes (streamed, all-or-nothing)
+"""
+import json
+import zlib
+from dataclasses import dataclass
+from enum import Enum
+
+import numpy as np
+import pytest
+
+import infrastructure.persistence as persistence
+
+from infrastructure.persistence import (
+    BLOCK_INDEX_SUFFIX,
+    BackgroundJsonlWriter,
+    BlockIndexedJsonlWriter,
+    atomic_write_columnar,
+    atomic_write_jsonl,
+    compress_bytes,
+    decompress_bytes,
+    encode_jsonl_line,
+    read_block_index,
+    read_columnar,
+    read_indexed_jsonl,
+    read_jsonl,
+)
+
+
+class TestBackgroundJsonlWriter:
+    """Test queued append-only JSONL writing."""
+
+    def test_flush_makes_records_visible_in_order(self, tmp_path):
+        """Everything queued before flush() is on disk afterwards, in order."""
+        path = str(tmp_path / "runs" / "replay.jsonl")
+        writer = BackgroundJsonlWriter(path)
+        for i in range(2500):
+            writer.put({"type": "event", "i": i})
+
+        assert writer.flush(timeout=5.0)
+        assert [r["i"] for r in read_jsonl(path)] == list(range(2500))
+        writer.close()
+
+    def test_close_appends_to_existing_file(self, tmp_path):
+        """close() drains the queue; a new writer appends to the same file."""
+        path = str(tmp_path / "replay.jsonl")
+        first = BackgroundJsonlWriter(path)
+        first.put({"n": 1})
+        first.close()
+
+        second = BackgroundJsonlWriter(path)
+        second.put({"n": 2})
+        second.close()
+
+        assert read_jsonl(path) == [{"n": 1}, {"n": 2}]
+        assert second.flush() is True  # no-op once closed
+
+
+class TestColumnarFormat:
+    """Test the compressed columnar replay format."""
+
+    def test_round_trip_preserves_order_and_shapes(self, tmp_path):
+        """Mixed record types and key sets come back identical and in order."""
+        records = [
+            {"type": "header", "ts": 1.0, "header": {"version": 1}},
+            {"type": "event", "ts": 2.0, "event": {"message": "a"}},
+            {"type": "command", "ts": 2.5, "command": "lift", "payload": {"qty": 1}},
+            {"type": "event", "ts": 3.0, "event": {"message": "b"}},
+            {"type": "event", "ts": 3.5, "event": {"message": "c"}, "extra": True},
+            {"ts": 4.0},
+        ]
+        path = str(tmp_path / "replay.col")
+
+        atomic_write_columnar(path, records)
+
+        assert read_columnar(path) == records
+
+    def test_decompress_detects_codec(self):
+        """Both the active codec and plain zlib streams decode."""
+        data = b'{"type":"event"}' * 50
+
+        assert decompress_bytes(compress_bytes(data)) == data
+        assert decompress_bytes(zlib.compress(data)) == data
+
+
+class TestBlockIndexedWriter:
+    """Test compressed, block-indexed JSONL writing."""
+
+    def test_range_read_skips_blocks(self, tmp_path):
+        """Time-range reads return exactly the matching records from overlapping blocks."""
+        path = str(tmp_path / "replay.jsonl.z")
+        writer = BlockIndexedJsonlWriter(path, block_size=256)
+        for i in range(200):
+            writer.put({"type": "event", "ts": float(i), "i": i})
+        writer.close()
+
+        index = read_block_index(path + BLOCK_INDEX_SUFFIX)
+        assert len(index) > 5
+        assert [e[2] for e in index] == sorted(e[2] for e in index)
+
+        assert [r["i"] for r in read_indexed_jsonl(path)] == list(range(200))
+        assert [r["i"] for r in read_indexed_jsonl(path, 50.0, 59.5)] == list(range(50, 60))
+
+    def test_flush_cuts_partial_block_and_reopen_appends(self, tmp_path):
+        """flush() makes a partial block readable; a second writer appends new blocks."""
+        path = str(tmp_path / "replay.jsonl.z")
+        first = BlockIndexedJsonlWriter(path)
+        first.put({"ts": 1.0, "n": 1})
+        assert first.flush(timeout=5.0)
+        assert read_indexed_jsonl(path) == [{"ts": 1.0, "n": 1}]
+        first.close()
+
+        second = BlockIndexedJsonlWriter(path)
+        second.put({"ts": 2.0, "n": 2})
+        second.close()
+
+        assert [r["n"] for r in read_indexed_jsonl(path)] == [1, 2]
+        assert [r["n"] for r in read_indexed_jsonl(path, t0=1.5)] == [2]
+
+    def test_bad_timestamps_are_dropped_and_writer_survives(self, tmp_path):
+        """Records with a non-numeric ts are skipped; later records still land."""
+        path = str(tmp_path / "replay.jsonl.z")
+        writer = BlockIndexedJsonlWriter(path)
+        for rec in ({"ts": 1.0, "n": 1}, {"ts": "abc", "n": 2}, {"ts": None, "n": 3}, {"ts": 2.0, "n": 4}):
+            writer.put(rec)
+        assert writer.flush(timeout=5.0)
+
+        writer.put({"ts": 3.0, "n": 5})
+        writer.close()
+
+        assert [r["n"] for r in read_indexed_jsonl(path)] == [1, 4, 5]
+
+    def test_writer_thread_survives_unexpected_errors(self, tmp_path, monkeypatch):
+        """A non-OSError from a batch is logged; barriers still release and later batches write."""
+        path = str(tmp_path / "replay.jsonl")
+        writer = BackgroundJsonlWriter(path)
+        monkeypatch.setattr(writer, "_emit", lambda lines, records: 1 / 0)
+        writer.put({"ts": 1.0})
+        assert writer.flush(timeout=5.0)
+
+        monkeypatch.undo()
+        writer.put({"ts": 2.0})
+        writer.close()
+
+        assert read_jsonl(path) == [{"ts": 2.0}]
+
+
+class _Side(Enum):
+    BUY = "buy"
+
+
+@dataclass
+class _Quote:
+    side: _Side
+    levels: tuple
+
+
+class TestStdlibJsonEncoding:
+    """Test the json fallback used when orjson is not installed."""
+
+    def test_encoder_matches_full_walk(self, monkeypatch):
+        """Native encoding with a to_jsonable default equals walking the record first."""
+        monkeypatch.setattr(persistence, "orjson", None)
+        record = {"type": "quote", "ts": 1.5, "quote": _Quote(_Side.BUY, ((99.5, 3),)), "side": _Side.BUY,
+                  "tags": ("a", "b"), "book": {1: [1.0, None]}, "note": "caf\u00e9"}
+
+        line = encode_jsonl_line(record)
+
+        walked = json.dumps(persistence.to_jsonable(record), ensure_ascii=False, separators=(",", ":"))
+        assert line == (walked + "\n").encode("utf-8")
+
+    @pytest.mark.parametrize("record", [
+        {"inf": float("inf"), "nan": float("nan"), "ninf": float("-inf")},
+        {"i": np.int64(5), "f": np.float64(1.5), "fn": np.float64("nan"), "b": np.bool_(True)},
+        {"a": np.arange(3), "m": np.array([[1.0, np.inf]])},
+        {"quote": _Quote(_Side.BUY, (float("inf"),)), "keys": {True: 1, None: 2, 1.5: 3}},
+    ])
+    def test_matches_orjson_output(self, monkeypatch, record):
+        """Non-finite floats, numpy values and odd keys encode the same with or without orjson."""
+        if persistence.orjson is None:
+            pytest.skip("orjson not installed")
+        with_orjson = encode_jsonl_line(record)
+        monkeypatch.setattr(persistence, "orjson", None)
+
+        assert encode_jsonl_line(record) == with_orjson
+
+    def test_unsupported_keys_fall_back_to_full_walk(self, monkeypatch):
+        """Keys the C encoder rejects are stringified like to_jsonable does."""
+        monkeypatch.setattr(persistence, "orjson", None)
+
+        line = encode_jsonl_line({"grid": {(1, 2): "x"}})
+
+        assert json.loads(line) == {"grid": {"(1, 2)": "x"}}
+
+
+class TestAtomicWriteJsonl:
+    """Test streamed atomic JSONL replacement."""
+
+    def test_streams_generator_across_buffer_flushes(self, tmp_path):
+        """Records from a generator all land, in order, even past the buffer size."""
+        path = str(tmp_path / "replay.jsonl")
+        records = [{"type": "event", "ts": float(i), "message": "x" * 50} for i in range(200)]
+
+        atomic_write_jsonl(path, (r for r in records), buffering=256)
+
+        assert read_jsonl(path) == records
+
+    def test_failed_write_keeps_previous_file(self, tmp_path):
+        """An error mid-stream leaves the old file in place and no temp files behind."""
+        path = str(tmp_path / "replay.jsonl")
+        atomic_write_jsonl(path, [{"ts": 1.0}])
+
+        def broken():
+            yield {"ts": 2.0}
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            atomic_write_jsonl(path, broken())
+
+        assert read_jsonl(path) == [{"ts": 1.0}]
+        assert [p.name for p in tmp_path.iterdir()] == ["replay.jsonl"]
+
+    def test_durable_flag_controls_sync(self, tmp_path, monkeypatch):
+        """Only durable writes sync the temp file; both replace atomically."""
+        synced = []
+        monkeypatch.setattr(persistence, "_datasync", synced.append)
+        path = str(tmp_path / "replay.jsonl")
+
+        atomic_write_jsonl(path, [{"ts": 1.0}], durable=False)
+        assert synced == []
+
+        atomic_write_jsonl(path, [{"ts": 2.0}])
+        assert len(synced) == 1
+        assert read_jsonl(path) == [{"ts": 2.0}]
+
@@ -0,0 +1,38 @@
+"""
+Replay manager tests.
+
+Coverage:
+- Autosave holds only the current recording (plain and block-indexed)
+"""
+import pytest
+
+from application.replay_manager import ReplayManager
+from application.session_manager import SessionMeta
+from infrastructure.persistence import read_indexed_jsonl, read_jsonl
+
+
+class _FakeSim:
+    def subscribe_to_events(self, callback):
+        return lambda: None
+
+
+def _record_session(manager, session_id):
+    manager.attach(sim=_FakeSim(), session_meta=SessionMeta(session_id, 0.0, 1, "MEDIUM"))
+    manager.record_command("lift", {"qty": 1})
+    manager.detach()
+
+
+class TestAutosave:
+    """Test the background autosave file."""
+
+    @pytest.mark.parametrize("block_size", [None, 64])
+    def test_new_attach_replaces_previous_session(self, tmp_path, block_size):
+        """Two attach/detach cycles leave only the second session's records."""
+        path = str(tmp_path / "autosave.jsonl")
+
+        _record_session(ReplayManager(autosave_path=path, autosave_block_size=block_size), "first")
+        _record_session(ReplayManager(autosave_path=path, autosave_block_size=block_size), "second")
+
+        records = read_indexed_jsonl(path) if block_size else read_jsonl(path)
+        assert [r["type"] for r in records] == ["header", "command"]
+        assert records[0]["header"]["session_id"] == "second"
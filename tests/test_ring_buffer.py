@@ -0,0 +1,51 @@
+"""
+Ring buffer tests.
+
+Coverage:
+- FIFO order before and after wrap-around
+- Cached view sharing and invalidation
+"""
+import pytest
+from infrastructure.ring_buffer import RingBuffer
+
+
+class TestRingBuffer:
+    """Test fixed-capacity log semantics."""
+
+    def test_behaves_like_bounded_deque(self):
+        """Oldest entries are dropped once capacity is reached."""
+        rb = RingBuffer(3)
+        assert len(rb) == 0
+        assert not rb
+
+        for i in range(5):
+            rb.append(i)
+
+        assert len(rb) == 3
+        assert rb.view() == (2, 3, 4)
+        assert rb[0] == 2
+        assert rb[-1] == 4
+        assert rb[-2:] == (3, 4)
+        assert list(rb) == [2, 3, 4]
+
+    def test_view_cached_until_append(self):
+        """Readers between appends share one tuple."""
+        rb = RingBuffer(4)
+        rb.append("a")
+        first = rb.view()
+
+        assert rb.view() is first
+
+        rb.append("b")
+        assert rb.view() is not first
+        assert rb.view() == ("a", "b")
+
+    def test_clear_and_invalid_capacity(self):
+        """clear() empties the buffer; capacity must be positive."""
+        rb = RingBuffer(2)
+        rb.append(1)
+        rb.clear()
+        assert rb.view() == ()
+
+        with pytest.raises(ValueError):
+            RingBuffer(0)
@@ -9,6 +9,7 @@ Critical tests:
 """
 import pytest
 import time
+import numpy as np
 from engine.trader import Trader, Fill, TradeSide
 from engine.risk_manager import RiskManager
 
@@ -101,6 +102,19 @@ class TestMarginCalls:
         
         assert trader.position == 0
 
+    def test_event_log_is_bounded(self):
+        """Audit log keeps only the newest events but counts all of them."""
+        risk = RiskManager(loss_limit=-10.0, max_events_kept=3)
+        trader = Trader("t1")
+        trader.apply_fill(Fill(100.0, 5, TradeSide.BUY, time.time()))
+
+        for t in range(5):
+            risk.check_loss_limit(trader, fair_value=90.0, current_time=float(t))
+
+        assert [e.timestamp for e in risk.get_recent_events(2)] == [3.0, 4.0]
+        assert len(risk.get_recent_events()) == 3
+        assert risk.get_stats()['total_events'] == 5
+
 
 class TestRiskMetrics:
     """Test risk metrics calculation."""
@@ -140,3 +154,21 @@ class TestRiskMetrics:
         metrics = risk.get_risk_metrics(trader, current_price=96.0)
         
         assert metrics['at_risk'] is True
+    
+    def test_bulk_metrics_match_per_trader(self):
+        """Vectorized metrics agree with get_risk_metrics for each trader."""
+        risk = RiskManager(position_limit=10, margin_threshold=-50.0)
+        traders = [Trader(f"t{i}") for i in range(3)]
+        traders[0].apply_fill(Fill(100.0, 10, TradeSide.BUY, time.time()))
+        traders[1].apply_fill(Fill(95.0, 4, TradeSide.SELL, time.time()))
+        
+        bulk = risk.get_risk_metrics_bulk(
+            np.array([t.position for t in traders], dtype=np.float64),
+            np.array([t.cash for t in traders], dtype=np.float64),
+            96.0,
+        )
+        
+        for i, trader in enumerate(traders):
+            single = risk.get_risk_metrics(trader, current_price=96.0)
+            for key in ('mtm_pnl', 'margin_cushion', 'position_utilization', 'at_risk'):
+                assert bulk[key][i] == pytest.approx(single[key])
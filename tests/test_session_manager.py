@@ -0,0 +1,67 @@
+"""
+Session manager tests.
+
+Coverage:
+- Closing a session stops its simulator's dispatcher thread
+- Checkpoint reload with custom config factories
+"""
+import gc
+import weakref
+
+from infrastructure.config import DifficultyConfig
+from application.session_manager import SessionManager
+
+
+class TestCloseSession:
+    """Test session teardown."""
+
+    def test_close_stops_dispatcher_and_frees_simulator(self):
+        """close_session ends the dispatcher thread and lets the simulator be collected."""
+        sessions = SessionManager()
+        meta = sessions.create_session(DifficultyConfig.MEDIUM(), seed=1)
+        sim = sessions.get(meta.session_id)
+        snapshots = []
+        sim.subscribe_to_state_changes(snapshots.append)
+
+        sim.start_round(1)
+        assert sim.flush_notifications(timeout=5.0)
+        thread = sim._dispatcher_thread
+        assert thread is not None and thread.is_alive()
+        assert snapshots
+
+        assert sessions.close_session(meta.session_id) is True
+        thread.join(timeout=5.0)
+        assert not thread.is_alive()
+
+        ref = weakref.ref(sim)
+        del sim, snapshots
+        gc.collect()
+        assert ref() is None
+
+    def test_close_unknown_session(self):
+        """Closing an unknown id reports False."""
+        assert SessionManager().close_session("missing") is False
+
+
+class TestLoadCheckpoint:
+    """Test checkpoint reload."""
+
+    def test_plain_callable_factory_gets_medium_fallback(self, tmp_path):
+        """A factory without preset attributes is called with "MEDIUM"."""
+        sessions = SessionManager()
+        meta = sessions.create_session(DifficultyConfig.MEDIUM(), seed=7)
+        path = str(tmp_path / "checkpoint.json")
+        sessions.save_checkpoint(meta.session_id, path)
+
+        requested = []
+
+        def factory(name):
+            requested.append(name)
+            return DifficultyConfig.MEDIUM()
+
+        loaded, sim = sessions.load_checkpoint(path, factory)
+
+        assert requested == ["MEDIUM"]
+        assert loaded.seed == 7
+        assert sim is sessions.get(loaded.session_id)
+
@@ -9,9 +9,11 @@ Coverage:
 - Performance metrics
 - Edge cases
 """
+import math
 import pytest
 import time
-from engine.trader import Trader, Fill, TradeSide
+import numpy as np
+from engine.trader import Trader, Fill, TradeSide, _sharpe_ratio, _sharpe_ratio_numpy
 
 
 class TestTraderBasics:
@@ -61,6 +63,37 @@ class TestTraderBasics:
         assert self.trader.position == 5  # 2 + 3
         assert self.trader.cash == -515.0  # -(2*100 + 3*105)
         assert self.trader.num_fills == 2
+    
+    def test_fill_arrays_mirror_fills(self):
+        """Columnar fill arrays match the fill history, across buffer growth."""
+        for i in range(40):
+            side = TradeSide.BUY if i % 3 else TradeSide.SELL
+            self.trader.apply_fill(Fill(100.0 + i, i + 1, side, time.time(), fee=0.5))
+        
+        price, qty, side_sign, fee = self.trader.fill_arrays()
+        fills = self.trader.fills
+        
+        assert len(price) == len(fills) == 40
+        assert list(price) == [f.price for f in fills]
+        assert list(qty) == [f.quantity for f in fills]
+        assert list(side_sign) == [f.signed_quantity() // f.quantity for f in fills]
+        assert list(fee) == [f.fee for f in fills]
+        
+        with pytest.raises(ValueError):
+            price[0] = 0.0
+    
+    def test_fill_records_window_is_bounded(self):
+        """Old Fill records drop out of the window; counts and arrays keep every fill."""
+        trader = Trader("t1", max_fill_history=3)
+        for i in range(5):
+            trader.apply_fill(Fill(100.0 + i, 1, TradeSide.BUY, time.time()))
+        
+        assert [f.price for f in trader.fills] == [102.0, 103.0, 104.0]
+        assert [f.price for f in trader.get_fills(1)] == [103.0, 104.0]
+        assert trader.num_fills == 5
+        assert len(trader.fill_arrays()[0]) == 5
+        assert trader.calculate_vwap() == pytest.approx(102.0)
+        assert trader.get_fill_summary()['total_fills'] == 5
 
 
 class TestPnLCalculations:
@@ -130,6 +163,33 @@ class TestPnLCalculations:
         
         # Profit = (110 - 100) * 5 = 50
         assert pnl == pytest.approx(50.0)
+    
+    def test_average_cost_and_realized_pnl(self):
+        """Reducing fills realize P&L against the average cost."""
+        self.trader.apply_fill(Fill(100.0, 2, TradeSide.BUY, time.time()))
+        self.trader.apply_fill(Fill(110.0, 2, TradeSide.BUY, time.time()))
+        assert self.trader.avg_cost == pytest.approx(105.0)
+        
+        # Sell 3 @ 120: realize 3 * (120 - 105) = 45, flip nothing
+        self.trader.apply_fill(Fill(120.0, 3, TradeSide.SELL, time.time()))
+        assert self.trader.realized_pnl == pytest.approx(45.0)
+        assert self.trader.avg_cost == pytest.approx(105.0)
+        
+        # Sell 3 @ 100: close 1 (realize -5), open short 2 @ 100
+        self.trader.apply_fill(Fill(100.0, 3, TradeSide.SELL, time.time()))
+        assert self.trader.position == -2
+        assert self.trader.realized_pnl == pytest.approx(40.0)
+        assert self.trader.avg_cost == pytest.approx(100.0)
+        assert self.trader.unrealized_pnl(95.0) == pytest.approx(10.0)
+    
+    def test_liquidate_keeps_pnl_consistent(self):
+        """Forced liquidation flattens and realizes against cost basis."""
+        self.trader.apply_fill(Fill(100.0, 5, TradeSide.BUY, time.time(), fee=1.0))
+        self.trader.liquidate(90.0)
+        
+        assert self.trader.position == 0
+        assert self.trader.realized_pnl == pytest.approx(-50.0)
+        assert self.trader.mark_to_market(123.0) == pytest.approx(-51.0)
 
 
 class TestVWAP:
@@ -171,6 +231,15 @@ class TestVWAP:
         """VWAP is 0 when no fills."""
         trader = Trader("t1")
         assert trader.calculate_vwap() == 0.0
+    
+    def test_vwap_refreshes_after_new_fill(self):
+        """VWAP picks up the next fill."""
+        trader = Trader("t1")
+        trader.apply_fill(Fill(100.0, 1, TradeSide.BUY, time.time()))
+        assert trader.calculate_vwap() == pytest.approx(100.0)
+        
+        trader.apply_fill(Fill(110.0, 1, TradeSide.BUY, time.time()))
+        assert trader.calculate_vwap() == pytest.approx(105.0)
 
 
 class TestAdverseSelection:
@@ -232,6 +301,33 @@ class TestPerformanceMetrics:
         # Should be positive (profitable trades)
         assert sharpe > 0
     
+    @pytest.mark.parametrize("num_periods", [3, 10, 40])
+    def test_sharpe_matches_fill_contributions(self, num_periods):
+        """Sharpe over the fill window agrees with per-Fill contributions."""
+        trader = Trader("t1")
+        rng = np.random.default_rng(num_periods)
+        for _ in range(25):
+            side = TradeSide.BUY if rng.random() < 0.5 else TradeSide.SELL
+            trader.apply_fill(Fill(round(float(rng.uniform(95.0, 105.0)), 1), int(rng.integers(1, 4)), side, time.time()))
+        
+        returns = [f.pnl_contribution(101.0) for f in trader.fills[-num_periods:]]
+        mean = sum(returns) / len(returns)
+        expected = mean / math.sqrt(sum((r - mean) ** 2 for r in returns) / len(returns))
+        
+        assert trader.calculate_sharpe_ratio(101.0, num_periods) == pytest.approx(expected)
+    
+    @pytest.mark.parametrize("n", [0, 1, 2, 9, 300])
+    def test_sharpe_kernel_matches_numpy_reference(self, n):
+        """Sharpe kernel agrees with the NumPy reference path."""
+        rng = np.random.default_rng(n)
+        price = rng.uniform(95.0, 105.0, size=n)
+        qty = rng.integers(1, 4, size=n).astype(np.int64)
+        side_sign = np.where(rng.random(n) < 0.5, 1, -1).astype(np.int8)
+        
+        assert _sharpe_ratio(price, qty, side_sign, 100.0) == pytest.approx(
+            _sharpe_ratio_numpy(price, qty, side_sign, 100.0)
+        )
+    
     def test_return_percentage(self):
         """Return calculated as percentage."""
         trader = Trader("t1")
@@ -243,3 +339,34 @@ class TestPerformanceMetrics:
         
         # P&L = 100, return = 100/1000 = 10%
         assert return_pct == pytest.approx(10.0)
+    
+    def test_fill_summary(self):
+        """Fill summary counts sides and averages over the whole history."""
+        trader = Trader("t1")
+        trader.apply_fill(Fill(100.0, 2, TradeSide.BUY, time.time()))
+        trader.apply_fill(Fill(104.0, 1, TradeSide.SELL, time.time()))
+        trader.apply_fill(Fill(98.0, 3, TradeSide.BUY, time.time()))
+        
+        summary = trader.get_fill_summary()
+        
+        assert summary['total_fills'] == 3
+        assert summary['buy_fills'] == 2
+        assert summary['sell_fills'] == 1
+        assert summary['total_volume'] == pytest.approx(598.0)  # 200 + 104 + 294
+        assert summary['avg_fill_price'] == pytest.approx(598.0 / 6)
+        assert summary['avg_fill_size'] == pytest.approx(2.0)
+        assert isinstance(summary['total_volume'], float)
+    
+    def test_reset_clears_fill_aggregates(self):
+        """Reset zeroes VWAP and the fill summary along with the history."""
+        trader = Trader("t1")
+        trader.apply_fill(Fill(100.0, 2, TradeSide.BUY, time.time()))
+        trader.reset()
+        
+        assert trader.calculate_vwap() == 0.0
+        assert trader.get_fill_summary()['total_volume'] == 0.0
+        
+        trader.apply_fill(Fill(90.0, 1, TradeSide.SELL, time.time()))
+        summary = trader.get_fill_summary()
+        assert summary['buy_fills'] == 0
+        assert summary['avg_fill_price'] == pytest.approx(90.0)
@@ -310,7 +310,7 @@ class MainWindow(QMainWindow):
         alerts = getattr(snap, "recent_alerts", [])
         if alerts:
             self.log_list.clear()
-            self.log_list.addItems(alerts[-12:])
+            self.log_list.addItems(list(alerts[-12:]))
 
         # Trades
         trades = getattr(snap, "recent_trades", [])